@@ -0,0 +1,49 @@
+'''DPU-hours and spend attribution (lib.cost) over a year of job runs of thousands of jobs
+
+    pipenv run python -m benchmarks.cost [--jobs N] [--runs N]
+'''
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from lib.aws.jobs import JobRun
+from lib.cost import costReport
+from lib.jobRunStore import JobRunStore
+
+# Worker type and workers (None for the jobs sized by MaxCapacity)
+workerConfigurations = [('G.1X', 10), ('G.2X', 5), ('G.025X', 2), (None, None)]
+
+
+def makeRuns(numJobs: int, numRuns: int, now: datetime):
+    rng = random.Random(42)
+    for i in range(numRuns):
+        workerType, workers = workerConfigurations[i % numJobs % len(workerConfigurations)]
+        startedOn = now - timedelta(seconds=rng.uniform(0, 365 * 24 * 3600))
+        executionTime = rng.randint(30, 3 * 3600)
+        yield JobRun(
+            Id=f'jr_{i:064x}', Attempt=0, JobName=f'job_{i % numJobs}', StartedOn=startedOn,
+            JobRunState='SUCCEEDED', AllocatedCapacity=10, ExecutionTime=executionTime, Timeout=2880,
+            MaxCapacity=10.0 if workerType is None else None, LogGroupName='/aws-glue/jobs', GlueVersion='3.0',
+            WorkerType=workerType, NumberOfWorkers=workers, CompletedOn=startedOn + timedelta(seconds=executionTime),
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=3000)
+    parser.add_argument('--runs', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    now = datetime.now(tz=timezone.utc)
+    store = JobRunStore()
+    store.append(makeRuns(args.jobs, args.runs, now))
+
+    start = time.perf_counter()
+    report = costReport(store, (now - timedelta(days=365)).timestamp(), now.timestamp())
+    top = report.topJobs(20)
+    elapsed = time.perf_counter() - start
+
+    print(f'{len(store):,} runs, {len(report.jobNames):,} jobs x {report.dpuHours.shape[1]} days '
+          f'{elapsed:>8.2f} s   {report.dpuHours.sum():,.0f} DPU-hours, ${report.spend.sum():,.0f}, '
+          f'top job {report.jobNames[top[0]]}')
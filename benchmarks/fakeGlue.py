@@ -0,0 +1,255 @@
+import json
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from botocore.awsrequest import AWSResponse
+
+from benchmarks.syntheticAccount import SyntheticAccount
+from lib.aws.common import getClient
+from lib.config import AWSProfile
+
+
+class FakeGlueError(Exception):
+    errorType: str
+    status: int
+
+    def __init__(self, errorType: str, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.errorType = errorType
+        self.status = status
+
+
+class _RawBody:
+    '''The bare minimum of urllib3's response used by botocore's AWSResponse'''
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+
+    def stream(self, **_) -> Iterator[bytes]:
+        yield self.body
+
+
+def _encodeValue(value: Any) -> Any:
+    # The JSON protocol serializes timestamps as epoch seconds
+    if isinstance(value, datetime):
+        return value.timestamp()
+
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _page(items: Callable[[int], dict], count: int, request: dict, itemsField: str, maxPageSize: int) -> dict:
+    start = int(request.get('NextToken') or 0)
+    pageSize = min(int(request.get('MaxResults') or maxPageSize), maxPageSize)
+    end = min(start + pageSize, count)
+
+    response = {itemsField: [items(i) for i in range(start, end)]}
+    if end < count:
+        response['NextToken'] = str(end)
+
+    return response
+
+
+class FakeGlueBackend:
+    '''In-process Glue endpoint serving a SyntheticAccount.
+        It answers at the HTTP level (botocore's before-send event), so that the clients' parsing,
+        pagination and retry logic (adaptive mode included) are exercised as with the real service.
+
+        account         SyntheticAccount    the account to serve
+        latency         float               seconds added to every call
+        jitter          float               random seconds (0 to jitter) added to every call
+        throttleRate    float               probability of a call to fail with a ThrottlingException
+        pageSize        int                 maximum items per page
+        seed            int                 seed of the jitter / throttling generator
+    '''
+    account: SyntheticAccount
+    latency: float
+    jitter: float
+    throttleRate: float
+    pageSize: int
+
+    calls: Counter
+    throttled: int
+
+    _random: random.Random
+    _lock: threading.Lock
+
+    def __init__(
+        self, account: SyntheticAccount, latency: float = 0.0, jitter: float = 0.0,
+        throttleRate: float = 0.0, pageSize: int = 100, seed: int = 0,
+    ) -> None:
+        self.account = account
+        self.latency = latency
+        self.jitter = jitter
+        self.throttleRate = throttleRate
+        self.pageSize = pageSize
+
+        self.calls = Counter()
+        self.throttled = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self._operations: Dict[str, Callable[[dict], dict]] = {
+            'GetJobs': self.getJobs,
+            'GetJobRuns': self.getJobRuns,
+            'GetJobRun': self.getJobRun,
+            'ListWorkflows': self.listWorkflows,
+            'BatchGetWorkflows': self.batchGetWorkflows,
+            'GetWorkflow': self.getWorkflow,
+            'GetWorkflowRuns': self.getWorkflowRuns,
+            'GetWorkflowRun': self.getWorkflowRun,
+        }
+
+    def install(self, client: Any) -> None:
+        client.meta.events.register_first(
+            'before-send.glue', self._onBeforeSend, unique_id=f'fakeGlue{id(self)}')
+
+    def uninstall(self, client: Any) -> None:
+        client.meta.events.unregister(
+            'before-send.glue', unique_id=f'fakeGlue{id(self)}')
+
+    @contextmanager
+    def installed(self, profile: AWSProfile) -> Iterator[Any]:
+        '''Serves the profile's glue client while in the context'''
+        client = getClient('glue', profile)
+        self.install(client)
+        try:
+            yield client
+        finally:
+            self.uninstall(client)
+
+    def _onBeforeSend(self, request: Any, **_) -> AWSResponse:
+        # i.e. AWSGlue.GetJobRuns
+        target = request.headers['X-Amz-Target']
+        if isinstance(target, bytes):
+            target = target.decode('utf-8')
+        operation = target.split('.')[-1]
+        body = json.loads(request.body or b'{}')
+
+        with self._lock:
+            self.calls[operation] += 1
+            delay = self.latency + self._random.random() * self.jitter
+            throttle = self._random.random() < self.throttleRate
+            if throttle:
+                self.throttled += 1
+
+        if delay > 0:
+            time.sleep(delay)
+
+        status, payload = self._dispatch(operation, body, throttle)
+
+        return AWSResponse(
+            request.url, status,
+            {'Content-Type': 'application/x-amz-json-1.1',
+             'x-amzn-RequestId': f'fake-{operation}'},
+            _RawBody(json.dumps(payload, default=_encodeValue).encode('utf-8')),
+        )
+
+    def _dispatch(self, operation: str, body: dict, throttle: bool) -> Tuple[int, dict]:
+        try:
+            if throttle:
+                raise FakeGlueError('ThrottlingException', 'Rate exceeded')
+            if operation not in self._operations:
+                raise FakeGlueError('InvalidInputException',
+                                    f'{operation} is not supported by the fake backend')
+
+            return 200, self._operations[operation](body)
+        except FakeGlueError as ex:
+            return ex.status, {'__type': ex.errorType, 'message': str(ex)}
+
+    def _jobIndex(self, jobName: str) -> int:
+        index = self.account.jobIndex(jobName)
+        if index is None:
+            raise FakeGlueError('EntityNotFoundException',
+                                f'Job {jobName} not found')
+
+        return index
+
+    def _workflowIndex(self, workflowName: str) -> int:
+        index = self.account.workflowIndex(workflowName)
+        if index is None:
+            raise FakeGlueError('EntityNotFoundException',
+                                f'Workflow {workflowName} not found')
+
+        return index
+
+    def _runIndex(self, runId: str, count: int) -> int:
+        runIndex = count - 1 - SyntheticAccount.runSequence(runId)
+        if not 0 <= runIndex < count:
+            raise FakeGlueError('EntityNotFoundException',
+                                f'Run {runId} not found')
+
+        return runIndex
+
+    # Operations
+
+    def getJobs(self, request: dict) -> dict:
+        return _page(self.account.job, self.account.numJobs, request, 'Jobs', self.pageSize)
+
+    def getJobRuns(self, request: dict) -> dict:
+        jobIndex = self._jobIndex(request['JobName'])
+
+        return _page(
+            lambda runIndex: self.account.jobRun(jobIndex, runIndex),
+            self.account.jobRunCount(jobIndex), request, 'JobRuns', min(self.pageSize, 200))
+
+    def getJobRun(self, request: dict) -> dict:
+        jobIndex = self._jobIndex(request['JobName'])
+        runIndex = self._runIndex(
+            request['RunId'], self.account.jobRunCount(jobIndex))
+
+        return {'JobRun': self.account.jobRun(jobIndex, runIndex)}
+
+    def listWorkflows(self, request: dict) -> dict:
+        return _page(
+            lambda i: self.account.workflowNames[i], self.account.numWorkflows,
+            request, 'Workflows', min(self.pageSize, 25))
+
+    def batchGetWorkflows(self, request: dict) -> dict:
+        names: List[str] = request['Names']
+        if len(names) > 25:
+            raise FakeGlueError(
+                'ValidationException', 'Member must have length less than or equal to 25')
+
+        indexes = [(name, self.account.workflowIndex(name)) for name in names]
+
+        return {
+            'Workflows': [self.account.workflow(index, request.get('IncludeGraph', False))
+                          for _, index in indexes if index is not None],
+            'MissingWorkflows': [name for name, index in indexes if index is None],
+        }
+
+    def getWorkflow(self, request: dict) -> dict:
+        index = self._workflowIndex(request['Name'])
+
+        return {'Workflow': self.account.workflow(index, request.get('IncludeGraph', False))}
+
+    def getWorkflowRuns(self, request: dict) -> dict:
+        index = self._workflowIndex(request['Name'])
+
+        return _page(
+            lambda runIndex: self.account.workflowRun(index, runIndex),
+            self.account.workflowRunCount(index), request, 'Runs', min(self.pageSize, 50))
+
+    def getWorkflowRun(self, request: dict) -> dict:
+        index = self._workflowIndex(request['Name'])
+        runIndex = self._runIndex(
+            request['RunId'], self.account.workflowRunCount(index))
+
+        return {'Run': self.account.workflowRun(index, runIndex)}
+
+    def statsLine(self) -> str:
+        total = sum(self.calls.values())
+        perOperation = ', '.join(
+            f'{operation}: {count}' for operation, count in sorted(self.calls.items()))
+
+        return f'{total} calls ({perOperation}), {self.throttled} throttled'
+
+
+def fakeProfile(label: str = 'fakeGlue', region: Optional[str] = 'eu-west-1') -> AWSProfile:
+    return AWSProfile(label=label, region=region, accessKey='AKIAFAKEGLUE', secretAccessKey='fake')
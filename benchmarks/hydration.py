@@ -0,0 +1,61 @@
+'''Job runs hydration throughput and memory: legacy initClassFromArgs vs compiled constructors and slotted dataclasses
+
+    pipenv run python -m benchmarks.hydration [number of runs]
+'''
+import dataclasses
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+from lib.aws.common import compileConstructor
+from lib.aws.jobs import JobRun
+
+# Same fields and defaults, without __slots__
+LegacyJobRun = dataclasses.make_dataclass('LegacyJobRun', [
+    (field.name, field.type, dataclasses.field(
+        default=field.default, default_factory=field.default_factory))
+    for field in dataclasses.fields(JobRun)
+])
+
+
+def legacyInitClassFromArgs(classType: type, data: dict):
+    fieldNames = [field.name for field in dataclasses.fields(classType)]
+
+    return classType(**{key: value for key, value in data.items() if key in fieldNames})
+
+
+def makeResponseItems(count: int) -> List[dict]:
+    startedOn = datetime(2021, 6, 1, tzinfo=timezone.utc)
+
+    return [{
+        'Id': f'jr_{i:064x}', 'Attempt': 0, 'JobName': f'job_{i % 900}',
+        'StartedOn': startedOn + timedelta(minutes=i), 'LastModifiedOn': startedOn + timedelta(minutes=i + 5),
+        'CompletedOn': startedOn + timedelta(minutes=i + 5), 'JobRunState': 'SUCCEEDED',
+        'Arguments': {'--job-bookmark-option': 'job-bookmark-disable'}, 'PredecessorRuns': [],
+        'AllocatedCapacity': 10, 'ExecutionTime': 300, 'Timeout': 2880, 'MaxCapacity': 10.0,
+        'WorkerType': 'G.1X', 'NumberOfWorkers': 10, 'LogGroupName': '/aws-glue/jobs',
+        'GlueVersion': '2.0',
+    } for i in range(count)]
+
+
+def measure(label: str, items: List[dict], hydrate: Callable[[dict], object]) -> None:
+    start = time.perf_counter()
+    result = [hydrate(item) for item in items]
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = [hydrate(item) for item in items]
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'{label:<10} {len(result) / elapsed:>12,.0f} runs/s {memory / len(result):>8,.0f} B/run')
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    items = makeResponseItems(count)
+
+    measure('before', items, lambda item: legacyInitClassFromArgs(LegacyJobRun, item))
+    measure('after', items, compileConstructor(JobRun))
@@ -0,0 +1,60 @@
+'''End to end refresh of a synthetic account served by the in-process fake Glue backend:
+    jobs list, job runs (cold and warm run cache) and workflows list.
+
+    pipenv run python -m benchmarks.refresh [--jobs N] [--runs N] [--workflows N] [--latency S] [--throttle-rate P]
+'''
+import argparse
+import tempfile
+import time
+from typing import Callable
+
+from benchmarks.fakeGlue import FakeGlueBackend, fakeProfile
+from benchmarks.syntheticAccount import SyntheticAccount
+from lib import aws
+from lib.aws.runCache import RunCache
+
+
+def measure(label: str, backend: FakeGlueBackend, fn: Callable[[], int]) -> None:
+    backend.calls.clear()
+    backend.throttled = 0
+
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+
+    print(f'{label:<18} {count:>9,} items {elapsed:>8.2f} s   {backend.statsLine()}')
+
+
+def fetchJobRuns(profile, jobNames, cache) -> int:
+    batch = aws.getJobRunsBatch(profile, jobNames, cache=cache, ratePerSecond=1000.0)
+
+    return sum(len(result.value or []) for result in batch)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=50_000)
+    parser.add_argument('--workflows', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help='seconds added to every call')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='probability of a call to be throttled')
+    args = parser.parse_args()
+
+    account = SyntheticAccount(
+        numJobs=args.jobs, numRuns=args.runs, numWorkflows=args.workflows)
+    backend = FakeGlueBackend(
+        account, latency=args.latency, jitter=args.latency / 2, throttleRate=args.throttle_rate)
+    profile = fakeProfile()
+
+    with backend.installed(profile), tempfile.TemporaryDirectory() as cacheRoot:
+        cache = RunCache(cacheRoot, profile, 'jobRuns', aws.JobRun, 'Id')
+
+        measure('jobs', backend, lambda: len(aws.getJobs(profile)))
+        measure('job runs (cold)', backend,
+                lambda: fetchJobRuns(profile, account.jobNames, cache))
+        measure('job runs (warm)', backend,
+                lambda: fetchJobRuns(profile, account.jobNames, cache))
+        measure('workflows', backend,
+                lambda: len(aws.getWorkflowsList(profile)))
@@ -0,0 +1,267 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+workerTypes = (
+    # Worker type, DPU per worker
+    ('Standard', 1.0),
+    ('G.1X', 1.0),
+    ('G.2X', 2.0),
+)
+
+errorMessages = (
+    'An error occurred while calling o95.pyWriteDynamicFrame. Access Denied',
+    'Command failed with exit code 1',
+    'Container killed by YARN for exceeding memory limits. 5.5 GB of 5.5 GB physical memory used.',
+    'ConcurrentRunsExceededException: Concurrent runs exceeded for job',
+    'AnalysisException: Path does not exist: s3://bucket/prefix/',
+)
+
+
+class SyntheticAccount:
+    '''Deterministic, lazily generated Glue account (API response items) for scale testing.
+        Runs are never stored: every run is generated on demand from (seed, job, run sequence number),
+        so accounts with hundreds of thousands of runs don't need any memory.
+        New runs can be simulated with addJobRuns / addWorkflowRuns: the previously newest runs,
+        if still running, get completed (the sequence numbers and ids of the older runs don't change).
+
+        numJobs             int         amount of jobs
+        numRuns             int         total amount of job runs, unevenly split among the jobs
+        numWorkflows        int         amount of workflows
+        runsPerWorkflow     int         amount of runs of each workflow
+        history             timedelta   how far in the past the runs go
+        runningRatio        float       probability of the newest run of a job / workflow to be still running
+        failureRatio        float       probability of a run to fail
+        seed                int         the generator's seed
+        now                 datetime    the newest runs' reference time (default: now)
+    '''
+    numJobs: int
+    numRuns: int
+    numWorkflows: int
+    runsPerWorkflow: int
+    history: timedelta
+    runningRatio: float
+    failureRatio: float
+    seed: int
+    now: datetime
+
+    jobNames: List[str]
+    workflowNames: List[str]
+
+    _jobIndexes: Dict[str, int]
+    _workflowIndexes: Dict[str, int]
+    _jobRunCounts: List[int]
+    _initialJobRunCounts: List[int]
+    _jobRunPeriods: List[timedelta]
+    _workflowRunCounts: List[int]
+    _workflowRunPeriod: timedelta
+
+    def __init__(
+        self, numJobs: int = 100, numRuns: int = 10_000, numWorkflows: int = 10,
+        runsPerWorkflow: int = 50, history: timedelta = timedelta(days=90),
+        runningRatio: float = 0.05, failureRatio: float = 0.05,
+        seed: int = 0, now: Optional[datetime] = None,
+    ) -> None:
+        self.numJobs = numJobs
+        self.numRuns = numRuns
+        self.numWorkflows = numWorkflows
+        self.runsPerWorkflow = runsPerWorkflow
+        self.history = history
+        self.runningRatio = runningRatio
+        self.failureRatio = failureRatio
+        self.seed = seed
+        self.now = now if now is not None else datetime.now(tz=timezone.utc)
+
+        self.jobNames = [f'job_{i:05d}' for i in range(numJobs)]
+        self.workflowNames = [f'workflow_{i:04d}' for i in range(numWorkflows)]
+        self._jobIndexes = {name: i for i, name in enumerate(self.jobNames)}
+        self._workflowIndexes = {
+            name: i for i, name in enumerate(self.workflowNames)}
+
+        # Few jobs run very often, most of them rarely
+        weights = [1 / (i % 50 + 1) for i in range(numJobs)]
+        totalWeight = sum(weights)
+        self._jobRunCounts = [int(numRuns * weight / totalWeight)
+                              for weight in weights]
+        for i in range(numRuns - sum(self._jobRunCounts)):
+            self._jobRunCounts[i % numJobs] += 1
+        self._initialJobRunCounts = list(self._jobRunCounts)
+        self._jobRunPeriods = [max(history / max(count, 1), timedelta(minutes=5))
+                               for count in self._jobRunCounts]
+
+        self._workflowRunCounts = [runsPerWorkflow] * numWorkflows
+        self._workflowRunPeriod = max(
+            history / max(runsPerWorkflow, 1), timedelta(minutes=15))
+
+    def _random(self, *keys) -> random.Random:
+        return random.Random(':'.join(str(key) for key in (self.seed,) + keys))
+
+    def jobIndex(self, jobName: str) -> Optional[int]:
+        return self._jobIndexes.get(jobName)
+
+    def workflowIndex(self, workflowName: str) -> Optional[int]:
+        return self._workflowIndexes.get(workflowName)
+
+    def jobRunCount(self, jobIndex: int) -> int:
+        return self._jobRunCounts[jobIndex]
+
+    def workflowRunCount(self, workflowIndex: int) -> int:
+        return self._workflowRunCounts[workflowIndex]
+
+    def addJobRuns(self, jobIndex: int, count: int = 1) -> None:
+        self._jobRunCounts[jobIndex] += count
+
+    def addWorkflowRuns(self, workflowIndex: int, count: int = 1) -> None:
+        self._workflowRunCounts[workflowIndex] += count
+
+    def _startedOn(self, period: timedelta, initialCount: int, sequence: int, rng: random.Random) -> datetime:
+        # The runs existing at creation time end before now, the added ones follow with the same period
+        return self.now - period * (initialCount - sequence) + period * (rng.random() / 4)
+
+    @staticmethod
+    def runSequence(runId: str) -> int:
+        '''The sequence number encoded in job / workflow run ids'''
+        return int(runId[-8:], 16)
+
+    def job(self, index: int) -> dict:
+        rng = self._random('job', index)
+        workerType, _ = rng.choice(workerTypes)
+        numberOfWorkers = rng.randint(2, 50)
+        createdOn = self.now - self.history - timedelta(days=rng.randint(1, 365))
+
+        return {
+            'Name': self.jobNames[index],
+            'Description': f'Synthetic job #{index}',
+            'Role': 'arn:aws:iam::123456789012:role/GlueJobRole',
+            'CreatedOn': createdOn,
+            'LastModifiedOn': createdOn + timedelta(days=rng.randint(0, 30)),
+            'ExecutionProperty': {'MaxConcurrentRuns': 1},
+            'Command': {'Name': 'glueetl', 'ScriptLocation': f's3://scripts/job_{index}.py', 'PythonVersion': '3'},
+            'DefaultArguments': {'--job-language': 'python', '--TempDir': 's3://temp/'},
+            'Connections': {'Connections': [f'connection_{index % 5}']},
+            'MaxRetries': 0,
+            'AllocatedCapacity': numberOfWorkers,
+            'Timeout': 2880,
+            'MaxCapacity': float(numberOfWorkers),
+            'WorkerType': workerType,
+            'NumberOfWorkers': numberOfWorkers,
+            'GlueVersion': rng.choice(('1.0', '2.0', '3.0')),
+        }
+
+    def jobRun(self, jobIndex: int, runIndex: int) -> dict:
+        '''The job's run, runIndex 0 being the newest one'''
+        sequence = self._jobRunCounts[jobIndex] - 1 - runIndex
+        rng = self._random('jobRun', jobIndex, sequence)
+        period = self._jobRunPeriods[jobIndex]
+        startedOn = self._startedOn(
+            period, self._initialJobRunCounts[jobIndex], sequence, rng)
+
+        workerType, dpuPerWorker = workerTypes[jobIndex % len(workerTypes)]
+        numberOfWorkers = 2 + jobIndex % 49
+        executionTime = rng.randint(
+            30, max(31, min(int(period.total_seconds()), 4 * 3600)))
+
+        run = {
+            'Id': f'jr_{self.seed:04x}{jobIndex:06x}{sequence:08x}',
+            'Attempt': 0,
+            'JobName': self.jobNames[jobIndex],
+            'StartedOn': startedOn,
+            'LastModifiedOn': startedOn,
+            'JobRunState': 'RUNNING',
+            'Arguments': {'--sequence': str(sequence)},
+            'PredecessorRuns': [],
+            'AllocatedCapacity': int(numberOfWorkers * dpuPerWorker),
+            'ExecutionTime': 0,
+            'Timeout': 2880,
+            'MaxCapacity': numberOfWorkers * dpuPerWorker,
+            'WorkerType': workerType,
+            'NumberOfWorkers': numberOfWorkers,
+            'LogGroupName': '/aws-glue/jobs',
+            'GlueVersion': '2.0',
+        }
+
+        if runIndex == 0 and rng.random() < self.runningRatio:
+            return run
+
+        completedOn = startedOn + timedelta(seconds=executionTime)
+        run.update({
+            'CompletedOn': completedOn,
+            'LastModifiedOn': completedOn,
+            'ExecutionTime': int((completedOn - startedOn).total_seconds()),
+            'JobRunState': 'SUCCEEDED',
+        })
+        if rng.random() < self.failureRatio:
+            run.update({
+                'JobRunState': 'FAILED',
+                'ErrorMessage': rng.choice(errorMessages),
+            })
+
+        return run
+
+    def workflowRun(self, workflowIndex: int, runIndex: int) -> dict:
+        '''The workflow's run, runIndex 0 being the newest one'''
+        sequence = self._workflowRunCounts[workflowIndex] - 1 - runIndex
+        rng = self._random('workflowRun', workflowIndex, sequence)
+        startedOn = self._startedOn(
+            self._workflowRunPeriod, self.runsPerWorkflow, sequence, rng)
+        totalActions = 2 + workflowIndex % 8
+
+        statistics = {
+            'TotalActions': totalActions, 'TimeoutActions': 0, 'FailedActions': 0,
+            'StoppedActions': 0, 'SucceededActions': 0, 'RunningActions': 0,
+        }
+        run = {
+            'Name': self.workflowNames[workflowIndex],
+            'WorkflowRunId': f'wr_{self.seed:04x}{workflowIndex:06x}{sequence:08x}',
+            'WorkflowRunProperties': {},
+            'StartedOn': startedOn,
+            'Status': 'RUNNING',
+            'Statistics': statistics,
+        }
+
+        if runIndex == 0 and rng.random() < self.runningRatio:
+            statistics['SucceededActions'] = totalActions // 2
+            statistics['RunningActions'] = totalActions - totalActions // 2
+
+            return run
+
+        failed = 1 if rng.random() < self.failureRatio else 0
+        statistics['FailedActions'] = failed
+        statistics['SucceededActions'] = totalActions - failed
+        run.update({
+            'Status': 'COMPLETED',
+            'CompletedOn': startedOn + timedelta(seconds=rng.randint(60, 7200)),
+        })
+
+        return run
+
+    def workflowGraph(self, workflowIndex: int) -> dict:
+        '''A trigger followed by a chain of jobs'''
+        totalActions = 2 + workflowIndex % 8
+        nodes = [{'Type': 'TRIGGER', 'Name': f'trigger_{workflowIndex}', 'UniqueId': f'{workflowIndex}_t'}]
+        nodes.extend({
+            'Type': 'JOB',
+            'Name': self.jobNames[(workflowIndex * 8 + i) % max(self.numJobs, 1)],
+            'UniqueId': f'{workflowIndex}_{i}',
+        } for i in range(totalActions))
+        edges = [{'SourceId': nodes[i]['UniqueId'], 'DestinationId': nodes[i + 1]['UniqueId']}
+                 for i in range(len(nodes) - 1)]
+
+        return {'Nodes': nodes, 'Edges': edges}
+
+    def workflow(self, index: int, includeGraph: bool = False) -> dict:
+        createdOn = self.now - self.history - timedelta(days=index % 365)
+        workflow = {
+            'Name': self.workflowNames[index],
+            'Description': f'Synthetic workflow #{index}',
+            'DefaultRunProperties': {},
+            'CreatedOn': createdOn,
+            'LastModifiedOn': createdOn,
+            'MaxConcurrentRuns': 1,
+        }
+        if self._workflowRunCounts[index] > 0:
+            workflow['LastRun'] = self.workflowRun(index, 0)
+        if includeGraph:
+            workflow['Graph'] = self.workflowGraph(index)
+
+        return workflow
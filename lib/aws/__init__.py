@@ -1,12 +1,27 @@
-from lib.aws.common import getRunnable
-from lib.aws.jobs import Job, JobRun, getJobs, getJobRuns
-from lib.aws.workflows import Workflow, getWorkflowsList
+from lib.aws.batch import BatchFetcher, BatchStats, TokenBucket, getBatchRunnable, getJobRunsBatch
+from lib.aws.common import getPagedRunnable, getRunnable, invalidateClients
+from lib.aws.jobs import (Job, JobRun, activeJobRunStates, getJobRuns, getJobRunsPage, getJobs, isJobRunActive,
+                          iterJobRuns, iterJobs, pollJobRuns, syncJobRuns)
+from lib.aws.requestManager import RequestManager
+from lib.aws.runCache import RunCache
+from lib.aws.workflows import (Workflow, WorkflowGraph, WorkflowRun, WorkflowRunStatistics, getWorkflowGraph,
+                               getWorkflowNames, getWorkflows, getWorkflowsList,
+                               isWorkflowRunActive, iterWorkflowRuns, syncWorkflowRuns)
 
 __all__ = [
     # common
-    'getRunnable',
+    'getPagedRunnable', 'getRunnable', 'invalidateClients',
+    # batch
+    'BatchFetcher', 'BatchStats', 'TokenBucket', 'getBatchRunnable', 'getJobRunsBatch',
     # jobs
-    'Job', 'JobRun', 'getJobs', 'getJobRuns',
+    'Job', 'JobRun', 'activeJobRunStates', 'getJobs', 'getJobRuns', 'getJobRunsPage', 'isJobRunActive',
+    'iterJobs', 'iterJobRuns', 'pollJobRuns', 'syncJobRuns',
+    # requests
+    'RequestManager',
+    # cache
+    'RunCache',
     # workflows
-    'Workflow', 'getWorkflowsList'
+    'Workflow', 'WorkflowGraph', 'WorkflowRun', 'WorkflowRunStatistics', 'getWorkflowGraph', 'getWorkflowNames',
+    'getWorkflows', 'getWorkflowsList', 'isWorkflowRunActive', 'iterWorkflowRuns',
+    'syncWorkflowRuns',
 ]
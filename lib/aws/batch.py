@@ -0,0 +1,304 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, List, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal, pyqtSlot
+
+from lib.aws.common import RequestCancelled, defaultMaxConcurrency, getClient
+from lib.aws.jobs import JobRun, getJobRuns, syncJobRuns
+from lib.aws.runCache import RunCache
+from lib.config import AWSProfile
+
+throttlingErrorCodes = (
+    'Throttling', 'ThrottlingException', 'TooManyRequestsException',
+    'RequestLimitExceeded', 'RequestThrottled',
+)
+
+# The batch (if any) the current worker thread is working for
+_context = threading.local()
+
+
+class TokenBucket:
+    '''Thread-safe token bucket rate limiter
+        rate        float   tokens added per second
+        capacity    float   maximum amount of tokens (burst size), defaults to rate
+    '''
+    rate: float
+    capacity: float
+
+    _tokens: float
+    _lastRefill: float
+    _lock: threading.Lock
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+
+        self._tokens = self.capacity
+        self._lastRefill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        '''Blocks until the tokens are available, returns the seconds waited'''
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._lastRefill) * self.rate)
+                self._lastRefill = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+
+                    return waited
+
+                wait = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait)
+            waited += wait
+
+
+@dataclass
+class BatchStats:
+    total: int
+    completed: int = field(default=0)
+    failed: int = field(default=0)
+    apiCalls: int = field(default=0)
+    throttled: int = field(default=0)
+    rateLimitWait: float = field(default=0.0)  # seconds
+    startedOn: float = field(default_factory=time.monotonic)
+    finishedOn: Optional[float] = field(default=None)
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finishedOn if self.finishedOn is not None else time.monotonic()
+
+        return end - self.startedOn
+
+    @property
+    def throughput(self) -> float:
+        '''Processed items per second'''
+        elapsed = self.elapsed
+
+        return (self.completed + self.failed) / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f'{self.completed + self.failed}/{self.total} done ({self.failed} failed), ' \
+            f'{self.apiCalls} API calls, {self.throttled} throttled, {self.throughput:.1f} items/s'
+
+
+@dataclass
+class BatchResult:
+    name: str
+    value: Any = field(default=None)
+    exception: Optional[Exception] = field(default=None)
+
+
+def _onBeforeCall(**_) -> None:
+    batch: Optional[BatchFetcher] = getattr(_context, 'batch', None)
+    if batch is not None:
+        batch._beforeCall()
+
+
+# Request context flag set once the attempts of a call have been monitored (see _onNeedsRetry)
+_attemptsMonitoredKey = 'glueManagerAttemptsMonitored'
+
+
+def _isThrottled(parsed: Optional[dict]) -> bool:
+    return parsed is not None and parsed.get('Error', {}).get('Code') in throttlingErrorCodes
+
+
+def _onNeedsRetry(response: Any = None, request_dict: Optional[dict] = None, **_) -> None:
+    batch: Optional[BatchFetcher] = getattr(_context, 'batch', None)
+    if batch is None or response is None:
+        return
+
+    if request_dict is not None:
+        request_dict['context'][_attemptsMonitoredKey] = True
+    _, parsed = response
+    if _isThrottled(parsed):
+        batch._onThrottled()
+
+
+def _onAfterCall(parsed: Optional[dict] = None, context: Optional[dict] = None, **_) -> None:
+    batch: Optional[BatchFetcher] = getattr(_context, 'batch', None)
+    if batch is None or (context is not None and context.get(_attemptsMonitoredKey)):
+        return
+
+    # the response didn't go through the retry handler (e.g. stubbed)
+    if _isThrottled(parsed):
+        batch._onThrottled()
+
+
+def instrumentClient(client: Any) -> None:
+    '''Lets the batches running on the current thread rate limit and monitor the client's calls'''
+    events = client.meta.events
+    events.register('before-parameter-build', _onBeforeCall,
+                    unique_id='glueManagerBatchBeforeCall')
+    events.register('needs-retry', _onNeedsRetry,
+                    unique_id='glueManagerBatchNeedsRetry')
+    events.register('after-call', _onAfterCall,
+                    unique_id='glueManagerBatchAfterCall')
+
+
+class BatchFetcher:
+    '''Runs fn(name) for each of the names with bounded concurrency,
+        sharing a token bucket rate budget among all the API calls made by the workers.
+        Iterating the fetcher yields BatchResult objects in completion order.
+
+        fn              callable    the function fetching a single item
+        names           list        the names to process
+        maxConcurrency  int         maximum amount of concurrent workers
+        ratePerSecond   float       maximum API calls per second (all workers)
+        clients         list        the boto3 clients to rate limit and monitor
+    '''
+    fn: Callable[[str], Any]
+    names: List[str]
+    maxConcurrency: int
+    bucket: TokenBucket
+    stats: BatchStats
+
+    _cancelled: threading.Event
+    _statsLock: threading.Lock
+
+    def __init__(
+        self, fn: Callable[[str], Any], names: List[str],
+        maxConcurrency: int = defaultMaxConcurrency, ratePerSecond: float = 10.0,
+        clients: Optional[List[Any]] = None,
+    ) -> None:
+        self.fn = fn
+        self.names = list(names)
+        self.maxConcurrency = max(1, maxConcurrency)
+        self.bucket = TokenBucket(ratePerSecond)
+        self.stats = BatchStats(total=len(self.names))
+
+        self._cancelled = threading.Event()
+        self._statsLock = threading.Lock()
+
+        for client in clients if clients is not None else []:
+            instrumentClient(client)
+
+    def _beforeCall(self) -> None:
+        if self.isCancelled():
+            raise RequestCancelled()
+
+        waited = self.bucket.acquire()
+        with self._statsLock:
+            self.stats.apiCalls += 1
+            self.stats.rateLimitWait += waited
+
+    def _onThrottled(self) -> None:
+        with self._statsLock:
+            self.stats.throttled += 1
+
+    def _work(self, name: str) -> BatchResult:
+        if self._cancelled.is_set():
+            return BatchResult(name=name)
+
+        _context.batch = self
+        try:
+            return BatchResult(name=name, value=self.fn(name))
+        except Exception as ex:
+            return BatchResult(name=name, exception=ex)
+        finally:
+            _context.batch = None
+
+    def cancel(self) -> None:
+        '''Workers not started yet will be skipped, running ones abort before their next API call'''
+        self._cancelled.set()
+
+    def isCancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def __iter__(self) -> Iterator[BatchResult]:
+        logger = logging.getLogger()
+        self.stats = BatchStats(total=len(self.names))
+
+        with ThreadPoolExecutor(max_workers=self.maxConcurrency) as executor:
+            futures = [executor.submit(self._work, name)
+                       for name in self.names]
+            for future in as_completed(futures):
+                result: BatchResult = future.result()
+                if self._cancelled.is_set():
+                    continue
+
+                with self._statsLock:
+                    if result.exception is not None:
+                        self.stats.failed += 1
+                    else:
+                        self.stats.completed += 1
+
+                yield result
+
+        self.stats.finishedOn = time.monotonic()
+        logger.info(f'Batch finished: {self.stats}')
+
+
+def getJobRunsBatch(
+    profile: AWSProfile, jobNames: List[str], cache: Optional[RunCache] = None,
+    maxConcurrency: int = defaultMaxConcurrency, ratePerSecond: float = 10.0,
+) -> BatchFetcher:
+    '''Returns a BatchFetcher downloading the runs of the given jobs (incrementally if a cache is given)'''
+    def fetch(jobName: str) -> List[JobRun]:
+        if cache is not None:
+            return syncJobRuns(profile, jobName, cache)
+
+        return getJobRuns(profile, jobName)
+
+    return BatchFetcher(
+        fetch, jobNames, maxConcurrency=maxConcurrency, ratePerSecond=ratePerSecond,
+        clients=[getClient('glue', profile)],
+    )
+
+
+class QBatchRunnableSignals(QObject):
+    '''Batch signals
+        Attributes:
+          success   on item success (arg1: the item's result)
+          raised    on item exception (arg1: the item's exception)
+          progress  after each item (arg1: the BatchStats)
+          finished  when all the items have been processed (arg1: the BatchStats)
+        No signal is emitted once the batch has been cancelled.
+    '''
+
+    success = pyqtSignal(object)
+    raised = pyqtSignal(Exception)
+    progress = pyqtSignal(object)
+    finished = pyqtSignal(object)
+
+
+class QBatchRunnable(QRunnable):
+    signals: QBatchRunnableSignals
+    batch: BatchFetcher
+
+    def __init__(self, batch: BatchFetcher) -> None:
+        super().__init__()
+
+        self.signals = QBatchRunnableSignals()
+        self.batch = batch
+
+    def cancel(self) -> None:
+        self.batch.cancel()
+
+    def isCancelled(self) -> bool:
+        return self.batch.isCancelled()
+
+    @pyqtSlot()
+    def run(self) -> None:
+        for result in self.batch:
+            if result.exception is not None:
+                self.signals.raised.emit(result.exception)
+            else:
+                self.signals.success.emit(result.value)
+            self.signals.progress.emit(self.batch.stats)
+
+        if not self.isCancelled():
+            self.signals.finished.emit(self.batch.stats)
+
+
+def getBatchRunnable(batch: BatchFetcher) -> QBatchRunnable:
+    return QBatchRunnable(batch)
@@ -1,56 +1,144 @@
 import dataclasses
+import hashlib
 import logging
-from typing import Any, Callable, Dict, List, Tuple
-from PyQt5.QtCore import QObject, QRunnable, pyqtSignal, pyqtSlot
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from PyQt5.QtCore import QObject, QRunnable, QThread, pyqtSignal, pyqtSlot
 from boto3_type_annotations.glue.client import Client
 from botocore.config import Config
+from botocore.exceptions import ClientError
 
 from lib.config import AWSProfile
 import boto3
 
 
-_clients: Dict[str, Client] = {}
+# Default number of concurrent API calls of batch operations
+defaultMaxConcurrency = 8
+
+# Clients and sessions by (service, profile, region) and profile,
+# along with the credentials they've been created with
+_clients: Dict[Tuple[str, str, str], Tuple[str, Client]] = {}
+_sessions: Dict[str, Tuple[str, boto3.Session]] = {}
+_clientsLock = threading.Lock()
 
 
 config = Config(
     retries={
         'max_attempts': 10,
         'mode': 'adaptive',
-    }
+    },
+    # batch workers plus the Qt thread pool's runnables
+    max_pool_connections=defaultMaxConcurrency + QThread.idealThreadCount(),
 )
 
 
-def getClient(clientName: str, profile: AWSProfile) -> Any:
-    key = hash(profile.accessKey + profile.secretAccessKey)
-    if key not in _clients:
-        _clients[key] = boto3.client(
-            clientName,
-            aws_access_key_id=profile.accessKey,
-            aws_secret_access_key=profile.secretAccessKey,
-            region_name=profile.region,
-            config=config,
-        )
+def _credentialsKey(profile: AWSProfile) -> str:
+    return hashlib.sha1(
+        (profile.accessKey + profile.secretAccessKey).encode('utf-8')).hexdigest()
+
+
+def _getSession(profile: AWSProfile, credentialsKey: str) -> boto3.Session:
+    if profile.label in _sessions and _sessions[profile.label][0] == credentialsKey:
+        return _sessions[profile.label][1]
+
+    session = boto3.Session(
+        aws_access_key_id=profile.accessKey,
+        aws_secret_access_key=profile.secretAccessKey,
+        region_name=profile.region,
+    )
+    _sessions[profile.label] = (credentialsKey, session)
+
+    return session
+
+
+def getClient(clientName: str, profile: AWSProfile, region: Optional[str] = None) -> Any:
+    '''Returns the (thread-safe) client of the given service, profile and region (default: the profile's one).
+        Clients are created once from the profile's shared session and reused until invalidated.
+    '''
+    region = region or profile.region
+    key = (clientName, profile.label, region)
+    credentialsKey = _credentialsKey(profile)
+
+    with _clientsLock:
+        if key not in _clients or _clients[key][0] != credentialsKey:
+            logging.getLogger().debug(
+                f'boto3: creating {clientName} client ({profile.label}, {region})')
+            session = _getSession(profile, credentialsKey)
+            _clients[key] = (credentialsKey, session.client(
+                clientName, region_name=region, config=config))
+
+        return _clients[key][1]
+
+
+def invalidateClients(profileLabel: Optional[str] = None) -> None:
+    '''Drops the clients and session of the given profile (all the profiles if None)'''
+    with _clientsLock:
+        for key in list(_clients.keys()):
+            if profileLabel is None or key[1] == profileLabel:
+                del(_clients[key])
+
+        for label in list(_sessions.keys()):
+            if profileLabel is None or label == profileLabel:
+                del(_sessions[label])
+
+
+def withSlots(classType: type) -> type:
+    '''Recreates the dataclass with __slots__ to reduce the instances' memory footprint
+        (dataclass(slots=True) is available from python 3.10 only)
+    '''
+    fieldNames = tuple(field.name for field in dataclasses.fields(classType))
+    classDict = dict(classType.__dict__)
+    classDict['__slots__'] = fieldNames
+    # Defaults are kept by the generated __init__, class attributes would clash with the slots
+    for name in fieldNames + ('__dict__', '__weakref__'):
+        classDict.pop(name, None)
 
-    return _clients[key]
+    slottedClass = type(classType)(
+        classType.__name__, classType.__bases__, classDict)
+    slottedClass.__qualname__ = classType.__qualname__
+
+    return slottedClass
 
 
 def dataclassPostInitializer(fieldTuples: List[Tuple[str, type]]) -> Callable[[Any], None]:
+    '''Returns a __post_init__ hydrating the given (field name, dataclass) nested fields.
+        Assign it once at class level, so that the nested constructors are resolved once.
+    '''
     def initializer(self: Any) -> None:
-        for fieldTuple in fieldTuples:
-            field, fType = fieldTuple
+        for field, fType in fieldTuples:
             data = getattr(self, field)
-            if data is not None:
-                setattr(self, field, initClassFromArgs(
-                    fType, data
-                ))
+            if isinstance(data, dict):
+                setattr(self, field, initClassFromArgs(fType, data))
 
     return initializer
 
 
-def initClassFromArgs(classType: type, data: dict):
-    fieldNames = [field.name for field in dataclasses.fields(classType)]
+# Compiled constructors by dataclass
+_constructors: Dict[type, Callable[[dict], Any]] = {}
+
+
+def compileConstructor(classType: type) -> Callable[[dict], Any]:
+    '''Returns the (cached) function instantiating the dataclass from a response item,
+        ignoring the item's keys the dataclass doesn't define.
+    '''
+    if classType in _constructors:
+        return _constructors[classType]
+
+    fieldNames = frozenset(field.name for field in dataclasses.fields(classType))
+
+    def constructor(data: dict) -> Any:
+        if data.keys() <= fieldNames:
+            return classType(**data)
 
-    return classType(**{key: value for key, value in data.items() if key in fieldNames})
+        return classType(**{key: value for key, value in data.items() if key in fieldNames})
+
+    _constructors[classType] = constructor
+
+    return constructor
+
+
+def initClassFromArgs(classType: type, data: dict):
+    return compileConstructor(classType)(data)
 
 
 def getResponseItems(dataclassClass: type, responseField: str, response: dict):
@@ -60,7 +148,18 @@ def getResponseItems(dataclassClass: type, responseField: str, response: dict):
 
         return []
 
-    return [initClassFromArgs(dataclassClass, datum) for datum in response[responseField]]
+    constructor = compileConstructor(dataclassClass)
+
+    return [constructor(datum) for datum in response[responseField]]
+
+
+def isEntityNotFound(ex: Exception) -> bool:
+    '''Tells whether the API call failed because the requested entity (e.g. a purged run) doesn't exist'''
+    return isinstance(ex, ClientError) and ex.response.get('Error', {}).get('Code') == 'EntityNotFoundException'
+
+
+class RequestCancelled(Exception):
+    '''Raised in the worker threads to abort a cancelled request before its next API call'''
 
 
 class QAWSRunnableSignals(QObject):
@@ -68,10 +167,13 @@ class QAWSRunnableSignals(QObject):
         Attributes:
           success   on request success (arg1: the request's response)
           raised    on request exception (arg1: the request's exception)
+          finished  after success or raised
+        No signal is emitted once the request has been cancelled.
     '''
 
     success = pyqtSignal(object)
     raised = pyqtSignal(Exception)
+    finished = pyqtSignal()
 
 
 class QAWSRunnable(QRunnable):
@@ -80,6 +182,8 @@ class QAWSRunnable(QRunnable):
     args: list
     kwargs: dict
 
+    _cancelled: threading.Event
+
     def __init__(self, fn: Callable, *args, **kwargs) -> None:
         super().__init__()
 
@@ -89,13 +193,80 @@ class QAWSRunnable(QRunnable):
         self.args = args
         self.kwargs = kwargs
 
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        '''Cooperative cancellation: the request is abandoned as soon as possible and its result dropped'''
+        self._cancelled.set()
+
+    def isCancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _emit(self, signal: pyqtSignal, *args) -> None:
+        if not self.isCancelled():
+            signal.emit(*args)
+
+    @pyqtSlot()
+    def run(self) -> None:
+        if self.isCancelled():
+            return
+
+        try:
+            self._emit(self.signals.success, self.fn(*self.args, **self.kwargs))
+        except Exception as ex:
+            self._emit(self.signals.raised, ex)
+        self._emit(self.signals.finished)
+
+
+class QAWSPagedRunnableSignals(QAWSRunnableSignals):
+    '''Paged AWS API signals
+        Attributes:
+          page      on each page (arg1: the page's items)
+          success   after the last page (arg1: all the items)
+          raised    on request exception (arg1: the request's exception)
+          finished  after success or raised
+        No signal is emitted once the request has been cancelled.
+    '''
+
+    page = pyqtSignal(object)
+
+
+class QAWSPagedRunnable(QAWSRunnable):
+    '''Runnable for generator functions yielding lists of items page by page.
+        Cancelling it stops the download before the next page is requested.
+    '''
+    signals: QAWSPagedRunnableSignals
+
+    def __init__(self, fn: Callable, *args, **kwargs) -> None:
+        super().__init__(fn, *args, **kwargs)
+
+        self.signals = QAWSPagedRunnableSignals()
+
     @pyqtSlot()
     def run(self) -> None:
+        if self.isCancelled():
+            return
+
         try:
-            self.signals.success.emit(self.fn(*self.args, **self.kwargs))
+            items = []
+            for page in self.fn(*self.args, **self.kwargs):
+                if self.isCancelled():
+                    return
+                items.extend(page)
+                self.signals.page.emit(page)
+                # before the generator requests the next page
+                if self.isCancelled():
+                    return
+
+            self._emit(self.signals.success, items)
         except Exception as ex:
-            self.signals.raised.emit(ex)
+            self._emit(self.signals.raised, ex)
+        self._emit(self.signals.finished)
 
 
 def getRunnable(fn: callable, *args, **kwargs) -> QAWSRunnable:
     return QAWSRunnable(fn, *args, **kwargs)
+
+
+def getPagedRunnable(fn: callable, *args, **kwargs) -> QAWSPagedRunnable:
+    return QAWSPagedRunnable(fn, *args, **kwargs)
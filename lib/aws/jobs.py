@@ -1,17 +1,24 @@
+import itertools
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from boto3_type_annotations.glue.client import Client as GlueClient
 from boto3_type_annotations.glue.paginator import \
     GetJobRuns as GetJobRunsPaginator
 from boto3_type_annotations.glue.paginator import GetJobs as GetJobsPaginator
 
-from lib.aws.common import getClient, getResponseItems
+from lib.aws.common import getClient, getResponseItems, initClassFromArgs, isEntityNotFound, withSlots
+from lib.aws.runCache import RunCache, syncRuns
 from lib.config import AWSProfile
 
 
+# Job runs in these states may still change, any other state is final
+activeJobRunStates = ('STARTING', 'RUNNING', 'STOPPING', 'WAITING')
+
+
+@withSlots
 @dataclass
 class Job:
     Name: str
@@ -35,6 +42,7 @@ class Job:
     LastModifiedOn: Optional[datetime] = field(default=None)
 
 
+@withSlots
 @dataclass
 class JobRun:
     Id: str
@@ -50,7 +58,7 @@ class JobRun:
     GlueVersion: str
     WorkerType: str = field(default='')
     ErrorMessage: str = field(default='')
-    PredecessorRuns: list = field(default_factory=[])
+    PredecessorRuns: list = field(default_factory=lambda: [])
     Arguments: Dict[str, str] = field(default_factory=lambda: {})
     NotificationProperty: Dict[str, Any] = field(default_factory=lambda: {})
     NumberOfWorkers: Optional[int] = field(default=None)
@@ -61,33 +69,134 @@ class JobRun:
     LastModifiedOn: Optional[datetime] = field(default=None)
 
 
-def getJobs(profile: AWSProfile) -> List[Job]:
+def iterJobs(profile: AWSProfile) -> Iterator[List[Job]]:
+    '''Yields the jobs page by page'''
     logging.getLogger().info('boto3::get_jobs')
     client: GlueClient = getClient('glue', profile)
 
     paginator: GetJobsPaginator = client.get_paginator('get_jobs')
-    responses = paginator.paginate()
-    jobs = []
-    for response in responses:
-        jobs.extend(getResponseItems(Job, 'Jobs', response))
+    for response in paginator.paginate():
+        yield getResponseItems(Job, 'Jobs', response)
 
-    return jobs
 
+def getJobs(profile: AWSProfile) -> List[Job]:
+    return list(itertools.chain.from_iterable(iterJobs(profile)))
 
-def getJobRuns(profile: AWSProfile, jobName: str, maxResults: Optional[int] = None) -> List[JobRun]:
-    logging.getLogger().info(
-        f'boto3::get_job_runs ({jobName}) - max runs: {maxResults}')
+
+def iterJobRuns(profile: AWSProfile, jobName: str) -> Iterator[List[JobRun]]:
+    '''Yields the job's runs page by page (newest first)'''
+    logging.getLogger().info(f'boto3::get_job_runs ({jobName})')
     client: GlueClient = getClient('glue', profile)
 
+    paginator: GetJobRunsPaginator = client.get_paginator('get_job_runs')
+    for response in paginator.paginate(JobName=jobName):
+        yield getResponseItems(JobRun, 'JobRuns', response)
+
+
+def getJobRuns(profile: AWSProfile, jobName: str, maxResults: Optional[int] = None) -> List[JobRun]:
     if maxResults is not None:
+        logging.getLogger().info(
+            f'boto3::get_job_runs ({jobName}) - max runs: {maxResults}')
+        client: GlueClient = getClient('glue', profile)
         response = client.get_job_runs(JobName=jobName, MaxResults=maxResults)
 
         return getResponseItems(JobRun, 'JobRuns', response)
 
-    paginator: GetJobRunsPaginator = client.get_paginator('get_job_runs')
-    responses = paginator.paginate(JobName=jobName)
-    runs = []
-    for response in responses:
-        runs.extend(getResponseItems(JobRun, 'JobRuns', response))
+    return list(itertools.chain.from_iterable(iterJobRuns(profile, jobName)))
+
+
+def getJobRunsPage(
+    profile: AWSProfile, jobName: str, nextToken: Optional[str] = None, maxResults: int = 100,
+) -> Tuple[List[JobRun], Optional[str]]:
+    '''Returns a page of the job's runs (newest first) and the token of the next page (None if it's the last one)'''
+    logging.getLogger().info(f'boto3::get_job_runs ({jobName}) - page of {maxResults} runs')
+    client: GlueClient = getClient('glue', profile)
+    kwargs = {'JobName': jobName, 'MaxResults': maxResults}
+    if nextToken is not None:
+        kwargs['NextToken'] = nextToken
+    response = client.get_job_runs(**kwargs)
+
+    return getResponseItems(JobRun, 'JobRuns', response), response.get('NextToken')
+
+
+def pollJobRuns(
+    profile: AWSProfile, activeRunIds: Dict[str, List[str]], probeJobNames: List[str],
+    newestRuns: int = 10,
+) -> List[JobRun]:
+    '''Downloads the latest state of the active job runs, in API calls proportional to the active jobs:
+        activeRunIds    the ids of the active runs by job: the job's newest runs are downloaded
+                        (catching its new runs too), the active runs not among them are polled one by one
+        probeJobNames   other jobs whose newest run only is downloaded (i.e. to find out they started)
+        The jobs and runs that can't be downloaded (e.g. deleted, or the call failed) are skipped,
+        returning the other ones.
+        The runs aren't merged into the RunCache: they're only the newest ones, while syncRuns
+        relies on the cache holding the runs' history without gaps.
+    '''
+    logger = logging.getLogger()
+    client: GlueClient = getClient('glue', profile)
+    runsByJob: Dict[str, List[JobRun]] = {}
+
+    def download(description: str, fn: Callable[[], Any]) -> Optional[Any]:
+        logger.debug(f'boto3::{description}')
+        try:
+            return fn()
+        except Exception as ex:
+            if isEntityNotFound(ex):
+                logger.info(f'Live job runs: {description} - not found, skipping it')
+            else:
+                logger.warning(f'Live job runs: {description} failed, skipping it ({ex})')
+
+            return None
+
+    for jobName, runIds in activeRunIds.items():
+        runs = download(f'get_job_runs ({jobName}) - max runs: {newestRuns}', lambda: getResponseItems(
+            JobRun, 'JobRuns', client.get_job_runs(JobName=jobName, MaxResults=newestRuns)))
+        if runs is None:
+            continue
+        downloaded = {run.Id for run in runs}
+        for runId in runIds:
+            if runId in downloaded:
+                continue
+            run = download(f'get_job_run ({jobName}, {runId})', lambda: initClassFromArgs(
+                JobRun, client.get_job_run(JobName=jobName, RunId=runId)['JobRun']))
+            if run is not None:
+                runs.append(run)
+        runsByJob[jobName] = runs
+
+    for jobName in probeJobNames:
+        runs = download(f'get_job_runs ({jobName}) - max runs: 1', lambda: getResponseItems(
+            JobRun, 'JobRuns', client.get_job_runs(JobName=jobName, MaxResults=1)))
+        if runs is not None:
+            runsByJob[jobName] = runs
+
+    return list(itertools.chain.from_iterable(runsByJob.values()))
+
+
+def isJobRunActive(run: JobRun) -> bool:
+    return run.JobRunState in activeJobRunStates
+
+
+def syncJobRuns(profile: AWSProfile, jobName: str, cache: RunCache) -> List[JobRun]:
+    '''Incrementally updates the cached runs of the given job and returns all of them (newest first).
+        The runs are paged newest first, stopping at the first run already cached in a final state;
+        the cached runs which were still active are polled again one by one (and dropped if purged by AWS).
+    '''
+    client: GlueClient = getClient('glue', profile)
+
+    def poll(run: JobRun) -> Optional[JobRun]:
+        logging.getLogger().debug(f'boto3::get_job_run ({jobName}, {run.Id})')
+        try:
+            response = client.get_job_run(JobName=jobName, RunId=run.Id)
+        except Exception as ex:
+            if not isEntityNotFound(ex):
+                raise
+            logging.getLogger().warning(f'Job run {run.Id} of {jobName} not found, removing it from the cache')
+
+            return None
+
+        return initClassFromArgs(JobRun, response['JobRun'])
 
-    return runs
+    return syncRuns(
+        cache, jobName, iterJobRuns(profile, jobName),
+        isActive=isJobRunActive, poll=poll, sortKey=lambda run: run.StartedOn,
+    )
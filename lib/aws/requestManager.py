@@ -0,0 +1,82 @@
+import logging
+from typing import Any, Callable, Dict, Hashable, Union
+
+from PyQt5.QtCore import QThreadPool
+
+from lib.aws.batch import QBatchRunnable
+from lib.aws.common import QAWSRunnable
+
+Runnable = Union[QAWSRunnable, QBatchRunnable]
+
+
+class RequestManager:
+    '''Starts the runnables on the thread pool, keeping track of the ones in flight:
+        - identical requests (same key) are coalesced: while one is in flight, the others aren't started
+        - all the requests belong to a generation (i.e. a profile): starting a new generation cancels
+          the requests in flight and drops their results, even the ones already queued for delivery
+    '''
+    threadPool: QThreadPool
+    generation: int
+
+    _inFlight: Dict[Hashable, Runnable]
+    _logger: logging.Logger
+
+    def __init__(self, threadPool: QThreadPool) -> None:
+        self.threadPool = threadPool
+        self.generation = 0
+
+        self._inFlight = {}
+        self._logger = logging.getLogger()
+
+    def isInFlight(self, key: Hashable) -> bool:
+        return key in self._inFlight
+
+    def submit(self, key: Hashable, runnable: Runnable) -> bool:
+        '''Starts the runnable (its signals already connected, see live), unless an identical request is in flight.
+            Returns whether it has been started: a coalesced runnable is discarded,
+            the one in flight delivering its result to the slots connected to it.
+        '''
+        if key in self._inFlight:
+            self._logger.debug(f'Request {key} already in flight, coalesced')
+
+            return False
+
+        self._inFlight[key] = runnable
+        runnable.signals.finished.connect(
+            lambda *_: self._onFinished(key, runnable))
+        self.threadPool.start(runnable)
+
+        return True
+
+    def live(self, runnable: Runnable, slot: Callable) -> Callable:
+        '''Wraps the slot so that it is not called anymore once the runnable has been cancelled
+            (i.e. results emitted just before a new generation started)
+        '''
+        def liveSlot(*args) -> Any:
+            if not runnable.isCancelled():
+                return slot(*args)
+
+        return liveSlot
+
+    def cancel(self, key: Hashable) -> bool:
+        '''Cancels the request in flight (if any), returns whether it was in flight'''
+        runnable = self._inFlight.pop(key, None)
+        if runnable is None:
+            return False
+
+        self._logger.debug(f'Request {key} cancelled')
+        runnable.cancel()
+
+        return True
+
+    def newGeneration(self) -> int:
+        '''Cancels all the requests in flight, returns the new generation'''
+        for key in list(self._inFlight.keys()):
+            self.cancel(key)
+        self.generation += 1
+
+        return self.generation
+
+    def _onFinished(self, key: Hashable, runnable: Runnable) -> None:
+        if self._inFlight.get(key) is runnable:
+            del self._inFlight[key]
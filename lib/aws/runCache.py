@@ -0,0 +1,174 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import pathlib
+import threading
+from datetime import datetime
+from os import path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from lib.aws.common import initClassFromArgs
+from lib.config import AWSProfile
+
+
+def _encodeValue(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _decodeObject(obj: dict) -> Any:
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+
+    return obj
+
+
+def profileCacheKey(profile: AWSProfile) -> str:
+    '''Stable, non reversible identifier of the AWS account used by the profile'''
+    return hashlib.sha1(profile.accessKey.encode('utf-8')).hexdigest()[:16]
+
+
+class RunCache:
+    '''On-disk cache of runs (i.e. job runs) of a single profile / region.
+        Runs are grouped by their parent's name (i.e. the job name), indexed by idField
+        and stored in one file per parent, so that only the touched parents are loaded and written.
+        Nothing is kept in memory: the runs are read from disk on demand.
+
+        rootDir     str     the cache root directory (see ConfigManager.cacheRoot)
+        profile     AWS     the profile the runs belong to
+        namespace   str     the kind of runs being cached (i.e. "jobRuns")
+        itemClass   type    the dataclass the runs are rehydrated into
+        idField     str     the field uniquely identifying a run (i.e. "Id")
+    '''
+    directory: str
+    itemClass: type
+    idField: str
+
+    _lock: threading.Lock
+
+    def __init__(self, rootDir: str, profile: AWSProfile, namespace: str, itemClass: type, idField: str) -> None:
+        self.directory = path.sep.join(
+            [rootDir, profileCacheKey(profile), profile.region or 'default', namespace])
+        self.itemClass = itemClass
+        self.idField = idField
+
+        self._lock = threading.Lock()
+
+    def _filePath(self, name: str) -> str:
+        fileName = hashlib.sha1(name.encode('utf-8')).hexdigest()
+
+        return path.sep.join([self.directory, f'{fileName}.json'])
+
+    def _load(self, name: str) -> Dict[str, Any]:
+        filePath = self._filePath(name)
+        if not path.exists(filePath):
+            return {}
+
+        try:
+            with open(filePath) as fHandler:
+                data = json.load(fHandler, object_hook=_decodeObject)
+        except (OSError, ValueError) as ex:
+            logging.getLogger().warning(
+                f'Run cache: unable to read {filePath}, ignoring it ({ex})')
+
+            return {}
+
+        runs = (initClassFromArgs(self.itemClass, datum)
+                for datum in data.get('runs', []))
+
+        return {getattr(run, self.idField): run for run in runs}
+
+    def _save(self, name: str, runs: Dict[str, Any]) -> None:
+        pathlib.Path(self.directory).mkdir(parents=True, exist_ok=True)
+        data = {
+            'name': name,
+            'runs': [dataclasses.asdict(run) for run in runs.values()],
+        }
+
+        filePath = self._filePath(name)
+        tmpPath = f'{filePath}.tmp'
+        with open(tmpPath, 'w') as fHandler:
+            json.dump(data, fHandler, default=_encodeValue)
+        pathlib.Path(tmpPath).replace(filePath)
+
+    def runs(self, name: str) -> Dict[str, Any]:
+        '''Returns the cached runs of the given parent, indexed by id'''
+        # Files are replaced atomically, no need to lock
+        return self._load(name)
+
+    def merge(self, name: str, runs: List[Any]) -> None:
+        '''Adds or replaces the given runs in the cache and persists them'''
+        if len(runs) == 0:
+            return
+
+        with self._lock:
+            cached = self._load(name)
+            for run in runs:
+                cached[getattr(run, self.idField)] = run
+
+            self._save(name, cached)
+
+    def remove(self, name: str, runIds: Iterable[str]) -> None:
+        '''Removes the given runs (e.g. purged by AWS) from the cache'''
+        runIds = set(runIds)
+        if len(runIds) == 0:
+            return
+
+        with self._lock:
+            cached = self._load(name)
+            for runId in runIds:
+                cached.pop(runId, None)
+
+            self._save(name, cached)
+
+
+def syncRuns(
+    cache: RunCache, name: str, pages: Iterable[List[Any]],
+    isActive: Callable[[Any], bool], poll: Callable[[Any], Optional[Any]], sortKey: Callable[[Any], Any],
+) -> List[Any]:
+    '''Incrementally updates the cached runs of the given parent and returns all of them (newest first).
+        pages       the runs, newest first, page by page: consumed until a run already cached in a final state is found
+        isActive    tells whether a run may still change
+        poll        downloads again a cached run which was still active (None if it doesn't exist anymore,
+                    the run is then removed from the cache)
+        sortKey     the key to sort the runs by (newest first)
+    '''
+    cached = cache.runs(name)
+    fresh: Dict[str, Any] = {}
+    purged: List[str] = []
+
+    for page in pages:
+        reachedKnownRun = False
+        for run in page:
+            runId = getattr(run, cache.idField)
+            known = cached.get(runId)
+            if known is not None and not isActive(known):
+                reachedKnownRun = True
+                break
+            fresh[runId] = run
+
+        if reachedKnownRun:
+            break
+
+    for runId, run in cached.items():
+        if runId in fresh or not isActive(run):
+            continue
+
+        polled = poll(run)
+        if polled is None:
+            purged.append(runId)
+        else:
+            fresh[runId] = polled
+
+    logging.getLogger().debug(
+        f'Run cache: {name} - {len(fresh)} new or updated runs, {len(purged)} purged')
+    cache.merge(name, list(fresh.values()))
+    cache.remove(name, purged)
+    cached.update(fresh)
+    for runId in purged:
+        del cached[runId]
+
+    return sorted(cached.values(), key=sortKey, reverse=True)
@@ -1,17 +1,38 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 import logging
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from boto3_type_annotations.glue.client import Client
 
-from lib.aws.common import dataclassPostInitializer, getClient, getResponseItems
+from lib.aws.common import (dataclassPostInitializer, defaultMaxConcurrency, getClient,
+                            getResponseItems, initClassFromArgs, isEntityNotFound, withSlots)
+from lib.aws.runCache import RunCache, syncRuns
 from lib.config import AWSProfile
 
 
+# batch_get_workflows' maximum amount of names per call
+batchGetWorkflowsMaxNames = 25
+
+# Workflow runs in these states may still change, any other state is final
+activeWorkflowRunStates = ('RUNNING', 'STOPPING')
+
+
 @dataclass
 class WorkflowGraph:
-    pass
+    Nodes: List[dict] = field(default_factory=lambda: [])
+    Edges: List[dict] = field(default_factory=lambda: [])
+
+    def nodeNames(self) -> Dict[str, str]:
+        '''Node names by UniqueId'''
+        return {node['UniqueId']: node.get('Name', '') for node in self.Nodes}
+
+    def predecessors(self, uniqueId: str) -> List[str]:
+        '''UniqueIds of the nodes the given node depends on'''
+        return [edge['SourceId'] for edge in self.Edges if edge.get('DestinationId') == uniqueId]
 
 
 @dataclass
@@ -24,6 +45,7 @@ class WorkflowRunStatistics:
     RunningActions: int
 
 
+@withSlots
 @dataclass
 class WorkflowRun:
     Name: str
@@ -38,13 +60,13 @@ class WorkflowRun:
     Statistics: Optional[WorkflowRunStatistics] = field(default=None)
     Graph: Optional[WorkflowGraph] = field(default=None)
 
-    def __post_init__(self):
-        dataclassPostInitializer([
-            ('Statistics', WorkflowRunStatistics),
-            ('Graph', WorkflowGraph),
-        ])(self)
+    __post_init__ = dataclassPostInitializer([
+        ('Statistics', WorkflowRunStatistics),
+        ('Graph', WorkflowGraph),
+    ])
 
 
+@withSlots
 @dataclass
 class Workflow:
     Name: str
@@ -57,33 +79,130 @@ class Workflow:
     LastRun: Optional[WorkflowRun] = field(default=None)
     Graph: Optional[WorkflowGraph] = field(default=None)
 
-    def __post_init__(self):
-        dataclassPostInitializer([
-            ('Graph', WorkflowGraph),
-            ('LastRun', WorkflowRun),
-        ])(self)
+    __post_init__ = dataclassPostInitializer([
+        ('Graph', WorkflowGraph),
+        ('LastRun', WorkflowRun),
+    ])
 
 
-def getWorkflowsList(profile: AWSProfile) -> List[str]:
+# Graphs by (profile, region, workflow name), along with the workflow's LastModifiedOn
+_graphs: Dict[Tuple[str, str, str], Tuple[Optional[datetime], WorkflowGraph]] = {}
+_graphsLock = threading.Lock()
+
+
+def getWorkflowNames(profile: AWSProfile) -> List[str]:
     logger = logging.getLogger()
     logger.info('boto3::list_workflows')
     client: Client = getClient('glue', profile)
 
-    logger.debug('boto3::list_workflows: getting list of workflow names')
-    # Workflow names
     kwargs = {'MaxResults': 25}
     workflowNames: List[str] = []
     while True:
         response = client.list_workflows(**kwargs)
         workflowNames.extend(response['Workflows'])
 
-        if 'NextToken' not in response or response['NextToken']:
+        if not response.get('NextToken'):
             break
         kwargs.update({'NextToken': response['NextToken']})
 
+    return workflowNames
+
+
+def getWorkflows(
+    profile: AWSProfile, names: List[str], includeGraph: bool = False,
+    maxConcurrency: int = defaultMaxConcurrency,
+) -> List[Workflow]:
+    '''Downloads the workflows' details, in chunks of batchGetWorkflowsMaxNames names fetched in parallel'''
+    logger = logging.getLogger()
+    client: Client = getClient('glue', profile)
+
+    def fetchChunk(chunk: List[str]) -> List[Workflow]:
+        logger.debug(
+            f'boto3::batch_get_workflows: {len(chunk)} workflows (graph: {includeGraph})')
+        response = client.batch_get_workflows(
+            Names=chunk, IncludeGraph=includeGraph)
+        if len(response.get('MissingWorkflows', [])) > 0:
+            logger.warning(
+                f'boto3::batch_get_workflows: missing {response["MissingWorkflows"]}')
+
+        return getResponseItems(Workflow, 'Workflows', response)
+
+    chunks = [names[i:i + batchGetWorkflowsMaxNames]
+              for i in range(0, len(names), batchGetWorkflowsMaxNames)]
+    if len(chunks) <= 1:
+        return list(itertools.chain.from_iterable(map(fetchChunk, chunks)))
+
+    with ThreadPoolExecutor(max_workers=min(maxConcurrency, len(chunks))) as executor:
+        return list(itertools.chain.from_iterable(executor.map(fetchChunk, chunks)))
+
+
+def getWorkflowsList(profile: AWSProfile) -> List[Workflow]:
+    '''Downloads all the workflows, without their graph (see getWorkflowGraph)'''
+    logger = logging.getLogger()
+    workflowNames = getWorkflowNames(profile)
+
     logger.debug('boto3::list_workflows: getting workflow batch details')
-    response = client.batch_get_workflows(
-        Names=workflowNames, IncludeGraph=True
-    )
 
-    return getResponseItems(Workflow, 'Workflows', response)
+    return getWorkflows(profile, workflowNames)
+
+
+def getWorkflowGraph(profile: AWSProfile, workflow: Workflow) -> WorkflowGraph:
+    '''Returns the workflow's graph, downloading it only if the workflow has been modified since the last time'''
+    key = (profile.label, profile.region, workflow.Name)
+    with _graphsLock:
+        if key in _graphs and _graphs[key][0] == workflow.LastModifiedOn:
+            return _graphs[key][1]
+
+    logging.getLogger().info(f'boto3::get_workflow ({workflow.Name}) - graph')
+    client: Client = getClient('glue', profile)
+    response = client.get_workflow(Name=workflow.Name, IncludeGraph=True)
+    downloaded = initClassFromArgs(Workflow, response['Workflow'])
+    graph = downloaded.Graph if downloaded.Graph is not None else WorkflowGraph()
+
+    with _graphsLock:
+        _graphs[key] = (downloaded.LastModifiedOn, graph)
+
+    return graph
+
+
+def isWorkflowRunActive(run: WorkflowRun) -> bool:
+    return run.Status in activeWorkflowRunStates
+
+
+def iterWorkflowRuns(profile: AWSProfile, workflowName: str) -> Iterator[List[WorkflowRun]]:
+    '''Yields the workflow's runs page by page (newest first), without graphs'''
+    logging.getLogger().info(f'boto3::get_workflow_runs ({workflowName})')
+    client: Client = getClient('glue', profile)
+
+    paginator = client.get_paginator('get_workflow_runs')
+    for response in paginator.paginate(Name=workflowName, IncludeGraph=False):
+        yield getResponseItems(WorkflowRun, 'Runs', response)
+
+
+def syncWorkflowRuns(profile: AWSProfile, workflowName: str, cache: RunCache) -> List[WorkflowRun]:
+    '''Incrementally updates the cached runs of the given workflow and returns all of them (newest first).
+        The runs are paged newest first, stopping at the first run already cached in a final state;
+        the cached runs which were still active are polled again one by one (and dropped if purged by AWS).
+    '''
+    client: Client = getClient('glue', profile)
+
+    def poll(run: WorkflowRun) -> Optional[WorkflowRun]:
+        logging.getLogger().debug(
+            f'boto3::get_workflow_run ({workflowName}, {run.WorkflowRunId})')
+        try:
+            response = client.get_workflow_run(
+                Name=workflowName, RunId=run.WorkflowRunId, IncludeGraph=False)
+        except Exception as ex:
+            if not isEntityNotFound(ex):
+                raise
+            logging.getLogger().warning(
+                f'Workflow run {run.WorkflowRunId} of {workflowName} not found, removing it from the cache')
+
+            return None
+
+        return initClassFromArgs(WorkflowRun, response['Run'])
+
+    return syncRuns(
+        cache, workflowName, iterWorkflowRuns(profile, workflowName),
+        isActive=isWorkflowRunActive, poll=poll, sortKey=lambda run: run.StartedOn,
+    )
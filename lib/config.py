@@ -47,6 +47,8 @@ class Settings:
     loadDataOnTabChange: bool = field(default=False)
     profiles: List[AWSProfile] = field(default_factory=lambda: [])
     defaultProfile: str = field(default='')
+    # Estimated price (USD) of a DPU-hour, see lib.cost
+    dpuHourPrice: float = field(default=0.44)
 
     def loadFromArgs(self, **kwargs) -> None:
         for key in self.__dict__.keys():
@@ -64,6 +66,7 @@ class Settings:
             'profiles': [profile.asDict() for profile in self.profiles],
             'defaultProfile': self.defaultProfile,
             'loadDataOnTabChange': self.loadDataOnTabChange,
+            'dpuHourPrice': self.dpuHourPrice,
         }
 
 
@@ -99,6 +102,9 @@ class ConfigManager:
     def _configPath(self) -> str:
         return path.sep.join([self.configRoot, 'configuration'])
 
+    def cacheRoot(self) -> str:
+        return path.sep.join([self.configRoot, 'cache'])
+
     def load(self):
         self._createConfigDir()
         configPath = self._configPath()
@@ -0,0 +1,147 @@
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from lib.jobRunStore import JobRunStore, StringPool
+
+# DPU of a single worker by worker type
+workerTypeDPU = {
+    'Standard': 1.0, 'G.025X': 0.25, 'G.1X': 1.0, 'G.2X': 2.0, 'G.4X': 4.0, 'G.8X': 8.0, 'Z.2X': 2.0,
+}
+
+# Minimum billed duration (seconds) by Glue version, defaultMinimumBilledSeconds for the others
+minimumBilledSeconds = {'0.9': 600, '1.0': 600}
+defaultMinimumBilledSeconds = 60
+
+secondsPerDay = 24 * 60 * 60
+
+
+@dataclass
+class CostRates:
+    '''Estimated prices (USD) per DPU-hour'''
+    dpuHour: float = field(default=0.44)
+    # Overrides by worker type
+    byWorkerType: Dict[str, float] = field(default_factory=lambda: {})
+
+
+def _lookup(pool: StringPool, values: Mapping[str, float], default: float) -> np.ndarray:
+    '''Value of each code of the pool, shifted by one (i.e. indexed by code + 1, the first item being None's)'''
+    return np.array([default] + [values.get(value, default) for value in pool.values], dtype=np.float64)
+
+
+def runDPU(store: JobRunStore, rows: np.ndarray) -> np.ndarray:
+    '''DPU of the runs: their workers' DPU (see workerTypeDPU), otherwise their MaxCapacity
+        (AllocatedCapacity if missing)
+    '''
+    workerDPU = _lookup(store.workerTypes, workerTypeDPU, math.nan)[store.column('workerType')[rows] + 1]
+    workers = store.column('numberOfWorkers')[rows]
+    maxCapacity = store.column('maxCapacity')[rows].astype(np.float64)
+    capacity = np.where(np.isnan(maxCapacity), store.column('allocatedCapacity')[rows], maxCapacity)
+
+    return np.where((workers > 0) & ~np.isnan(workerDPU), workers * workerDPU, capacity)
+
+
+def runBilledSeconds(store: JobRunStore, rows: np.ndarray, now: Optional[float] = None) -> np.ndarray:
+    '''Billed seconds of the runs: their ExecutionTime (the time elapsed until now for the ones without it),
+        at least the Glue version's minimum (see minimumBilledSeconds)
+    '''
+    if now is None:
+        now = datetime.now().timestamp()
+    startedOn = store.column('startedOn')[rows]
+    completedOn = np.nan_to_num(store.column('completedOn')[rows], nan=now)
+    executionTime = store.column('executionTime')[rows]
+    seconds = np.where(executionTime > 0, executionTime, np.maximum(completedOn - startedOn, 0))
+    minimum = _lookup(store.glueVersions, minimumBilledSeconds, defaultMinimumBilledSeconds)[
+        store.column('glueVersion')[rows] + 1]
+
+    return np.where(seconds > 0, np.maximum(seconds, minimum), 0)
+
+
+@dataclass
+class CostReport:
+    '''DPU-hours and estimated spend of the runs by job (jobs' codes of the store) and UTC day of start'''
+    # Epoch seconds of the first day (UTC midnight)
+    start: float
+    jobNames: List[str]
+    # jobs x days
+    dpuHours: np.ndarray
+    spend: np.ndarray
+    # Amount of runs by job
+    runs: np.ndarray
+    # '' for the runs without workers
+    dpuHoursByWorkerType: Dict[str, float]
+    spendByWorkerType: Dict[str, float]
+
+    def days(self) -> np.ndarray:
+        '''Epoch seconds of the days' starts'''
+        return self.start + np.arange(self.dpuHours.shape[1]) * secondsPerDay
+
+    def jobDPUHours(self) -> np.ndarray:
+        return self.dpuHours.sum(axis=1)
+
+    def jobSpend(self) -> np.ndarray:
+        return self.spend.sum(axis=1)
+
+    def topJobs(self, count: int) -> np.ndarray:
+        '''Codes of the (at most) count jobs with the highest spend, most expensive first'''
+        spend = self.jobSpend()
+        jobs = np.flatnonzero(spend > 0)
+        if count <= 0:
+            return jobs[:0]
+        if len(jobs) > count:
+            jobs = jobs[np.argpartition(-spend[jobs], count - 1)[:count]]
+
+        return jobs[np.lexsort((jobs, -spend[jobs]))]
+
+    def trends(self) -> np.ndarray:
+        '''Relative change of each job's spend from the first to the second half of the period
+            (NaN if nothing was spent in the first half)
+        '''
+        half = self.spend.shape[1] // 2
+        first = self.spend[:, :half].sum(axis=1)
+        second = self.spend[:, self.spend.shape[1] - half:].sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(first > 0, (second - first) / first, math.nan)
+
+
+def costReport(
+    store: JobRunStore, fromTimestamp: float, toTimestamp: float,
+    rates: Optional[CostRates] = None, now: Optional[float] = None,
+) -> CostReport:
+    '''Attributes the DPU-hours (DPU times billed seconds) and the estimated spend of the runs started
+        between the two timestamps to their job and the day they started, in O(runs + jobs * days)
+    '''
+    rates = rates if rates is not None else CostRates()
+    firstDay = int(math.floor(fromTimestamp / secondsPerDay))
+    dayCount = int(math.floor(toTimestamp / secondsPerDay)) - firstDay + 1
+    jobCount = len(store.jobNames)
+
+    startedOn = store.column('startedOn')
+    rows = np.flatnonzero((startedOn >= fromTimestamp) & (startedOn <= toTimestamp))
+    jobs = store.column('job')[rows].astype(np.int64)
+    days = np.floor(startedOn[rows] / secondsPerDay).astype(np.int64) - firstDay
+    workerTypes = store.column('workerType')[rows].astype(np.int64) + 1
+
+    dpuHours = runDPU(store, rows) * runBilledSeconds(store, rows, now) / 3600
+    spend = dpuHours * _lookup(store.workerTypes, rates.byWorkerType, rates.dpuHour)[workerTypes]
+
+    cells = jobs * dayCount + days
+    workerTypeNames = [''] + [name or '' for name in store.workerTypes.values]
+    byWorkerType: List[Dict[str, float]] = [{}, {}]
+    for totals, values in zip(byWorkerType, (dpuHours, spend)):
+        for code, total in enumerate(np.bincount(workerTypes, weights=values, minlength=len(workerTypeNames))):
+            if total > 0:
+                totals[workerTypeNames[code]] = totals.get(workerTypeNames[code], 0.0) + float(total)
+
+    return CostReport(
+        start=float(firstDay * secondsPerDay),
+        jobNames=list(store.jobNames.values),
+        dpuHours=np.bincount(cells, weights=dpuHours, minlength=jobCount * dayCount).reshape(jobCount, dayCount),
+        spend=np.bincount(cells, weights=spend, minlength=jobCount * dayCount).reshape(jobCount, dayCount),
+        runs=np.bincount(jobs, minlength=jobCount),
+        dpuHoursByWorkerType=byWorkerType[0],
+        spendByWorkerType=byWorkerType[1],
+    )
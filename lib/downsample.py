@@ -0,0 +1,27 @@
+import numpy as np
+
+
+def minMaxIndexes(values: np.ndarray, maxPoints: int) -> np.ndarray:
+    '''Indexes of at most maxPoints values preserving the series' shape (i.e. its peaks and valleys):
+        the first and last values, plus the minimum and the maximum of equally sized bins of the others
+    '''
+    count = len(values)
+    if count <= max(maxPoints, 4):
+        return np.arange(count)
+
+    inner = count - 2
+    bins = max((maxPoints - 2) // 2, 1)
+    binSize = -(-inner // bins)
+    # pad the last bin repeating the last inner value
+    padded = np.empty(bins * binSize, dtype=values.dtype)
+    padded[:inner] = values[1:-1]
+    padded[inner:] = values[-2]
+    padded = padded.reshape(bins, binSize)
+
+    offsets = np.arange(bins) * binSize + 1
+    minimums = np.minimum(padded.argmin(axis=1) + offsets, count - 2)
+    maximums = np.minimum(padded.argmax(axis=1) + offsets, count - 2)
+    # within each bin the two indexes are kept in time order
+    indexes = np.concatenate(([0], np.sort(np.stack([minimums, maximums], axis=1), axis=1).ravel(), [count - 1]))
+
+    return np.unique(indexes)
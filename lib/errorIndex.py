@@ -0,0 +1,92 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ErrorIndex:
+    '''Inverted trigram index of the error messages of rows (e.g. the job runs store's rows).
+        Error messages repeat a lot: each distinct message is indexed once, keeping the rows having it.
+        Searching is case insensitive: every whitespace separated term must be contained in the message.
+    '''
+    messages: List[str]
+
+    _lowerMessages: List[str]
+    _codes: Dict[str, int]
+    _rowsByMessage: List[Set[int]]
+    _messageByRow: Dict[int, int]
+    _messagesByTrigram: Dict[str, Set[int]]
+
+    def __init__(self) -> None:
+        self.messages = []
+
+        self._lowerMessages = []
+        self._codes = {}
+        self._rowsByMessage = []
+        self._messageByRow = {}
+        self._messagesByTrigram = {}
+
+    def __len__(self) -> int:
+        '''Amount of indexed rows'''
+        return len(self._messageByRow)
+
+    def set(self, row: int, message: Optional[str]) -> None:
+        '''Indexes (or re-indexes) the row's message, None or empty to remove it'''
+        previous = self._messageByRow.pop(row, None)
+        if previous is not None:
+            self._rowsByMessage[previous].discard(row)
+
+        if not message:
+            return
+
+        code = self._codes.get(message)
+        if code is None:
+            code = len(self.messages)
+            self._codes[message] = code
+            self.messages.append(message)
+            self._lowerMessages.append(message.lower())
+            self._rowsByMessage.append(set())
+            for trigram in trigrams(self._lowerMessages[code]):
+                self._messagesByTrigram.setdefault(trigram, set()).add(code)
+
+        self._rowsByMessage[code].add(row)
+        self._messageByRow[row] = code
+
+    def matchingMessages(self, text: str) -> List[int]:
+        '''Codes of the distinct messages matching the search text (still referenced by a row)'''
+        terms = text.lower().split()
+        if len(terms) == 0:
+            return []
+
+        candidates: Optional[Set[int]] = None
+        for term in terms:
+            for trigram in trigrams(term):
+                messages = self._messagesByTrigram.get(trigram, set())
+                candidates = set(messages) if candidates is None else candidates & messages
+                if len(candidates) == 0:
+                    return []
+
+        # terms shorter than a trigram are checked on all the messages
+        codes: Iterable[int] = candidates if candidates is not None else range(len(self.messages))
+
+        return sorted(code for code in codes
+                      if len(self._rowsByMessage[code]) > 0
+                      and all(term in self._lowerMessages[code] for term in terms))
+
+    def messageRows(self, code: int) -> Set[int]:
+        return self._rowsByMessage[code]
+
+    def search(self, text: str) -> np.ndarray:
+        '''Sorted rows whose message matches the search text'''
+        rows = [np.fromiter(self._rowsByMessage[code], dtype=np.int64, count=len(self._rowsByMessage[code]))
+                for code in self.matchingMessages(text)]
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        result = np.concatenate(rows)
+        result.sort()
+
+        return result
@@ -0,0 +1,371 @@
+import heapq
+import math
+from datetime import datetime, tzinfo
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import tzlocal
+
+from lib.aws.jobs import JobRun, activeJobRunStates
+from lib.errorIndex import ErrorIndex
+
+
+class StringPool:
+    '''Interns strings into integer codes (None is -1)'''
+    values: List[str]
+    codes: Dict[str, int]
+
+    def __init__(self) -> None:
+        self.values = []
+        self.codes = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+
+        return code
+
+    def value(self, code: int) -> Optional[str]:
+        return self.values[code] if code >= 0 else None
+
+
+# Column name, dtype, missing value
+_columns = (
+    ('startedOn', np.float64, math.nan),  # epoch seconds
+    ('completedOn', np.float64, math.nan),  # epoch seconds
+    ('lastModifiedOn', np.float64, math.nan),  # epoch seconds
+    ('executionTime', np.int32, 0),  # seconds
+    ('timeout', np.int32, 0),  # minutes
+    ('allocatedCapacity', np.float32, 0),
+    ('maxCapacity', np.float32, math.nan),
+    ('numberOfWorkers', np.int32, -1),
+    ('attempt', np.int16, 0),
+    ('job', np.int32, -1),
+    ('state', np.int16, -1),
+    ('workerType', np.int16, -1),
+    ('glueVersion', np.int16, -1),
+    ('logGroupName', np.int16, -1),
+    ('triggerName', np.int32, -1),
+    ('securityConfiguration', np.int16, -1),
+)
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    return value.timestamp() if value is not None else math.nan
+
+
+class JobRunStore:
+    '''Columnar, array-backed storage of job runs.
+        Numeric fields are stored in NumPy arrays, repeated strings (job names, states, worker types...)
+        as interned codes; JobRun objects are only materialized on demand.
+        Runs are identified by their Id: appending an already stored run updates it.
+        Arguments, NotificationProperty and PredecessorRuns are not stored.
+        The newest recentRuns runs of each job and its runs count by state are maintained as runs are appended.
+    '''
+    recentRuns: int
+    jobNames: StringPool
+    states: StringPool
+    workerTypes: StringPool
+    glueVersions: StringPool
+    logGroupNames: StringPool
+    triggerNames: StringPool
+    securityConfigurations: StringPool
+
+    ids: List[str]
+    errorMessages: Dict[int, str]
+    errorIndex: ErrorIndex
+    previousRunIds: Dict[int, str]
+
+    _size: int
+    _arrays: Dict[str, np.ndarray]
+    _rowById: Dict[str, int]
+    _rowsByJob: Dict[int, List[int]]
+    _latestRowByJob: Dict[int, int]
+    # Min-heaps of (start time, row) of the newest recentRuns runs of each job
+    _recentRowsByJob: Dict[int, List[Tuple[float, int]]]
+    # Amount of runs of each job by state code
+    _stateCountsByJob: Dict[int, Dict[int, int]]
+    _timezone: tzinfo
+
+    def __init__(self, recentRuns: int = 5) -> None:
+        self.recentRuns = recentRuns
+        self._timezone = tzlocal.get_localzone()
+        self.clear()
+
+    def clear(self) -> None:
+        self.jobNames = StringPool()
+        self.states = StringPool()
+        self.workerTypes = StringPool()
+        self.glueVersions = StringPool()
+        self.logGroupNames = StringPool()
+        self.triggerNames = StringPool()
+        self.securityConfigurations = StringPool()
+
+        self.ids = []
+        self.errorMessages = {}
+        self.errorIndex = ErrorIndex()
+        self.previousRunIds = {}
+
+        self._size = 0
+        self._arrays = {name: np.empty(0, dtype=dtype)
+                        for name, dtype, _ in _columns}
+        self._rowById = {}
+        self._rowsByJob = {}
+        self._latestRowByJob = {}
+        self._recentRowsByJob = {}
+        self._stateCountsByJob = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, runId: str) -> bool:
+        return runId in self._rowById
+
+    def column(self, name: str) -> np.ndarray:
+        '''Read-only view of the stored values of a column (see _columns)'''
+        view = self._arrays[name][:self._size]
+        view.flags.writeable = False
+
+        return view
+
+    @property
+    def nbytes(self) -> int:
+        '''Approximate memory used by the numeric columns'''
+        return sum(array.nbytes for array in self._arrays.values())
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._arrays['startedOn'])
+        if size <= capacity:
+            return
+
+        capacity = max(size, capacity * 2, 1024)
+        for name, dtype, missing in _columns:
+            array = np.full(capacity, missing, dtype=dtype)
+            array[:self._size] = self._arrays[name][:self._size]
+            self._arrays[name] = array
+
+    def _rowValues(self, run: JobRun) -> tuple:
+        # Same order as _columns
+        return (
+            _timestamp(run.StartedOn),
+            _timestamp(run.CompletedOn),
+            _timestamp(run.LastModifiedOn),
+            run.ExecutionTime or 0,
+            run.Timeout or 0,
+            run.AllocatedCapacity or 0,
+            run.MaxCapacity if run.MaxCapacity is not None else math.nan,
+            run.NumberOfWorkers if run.NumberOfWorkers is not None else -1,
+            run.Attempt or 0,
+            self.jobNames.code(run.JobName),
+            self.states.code(run.JobRunState),
+            self.workerTypes.code(run.WorkerType or None),
+            self.glueVersions.code(run.GlueVersion),
+            self.logGroupNames.code(run.LogGroupName),
+            self.triggerNames.code(run.TriggerName),
+            self.securityConfigurations.code(run.SecurityConfiguration),
+        )
+
+    def _setStrings(self, row: int, run: JobRun) -> None:
+        for values, value in ((self.errorMessages, run.ErrorMessage), (self.previousRunIds, run.PreviousRunId)):
+            if value:
+                values[row] = value
+            else:
+                values.pop(row, None)
+        self.errorIndex.set(row, run.ErrorMessage)
+
+    def append(self, runs: Iterable[JobRun]) -> List[int]:
+        '''Adds (or updates) the runs, returns the affected rows'''
+        newRuns: List[JobRun] = []
+        affected: List[int] = []
+
+        for run in runs:
+            row = self._rowById.get(run.Id)
+            if row is None:
+                newRuns.append(run)
+                continue
+
+            affected.append(row)
+            jobCode = int(self._arrays['job'][row])
+            self._countState(jobCode, int(self._arrays['state'][row]), -1)
+            for (name, _, _), value in zip(_columns, self._rowValues(run)):
+                self._arrays[name][row] = value
+            self._setStrings(row, run)
+            self._countState(jobCode, int(self._arrays['state'][row]), 1)
+            self._updateLatestRow(jobCode, row)
+
+        if len(newRuns) == 0:
+            return affected
+
+        start = self._size
+        end = start + len(newRuns)
+        self._reserve(end)
+
+        rows = [self._rowValues(run) for run in newRuns]
+        for (name, dtype, _), values in zip(_columns, zip(*rows)):
+            self._arrays[name][start:end] = np.fromiter(
+                values, dtype=dtype, count=len(newRuns))
+
+        for row, run in enumerate(newRuns, start):
+            jobCode = self.jobNames.codes[run.JobName]
+            self.ids.append(run.Id)
+            self._rowById[run.Id] = row
+            self._rowsByJob.setdefault(jobCode, []).append(row)
+            self._setStrings(row, run)
+            self._countState(jobCode, int(self._arrays['state'][row]), 1)
+            self._updateLatestRow(jobCode, row)
+            self._pushRecentRow(jobCode, row)
+
+        self._size = end
+
+        return affected + list(range(start, end))
+
+    def _updateLatestRow(self, jobCode: int, row: int) -> None:
+        latest = self._latestRowByJob.get(jobCode)
+        startedOn = self._arrays['startedOn']
+        if latest is None or startedOn[row] > startedOn[latest]:
+            self._latestRowByJob[jobCode] = row
+
+    def _pushRecentRow(self, jobCode: int, row: int) -> None:
+        recentRows = self._recentRowsByJob.setdefault(jobCode, [])
+        entry = (float(self._arrays['startedOn'][row]), row)
+        if len(recentRows) < self.recentRuns:
+            heapq.heappush(recentRows, entry)
+        elif entry > recentRows[0]:
+            heapq.heapreplace(recentRows, entry)
+
+    def _countState(self, jobCode: int, stateCode: int, amount: int) -> None:
+        stateCounts = self._stateCountsByJob.setdefault(jobCode, {})
+        stateCounts[stateCode] = stateCounts.get(stateCode, 0) + amount
+
+    def _datetime(self, timestamp: float) -> Optional[datetime]:
+        return None if math.isnan(timestamp) else datetime.fromtimestamp(timestamp, tz=self._timezone)
+
+    def run(self, row: int) -> JobRun:
+        '''Materializes the JobRun stored at the given row'''
+        arrays = self._arrays
+        numberOfWorkers = int(arrays['numberOfWorkers'][row])
+        maxCapacity = float(arrays['maxCapacity'][row])
+
+        return JobRun(
+            Id=self.ids[row],
+            Attempt=int(arrays['attempt'][row]),
+            JobName=self.jobNames.value(int(arrays['job'][row])),
+            StartedOn=self._datetime(arrays['startedOn'][row]),
+            JobRunState=self.states.value(int(arrays['state'][row])),
+            AllocatedCapacity=int(arrays['allocatedCapacity'][row]),
+            ExecutionTime=int(arrays['executionTime'][row]),
+            Timeout=int(arrays['timeout'][row]),
+            MaxCapacity=None if math.isnan(maxCapacity) else maxCapacity,
+            LogGroupName=self.logGroupNames.value(
+                int(arrays['logGroupName'][row])),
+            GlueVersion=self.glueVersions.value(
+                int(arrays['glueVersion'][row])),
+            WorkerType=self.workerTypes.value(
+                int(arrays['workerType'][row])) or '',
+            ErrorMessage=self.errorMessages.get(row, ''),
+            NumberOfWorkers=numberOfWorkers if numberOfWorkers >= 0 else None,
+            CompletedOn=self._datetime(arrays['completedOn'][row]),
+            TriggerName=self.triggerNames.value(
+                int(arrays['triggerName'][row])),
+            PreviousRunId=self.previousRunIds.get(row),
+            SecurityConfiguration=self.securityConfigurations.value(
+                int(arrays['securityConfiguration'][row])),
+            LastModifiedOn=self._datetime(arrays['lastModifiedOn'][row]),
+        )
+
+    def runs(self, rows: Iterable[int]) -> List[JobRun]:
+        return [self.run(int(row)) for row in rows]
+
+    def jobRows(self, jobName: str, limit: Optional[int] = None) -> np.ndarray:
+        '''Rows of the job's runs, newest first (the newest ones only if limit is given)'''
+        jobCode = self.jobNames.codes.get(jobName)
+        if jobCode is None:
+            return np.empty(0, dtype=np.int64)
+
+        rows = np.array(self._rowsByJob[jobCode], dtype=np.int64)
+        # negated start time: newest first
+        keys = -self._arrays['startedOn'][rows]
+        if limit is not None and limit < len(rows):
+            # select the newest ones in linear time, then sort only them
+            rows = rows[np.argpartition(keys, limit)[:limit]]
+            keys = -self._arrays['startedOn'][rows]
+        order = np.argsort(keys, kind='stable')
+
+        return rows[order]
+
+    def jobRuns(self, jobName: str, limit: Optional[int] = None) -> List[JobRun]:
+        '''The job's runs, newest first'''
+        return self.runs(self.jobRows(jobName, limit))
+
+    def latestJobRow(self, jobName: str) -> Optional[int]:
+        jobCode = self.jobNames.codes.get(jobName)
+
+        return self._latestRowByJob.get(jobCode) if jobCode is not None else None
+
+    def latestJobRun(self, jobName: str) -> Optional[JobRun]:
+        row = self.latestJobRow(jobName)
+
+        return self.run(row) if row is not None else None
+
+    def recentJobRows(self, jobName: str) -> List[int]:
+        '''Rows of the job's newest recentRuns runs, newest first'''
+        jobCode = self.jobNames.codes.get(jobName)
+        if jobCode is None:
+            return []
+
+        return [row for _, row in sorted(self._recentRowsByJob[jobCode], reverse=True)]
+
+    def recentJobRuns(self, jobName: str) -> List[JobRun]:
+        return self.runs(self.recentJobRows(jobName))
+
+    def jobStateCounts(self, jobName: str) -> Dict[str, int]:
+        '''Amount of the job's runs by state'''
+        jobCode = self.jobNames.codes.get(jobName)
+        if jobCode is None:
+            return {}
+
+        return {self.states.value(stateCode): count
+                for stateCode, count in self._stateCountsByJob[jobCode].items() if count > 0}
+
+    def activeJobRuns(self) -> Dict[str, List[str]]:
+        '''Ids of the runs which may still change (see activeJobRunStates), by job'''
+        stateCodes = [self.states.codes[state] for state in activeJobRunStates if state in self.states.codes]
+        rows = np.flatnonzero(np.isin(self.column('state'), stateCodes))
+        result: Dict[str, List[str]] = {}
+        for row in rows.tolist():
+            result.setdefault(self.jobNames.value(int(self._arrays['job'][row])), []).append(self.ids[row])
+
+        return result
+
+    def errorRows(self, text: str) -> np.ndarray:
+        '''Rows of the runs whose error message matches the search text (see ErrorIndex)'''
+        return self.errorIndex.search(text)
+
+    def countByJob(self, rows: np.ndarray) -> Dict[str, int]:
+        '''Amount of the given rows by job'''
+        counts = np.bincount(self._arrays['job'][rows], minlength=len(self.jobNames))
+
+        return {self.jobNames.value(int(jobCode)): int(counts[jobCode]) for jobCode in np.flatnonzero(counts)}
+
+    def storedJobNames(self) -> List[str]:
+        return list(self.jobNames.values)
+
+    def rowsInRange(self, fromDT: datetime, toDT: datetime) -> np.ndarray:
+        '''Rows of the runs active between the two dates (still running runs are considered active until now)'''
+        now = datetime.now(tz=self._timezone).timestamp()
+        startedOn = self.column('startedOn')
+        completedOn = np.nan_to_num(self.column('completedOn'), nan=now)
+
+        return np.flatnonzero((startedOn <= toDT.timestamp()) & (completedOn >= fromDT.timestamp()))
+
+    def runsInRange(self, fromDT: datetime, toDT: datetime) -> List[JobRun]:
+        return self.runs(self.rowsInRange(fromDT, toDT))
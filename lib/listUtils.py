@@ -1,4 +1,5 @@
-from typing import Any
+from dataclasses import dataclass, field
+from typing import Any, Hashable, Iterable, Iterator, List, Sequence, Tuple
 
 
 def popFlag(l: list, *values: Any) -> bool:
@@ -13,3 +14,46 @@ def popFlag(l: list, *values: Any) -> bool:
             pass
 
     return found
+
+
+def contiguousRanges(values: Iterable[int]) -> Iterator[Tuple[int, int]]:
+    '''Groups the sorted values in contiguous (first, last) ranges'''
+    first = last = None
+    for value in values:
+        if last is not None and value == last + 1:
+            last = value
+            continue
+        if first is not None:
+            yield first, last
+        first = last = value
+
+    if first is not None:
+        yield first, last
+
+
+@dataclass
+class SequenceDiff:
+    '''How to turn a sequence of unique keys into another one:
+        remove the removed ranges (positions in the old sequence, last first),
+        reorder the kept keys if moved, then insert the inserted ranges (positions in the new sequence, first first)
+    '''
+    removed: List[Tuple[int, int]] = field(default_factory=lambda: [])
+    moved: bool = field(default=False)
+    inserted: List[Tuple[int, int]] = field(default_factory=lambda: [])
+
+    def isEmpty(self) -> bool:
+        return len(self.removed) == 0 and not self.moved and len(self.inserted) == 0
+
+
+def diffSequences(old: Sequence[Hashable], new: Sequence[Hashable]) -> SequenceDiff:
+    '''Diffs two sequences of unique keys (see SequenceDiff), in linear time'''
+    oldKeys = set(old)
+    newKeys = set(new)
+
+    removed = list(contiguousRanges(
+        position for position, key in enumerate(old) if key not in newKeys))
+    inserted = list(contiguousRanges(
+        position for position, key in enumerate(new) if key not in oldKeys))
+    moved = [key for key in old if key in newKeys] != [key for key in new if key in oldKeys]
+
+    return SequenceDiff(removed=removed, moved=moved, inserted=inserted)
@@ -0,0 +1,466 @@
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import tzlocal
+
+from lib import timeUtils
+
+# Filter query language
+#   query       clause; clause; ...             all the clauses must match
+#   clause      a OR b, a AND b, NOT a, (a)     NOT binds tighter than AND, AND than OR
+#   term        free text                       case insensitive substring of any free text field
+#               field : value                   case insensitive substring (equality for non text fields)
+#               field = value, field != value   equality (case insensitive)
+#               field > value, >=, <, <=        numbers, dates and durations
+#               field ~ regex                   case insensitive regular expression search (text fields)
+# Field names are case and space insensitive, values containing operators, parenthesis or semicolons
+# must be double quoted. Dates: YYYY-MM-DD[ HH:MM[:SS]] (local time) or a duration meaning
+# "that long ago" (i.e. 2h30m); durations: HH:MM:SS, 1d2h3m4s or seconds.
+
+Predicate = Callable[[Any], bool]
+
+fieldTypes = ('text', 'number', 'date', 'duration')
+keywords = ('AND', 'OR', 'NOT')
+# filterRows checks whether it has been cancelled every this many rows
+cancellationCheckRows = 1024
+
+
+class QueryError(ValueError):
+    '''The query can't be parsed or compiled'''
+
+
+@dataclass
+class QueryField:
+    '''A field the queries can filter by
+        name        str         the field's name (i.e. the table column)
+        type        str         one of fieldTypes
+        getter      callable    extracts the value from the filtered object (None if missing)
+        freeText    bool        searched by the free text terms (text fields only)
+        aliases     tuple       other names of the field
+    '''
+    name: str
+    type: str
+    getter: Callable[[Any], Any]
+    freeText: bool = field(default=False)
+    aliases: Tuple[str, ...] = field(default=())
+
+
+# Syntax tree
+
+@dataclass
+class FreeText:
+    value: str
+
+
+@dataclass
+class Comparison:
+    field: str
+    operator: str
+    value: str
+
+
+@dataclass
+class Not:
+    operand: 'Node'
+
+
+@dataclass
+class And:
+    operands: List['Node']
+
+
+@dataclass
+class Or:
+    operands: List['Node']
+
+
+Node = Union[FreeText, Comparison, Not, And, Or]
+
+
+_tokenPattern = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<operator>!=|>=|<=|=|>|<|~|:)
+  | (?P<paren>[()])
+  | (?P<separator>;)
+  | (?P<word>(?:[^\s()"=!<>:~;]|!(?!=)|(?<=\d):(?=\d))+)
+''', re.VERBOSE)
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    '''Returns the (kind, text) tokens: string, operator, paren, separator, keyword and word'''
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _tokenPattern.match(text, position)
+        if match is None:
+            raise QueryError(f'Unexpected "{text[position]}" at position {position + 1}')
+        position = match.end()
+
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'space':
+            continue
+        if kind == 'string':
+            value = re.sub(r'\\(["\\])', r'\1', value[1:-1])
+        elif kind == 'word' and value in keywords:
+            kind = 'keyword'
+        tokens.append((kind, value))
+
+    return tokens
+
+
+class _Parser:
+    tokens: List[Tuple[str, str]]
+    position: int
+
+    def __init__(self, tokens: List[Tuple[str, str]]) -> None:
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+
+        return None, None
+
+    def next(self) -> Tuple[Optional[str], Optional[str]]:
+        token = self.peek()
+        self.position += 1
+
+        return token
+
+    def isKeyword(self, keyword: str) -> bool:
+        return self.peek() == ('keyword', keyword)
+
+    def parseQuery(self) -> Optional[Node]:
+        clauses = []
+        while True:
+            kind, _ = self.peek()
+            if kind is None:
+                break
+            if kind == 'separator':
+                self.next()
+                continue
+
+            clauses.append(self.parseOr())
+            kind, value = self.peek()
+            if kind not in (None, 'separator'):
+                raise QueryError(f'Unexpected "{value}", use AND, OR or ;')
+
+        if len(clauses) == 0:
+            return None
+
+        return clauses[0] if len(clauses) == 1 else And(clauses)
+
+    def parseOr(self) -> Node:
+        operands = [self.parseAnd()]
+        while self.isKeyword('OR'):
+            self.next()
+            operands.append(self.parseAnd())
+
+        return operands[0] if len(operands) == 1 else Or(operands)
+
+    def parseAnd(self) -> Node:
+        operands = [self.parseNot()]
+        while self.isKeyword('AND'):
+            self.next()
+            operands.append(self.parseNot())
+
+        return operands[0] if len(operands) == 1 else And(operands)
+
+    def parseNot(self) -> Node:
+        if self.isKeyword('NOT'):
+            self.next()
+
+            return Not(self.parseNot())
+
+        return self.parsePrimary()
+
+    def parsePrimary(self) -> Node:
+        kind, value = self.peek()
+        if kind == 'paren' and value == '(':
+            self.next()
+            node = self.parseOr()
+            if self.next() != ('paren', ')'):
+                raise QueryError('Missing closing parenthesis')
+
+            return node
+
+        words = self.parseWords()
+        if len(words) == 0:
+            raise QueryError(f'Unexpected "{value}"' if value is not None else 'Unexpected end of the filter')
+
+        kind, operator = self.peek()
+        if kind != 'operator':
+            return FreeText(' '.join(words))
+
+        self.next()
+        values = self.parseWords()
+        if len(values) == 0:
+            raise QueryError(f'Missing value after "{" ".join(words)} {operator}"')
+
+        return Comparison(' '.join(words), operator, ' '.join(values))
+
+    def parseWords(self) -> List[str]:
+        words = []
+        while self.peek()[0] in ('word', 'string'):
+            words.append(self.next()[1])
+
+        return words
+
+
+def parseQuery(text: str) -> Optional[Node]:
+    '''Parses the query into its syntax tree (None if the query is empty)'''
+    return _Parser(tokenize(text)).parseQuery()
+
+
+def _normalizeName(name: str) -> str:
+    return re.sub(r'[\s_]', '', name).lower()
+
+
+_datePrecisions = (
+    ('%Y-%m-%d %H:%M:%S', timedelta(seconds=1)),
+    ('%Y-%m-%d %H:%M', timedelta(minutes=1)),
+    ('%Y-%m-%d', timedelta(days=1)),
+)
+
+
+def _parseDate(text: str, now: datetime) -> Tuple[datetime, datetime]:
+    '''Returns the start and end of the period the date refers to'''
+    for dateFormat, precision in _datePrecisions:
+        try:
+            start = datetime.strptime(text, dateFormat)
+            # pytz based time zones (older tzlocal versions) must localize
+            start = now.tzinfo.localize(start) if hasattr(now.tzinfo, 'localize') \
+                else start.replace(tzinfo=now.tzinfo)
+
+            return start, start + precision
+        except ValueError:
+            pass
+
+    try:
+        moment = now - timedelta(seconds=timeUtils.parseDuration(text))
+    except ValueError:
+        raise QueryError(f'Invalid date: {text}')
+
+    return moment, moment
+
+
+class _CodeGenerator:
+    '''Translates the syntax tree into the source of a single boolean expression on "obj".
+        Getters, needles, patterns and references are passed as named constants,
+        each getter is called at most once per comparison (its value bound via the walrus operator).
+    '''
+    constants: Dict[str, Any]
+
+    _variables: int
+
+    def __init__(self) -> None:
+        self.constants = {}
+        self._variables = 0
+
+    def constant(self, value: Any) -> str:
+        name = f'c{len(self.constants)}'
+        self.constants[name] = value
+
+        return name
+
+    def variable(self, getter: Callable[[Any], Any]) -> Tuple[str, str]:
+        '''Returns the variable name and the expression assigning it the getter's value'''
+        name = f'v{self._variables}'
+        self._variables += 1
+
+        return name, f'({name} := {self.constant(getter)}(obj))'
+
+    def text(self, getter: Callable[[Any], Any], operator: str, value: str) -> str:
+        name, assignment = self.variable(getter)
+        isText = f'isinstance({assignment}, str)'
+
+        if operator == ':':
+            return f'({isText} and {self.constant(value.lower())} in {name}.lower())'
+        if operator in ('=', '!='):
+            equals = f'({isText} and {name}.lower() == {self.constant(value.lower())})'
+
+            return equals if operator == '=' else f'(not {equals})'
+        if operator == '~':
+            try:
+                pattern = re.compile(value, re.IGNORECASE)
+            except re.error as ex:
+                raise QueryError(f'Invalid regular expression "{value}": {ex}')
+
+            return f'({isText} and {self.constant(pattern.search)}({name}) is not None)'
+
+        raise QueryError(f'"{operator}" can\'t be used on text fields')
+
+    def ordering(self, getter: Callable[[Any], Any], operator: str, reference: Any) -> str:
+        '''reference: number of seconds for durations, an aware datetime for dates'''
+        name, assignment = self.variable(getter)
+        if operator == '=':
+            operator = '=='
+
+        # Missing values are different from anything
+        if operator == '!=':
+            return f'({assignment} is None or {name} != {self.constant(reference)})'
+
+        return f'({assignment} is not None and {name} {operator} {self.constant(reference)})'
+
+    def datePeriod(self, getter: Callable[[Any], Any], operator: str, start: datetime, end: datetime) -> str:
+        '''The date refers to a period (i.e. a whole day)'''
+        if operator in ('>=', '<'):
+            return self.ordering(getter, operator, start)
+        if operator == '>':
+            return self.ordering(getter, '>=', end)
+        if operator == '<=':
+            return self.ordering(getter, '<', end)
+
+        name, assignment = self.variable(getter)
+        inPeriod = f'{self.constant(start)} <= {name} < {self.constant(end)}'
+        if operator == '!=':
+            return f'({assignment} is None or not ({inPeriod}))'
+
+        return f'({assignment} is not None and {inPeriod})'
+
+
+class QuerySchema:
+    '''The fields a kind of objects (i.e. jobs) can be filtered by, compiling the queries into predicates:
+        each query becomes a single generated python function, cached by the query's text.
+    '''
+    fields: List[QueryField]
+
+    _fieldsByName: Dict[str, QueryField]
+    _compiled: Dict[str, Predicate]
+
+    maxCachedQueries = 64
+
+    def __init__(self, fields: List[QueryField]) -> None:
+        self.fields = fields
+
+        self._fieldsByName = {}
+        for queryField in fields:
+            if queryField.type not in fieldTypes:
+                raise ValueError(f'Unknown field type: {queryField.type}')
+            for name in (queryField.name,) + queryField.aliases:
+                self._fieldsByName[_normalizeName(name)] = queryField
+        self._compiled = {}
+
+    def field(self, name: str) -> QueryField:
+        queryField = self._fieldsByName.get(_normalizeName(name))
+        if queryField is None:
+            fieldNames = ', '.join(queryField.name for queryField in self.fields)
+            raise QueryError(f'Unknown field "{name}" (available: {fieldNames})')
+
+        return queryField
+
+    def compile(self, text: str) -> Predicate:
+        '''Returns the predicate telling whether an object matches the query (raises QueryError)'''
+        predicate = self._compiled.get(text)
+        if predicate is not None:
+            return predicate
+
+        node = parseQuery(text)
+        predicate = self._compileNode(node, datetime.now(tz=tzlocal.get_localzone())) \
+            if node is not None else (lambda _: True)
+
+        # Relative dates depend on the current time
+        if not self._hasDates(node):
+            if len(self._compiled) >= self.maxCachedQueries:
+                self._compiled.pop(next(iter(self._compiled)))
+            self._compiled[text] = predicate
+
+        return predicate
+
+    def _hasDates(self, node: Optional[Node]) -> bool:
+        return any(isinstance(leaf, Comparison) and self.field(leaf.field).type == 'date'
+                   for leaf in _leaves(node))
+
+    def _compileNode(self, node: Node, now: datetime) -> Predicate:
+        generator = _CodeGenerator()
+        source = f'def predicate(obj):\n    return {self._generate(generator, node, now)}\n'
+
+        namespace = dict(generator.constants)
+        exec(compile(source, '<query>', 'exec'), namespace)
+
+        return namespace['predicate']
+
+    def _generate(self, generator: _CodeGenerator, node: Node, now: datetime) -> str:
+        if isinstance(node, (And, Or)):
+            joiner = ' and ' if isinstance(node, And) else ' or '
+
+            return '(' + joiner.join(self._generate(generator, operand, now) for operand in node.operands) + ')'
+
+        if isinstance(node, Not):
+            return f'(not {self._generate(generator, node.operand, now)})'
+
+        if isinstance(node, FreeText):
+            operands = [generator.text(queryField.getter, ':', node.value)
+                        for queryField in self.fields if queryField.freeText]
+
+            return '(' + ' or '.join(operands) + ')' if len(operands) > 0 else 'False'
+
+        return self._generateComparison(generator, node, now)
+
+    def _generateComparison(self, generator: _CodeGenerator, node: Comparison, now: datetime) -> str:
+        queryField = self.field(node.field)
+        operator = node.operator
+        if queryField.type == 'text':
+            return generator.text(queryField.getter, operator, node.value)
+
+        if operator == '~':
+            raise QueryError(f'"~" can be used on text fields only, {queryField.name} is a {queryField.type}')
+        if operator == ':':
+            operator = '='
+
+        if queryField.type == 'date':
+            start, end = _parseDate(node.value, now)
+            if start == end:
+                return generator.ordering(queryField.getter, operator, start)
+
+            return generator.datePeriod(queryField.getter, operator, start, end)
+
+        try:
+            reference = float(node.value) if queryField.type == 'number' \
+                else timeUtils.parseDuration(node.value)
+        except ValueError:
+            raise QueryError(f'Invalid {queryField.type} for {queryField.name}: {node.value}')
+
+        return generator.ordering(queryField.getter, operator, reference)
+
+
+def _leaves(node: Optional[Node]) -> Iterator[Node]:
+    if isinstance(node, (And, Or)):
+        for operand in node.operands:
+            yield from _leaves(operand)
+    elif isinstance(node, Not):
+        yield from _leaves(node.operand)
+    elif node is not None:
+        yield node
+
+
+def filterRows(
+    rows: Sequence[Any], predicate: Predicate, sortKey: Optional[Callable[[Any], Any]] = None,
+    reverse: bool = False, cancelled: Optional[threading.Event] = None,
+) -> Optional[List[int]]:
+    '''Returns the indexes of the rows matching the predicate, sorted by sortKey (stable) if given.
+        Returns None as soon as the cancelled event is set (checked every cancellationCheckRows rows).
+    '''
+    indexes = []
+    for start in range(0, len(rows), cancellationCheckRows):
+        if cancelled is not None and cancelled.is_set():
+            return None
+
+        indexes.extend(index for index in range(start, min(start + cancellationCheckRows, len(rows)))
+                       if predicate(rows[index]))
+
+    if sortKey is not None:
+        if cancelled is not None and cancelled.is_set():
+            return None
+
+        keys = [sortKey(rows[index]) for index in indexes]
+        order = sorted(range(len(indexes)), key=keys.__getitem__, reverse=reverse)
+        indexes = [indexes[position] for position in order]
+
+    return indexes
@@ -7,3 +7,43 @@ def fromTimeToString(hours=0, minutes=0, seconds=0):
     seconds = totalSeconds - minutes * 60
 
     return f'{hours:02d}:{minutes:02d}:{seconds:02d}'
+
+
+_durationUnits = {'d': 24 * 60 * 60, 'h': 60 * 60, 'm': 60, 's': 1}
+
+
+def parseDuration(text: str) -> int:
+    '''Parses "HH:MM:SS", "MM:SS", "1d2h30m15s" (any subset of the units) or plain seconds, returns the seconds'''
+    text = text.strip().lower()
+    if text == '':
+        raise ValueError('Empty duration')
+
+    if ':' in text:
+        parts = text.split(':')
+        if len(parts) > 3 or not all(part.isdigit() for part in parts):
+            raise ValueError(f'Invalid duration: {text}')
+
+        seconds = 0
+        for part in parts:
+            seconds = seconds * 60 + int(part)
+
+        return seconds
+
+    if text.isdigit():
+        return int(text)
+
+    seconds = 0
+    number = ''
+    for char in text:
+        if char.isdigit():
+            number += char
+        elif char in _durationUnits and number != '':
+            seconds += int(number) * _durationUnits[char]
+            number = ''
+        else:
+            raise ValueError(f'Invalid duration: {text}')
+
+    if number != '':
+        raise ValueError(f'Invalid duration: {text}')
+
+    return seconds
@@ -0,0 +1,259 @@
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from lib.jobRunStore import JobRunStore
+
+# Rollups' bucket sizes (seconds): minute, hour, day (UTC)
+rollupIntervals = (60.0, 60.0 * 60, 24 * 60.0 * 60)
+
+
+@dataclass
+class UsageSeries:
+    '''Glue usage sampled every interval seconds starting from start (epoch seconds):
+        dpu[i] and runs[i] are the DPU allocated to, and the amount of, the runs active
+        in the bucket [start + i * interval, start + (i + 1) * interval],
+        dpuSeconds[i] the DPU-seconds consumed within it
+    '''
+    start: float
+    interval: float
+    dpu: np.ndarray
+    runs: np.ndarray
+    dpuSeconds: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.dpu)
+
+    def timestamps(self) -> np.ndarray:
+        '''Epoch seconds of the buckets' starts'''
+        return self.start + np.arange(len(self.dpu)) * self.interval
+
+
+def bucketCount(fromTimestamp: float, toTimestamp: float, interval: float) -> int:
+    '''Amount of buckets from fromTimestamp to toTimestamp (both included)'''
+    return int(math.floor((toTimestamp - fromTimestamp) / interval)) + 1
+
+
+# Difference arrays (see _accumulate): active DPU, active runs, DPU-seconds of the buckets fully covered by a run
+# and DPU-seconds of the buckets partially covered
+Differences = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def _zeroDifferences(count: int) -> Differences:
+    return tuple(np.zeros(count + 1) for _ in range(4))
+
+
+def _accumulate(
+    differences: Differences, origin: float, interval: float,
+    startedOn: np.ndarray, completedOn: np.ndarray, capacity: np.ndarray, sign: float = 1.0,
+) -> None:
+    '''Adds the (completed) runs to the difference arrays of the buckets starting at origin, in O(runs):
+        each run adds its capacity at its first bucket and removes it after its last one,
+        the prefix sum of the differences being the usage (see _usage). Out of range buckets are ignored.
+    '''
+    dpu, runs, fullSeconds, partialSeconds = differences
+    count = len(dpu) - 1
+    capacity = capacity.astype(np.float64) * sign
+
+    # active in bucket i: startedOn <= bucket end and completedOn >= bucket start
+    first = np.maximum(np.ceil((startedOn - origin) / interval - 1), 0).astype(np.int64)
+    last = np.minimum(np.floor((completedOn - origin) / interval), count - 1).astype(np.int64)
+    active = first <= last
+    np.add.at(dpu, first[active], capacity[active])
+    np.add.at(dpu, last[active] + 1, -capacity[active])
+    np.add.at(runs, first[active], sign)
+    np.add.at(runs, last[active] + 1, -sign)
+
+    # seconds within bucket i: [bucket start, bucket end)
+    firstBucket = np.floor((startedOn - origin) / interval).astype(np.int64)
+    lastBucket = np.floor((completedOn - origin) / interval).astype(np.int64)
+    single = firstBucket == lastBucket
+    firstSeconds = np.where(single, completedOn - startedOn, origin + (firstBucket + 1) * interval - startedOn)
+    lastSeconds = np.where(single, 0, completedOn - (origin + lastBucket * interval))
+    for buckets, seconds in ((firstBucket, firstSeconds), (lastBucket, lastSeconds)):
+        inRange = (buckets >= 0) & (buckets < count)
+        np.add.at(partialSeconds, buckets[inRange], capacity[inRange] * seconds[inRange])
+    fullFirst = np.maximum(firstBucket + 1, 0)
+    fullEnd = np.minimum(lastBucket, count)
+    full = fullFirst < fullEnd
+    np.add.at(fullSeconds, fullFirst[full], capacity[full] * interval)
+    np.add.at(fullSeconds, fullEnd[full], -capacity[full] * interval)
+
+
+def _usage(differences: Differences) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''The (dpu, runs, dpuSeconds) of the buckets described by the difference arrays'''
+    dpu, runs, fullSeconds, partialSeconds = differences
+
+    return (
+        np.cumsum(dpu)[:-1],
+        np.rint(np.cumsum(runs)[:-1]).astype(np.int64),
+        np.cumsum(fullSeconds)[:-1] + partialSeconds[:-1],
+    )
+
+
+def usageSeries(
+    startedOn: np.ndarray, completedOn: np.ndarray, capacity: np.ndarray,
+    fromTimestamp: float, toTimestamp: float, interval: float, now: Optional[float] = None,
+) -> UsageSeries:
+    '''Sweep line over the runs (epoch seconds, NaN completedOn for the runs still active until now),
+        in O(runs + buckets)
+    '''
+    count = bucketCount(fromTimestamp, toTimestamp, interval)
+    if now is None:
+        now = datetime.now().timestamp()
+    valid = ~np.isnan(startedOn)
+    completedOn = np.where(np.isnan(completedOn), now, completedOn)
+
+    differences = _zeroDifferences(count)
+    _accumulate(differences, fromTimestamp, interval, startedOn[valid], completedOn[valid], capacity[valid])
+    dpu, runs, dpuSeconds = _usage(differences)
+
+    return UsageSeries(start=fromTimestamp, interval=interval, dpu=dpu, runs=runs, dpuSeconds=dpuSeconds)
+
+
+class _Rollup:
+    '''Difference arrays of epoch aligned buckets, grown as needed'''
+    interval: float
+    # Epoch bucket index of the arrays' first item
+    offset: int
+    differences: Differences
+
+    _usage: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.offset = 0
+        self.differences = _zeroDifferences(0)
+        self._usage = None
+
+    def _reserve(self, firstIndex: int, lastIndex: int) -> None:
+        size = len(self.differences[0])
+        if size > 1 and self.offset <= firstIndex and lastIndex < self.offset + size - 1:
+            return
+
+        if size <= 1:
+            offset, end = firstIndex, lastIndex + 1
+        else:
+            # doubling, for amortized constant time growth
+            grow = size
+            offset = min(self.offset, firstIndex - (grow if firstIndex < self.offset else 0))
+            end = max(self.offset + size - 1, lastIndex + 1 + (grow if lastIndex >= self.offset + size - 1 else 0))
+
+        differences = _zeroDifferences(end - offset)
+        if size > 1:
+            for new, old in zip(differences, self.differences):
+                new[self.offset - offset:self.offset - offset + size] = old
+        self.offset = offset
+        self.differences = differences
+
+    def add(self, startedOn: np.ndarray, completedOn: np.ndarray, capacity: np.ndarray, sign: float) -> None:
+        if len(startedOn) == 0:
+            return
+
+        self._reserve(int(np.floor(startedOn.min() / self.interval)) - 1,
+                      int(np.floor(completedOn.max() / self.interval)))
+        _accumulate(self.differences, self.offset * self.interval, self.interval,
+                    startedOn, completedOn, capacity, sign)
+        self._usage = None
+
+    def usage(self, firstIndex: int, count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''The (dpu, runs, dpuSeconds) of count buckets from the given epoch bucket index'''
+        if self._usage is None:
+            self._usage = _usage(self.differences)
+
+        result = (np.zeros(count), np.zeros(count, dtype=np.int64), np.zeros(count))
+        start = max(firstIndex, self.offset)
+        end = min(firstIndex + count, self.offset + len(self._usage[0]))
+        if start < end:
+            for target, values in zip(result, self._usage):
+                target[start - firstIndex:end - firstIndex] = values[start - self.offset:end - self.offset]
+
+        return result
+
+
+class UsageRollups:
+    '''Usage of the job runs store's completed runs, rolled up by minute, hour and day (see rollupIntervals)
+        and maintained incrementally: update must be called with the rows affected by each append.
+        The runs still active are added when queried (see series).
+    '''
+    rollups: List[_Rollup]
+
+    # Start, end and capacity the rows have been rolled up with (NaN start if not rolled up)
+    _startedOn: np.ndarray
+    _completedOn: np.ndarray
+    _capacity: np.ndarray
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self.rollups = [_Rollup(interval) for interval in rollupIntervals]
+        self._startedOn = np.full(0, np.nan)
+        self._completedOn = np.full(0, np.nan)
+        self._capacity = np.zeros(0)
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._startedOn)
+        if size <= capacity:
+            return
+
+        capacity = max(size, capacity * 2, 1024)
+        for name, missing in (('_startedOn', np.nan), ('_completedOn', np.nan), ('_capacity', 0)):
+            array = np.full(capacity, missing)
+            previous = getattr(self, name)
+            array[:len(previous)] = previous
+            setattr(self, name, array)
+
+    def update(self, store: JobRunStore, rows: Iterable[int]) -> None:
+        '''Rolls up the given (appended or updated) rows of the store'''
+        rows = np.unique(np.fromiter(rows, dtype=np.int64))
+        if len(rows) == 0:
+            return
+        self._reserve(len(store))
+
+        previous = rows[~np.isnan(self._startedOn[rows])]
+        if len(previous) > 0:
+            for rollup in self.rollups:
+                rollup.add(self._startedOn[previous], self._completedOn[previous], self._capacity[previous], -1.0)
+
+        startedOn = store.column('startedOn')[rows]
+        completedOn = store.column('completedOn')[rows]
+        capacity = store.column('allocatedCapacity')[rows].astype(np.float64)
+        completed = ~np.isnan(startedOn) & ~np.isnan(completedOn)
+        for rollup in self.rollups:
+            rollup.add(startedOn[completed], completedOn[completed], capacity[completed], 1.0)
+
+        self._startedOn[rows] = np.where(completed, startedOn, np.nan)
+        self._completedOn[rows] = completedOn
+        self._capacity[rows] = capacity
+
+    def series(
+        self, store: JobRunStore, fromTimestamp: float, toTimestamp: float,
+        maxBuckets: int, now: Optional[float] = None,
+    ) -> UsageSeries:
+        '''Usage from the finest rollup having at most maxBuckets buckets in the range (the buckets are epoch aligned)'''
+        rollup = next((rollup for rollup in self.rollups
+                       if bucketCount(fromTimestamp, toTimestamp, rollup.interval) <= maxBuckets), self.rollups[-1])
+        interval = rollup.interval
+        firstIndex = int(math.floor(fromTimestamp / interval))
+        count = int(math.floor(toTimestamp / interval)) - firstIndex + 1
+
+        dpu, runs, dpuSeconds = rollup.usage(firstIndex, count)
+
+        # the runs still active
+        completedOn = store.column('completedOn')
+        activeRows = np.flatnonzero(np.isnan(completedOn) & ~np.isnan(store.column('startedOn')))
+        if len(activeRows) > 0:
+            active = usageSeries(
+                store.column('startedOn')[activeRows], completedOn[activeRows],
+                store.column('allocatedCapacity')[activeRows],
+                firstIndex * interval, (firstIndex + count - 1) * interval, interval, now=now,
+            )
+            dpu = dpu + active.dpu
+            runs = runs + active.runs
+            dpuSeconds = dpuSeconds + active.dpuSeconds
+
+        return UsageSeries(start=firstIndex * interval, interval=interval, dpu=dpu, runs=runs, dpuSeconds=dpuSeconds)
@@ -1,5 +1,6 @@
 import logging
 import sys
+from os import path
 from ui.icon import QSVGIcon
 
 from PyQt5.QtCore import QThreadPool
@@ -24,7 +25,7 @@ if debugMode or infoMode:
     if debugMode:
         loggingLevel = logging.DEBUG
 
-    logDialog = QDebugWindow(loggingLevel=loggingLevel)
+    logDialog = QDebugWindow(loggingLevel=loggingLevel, logFile=path.join(configManager.configRoot, 'debug.log'))
     window.closeEvent = lambda _: logDialog.close()
 
     logDialog.show()
@@ -20,6 +20,6 @@ setuptools.setup(
         "License :: OSI Approved :: GNU General Public License v3 or later (GPLv3+)",
         "Operating System :: OS Independent",
     ],
-    packages=setuptools.find_packages(where=''),
+    packages=setuptools.find_packages(where='', exclude=['benchmarks', 'benchmarks.*', 'tests.benchmarks']),
     python_requires=">=3.9",
 )
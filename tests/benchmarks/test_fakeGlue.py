@@ -0,0 +1,156 @@
+import tempfile
+from datetime import datetime, timezone
+from shutil import rmtree
+from unittest import TestCase
+
+from benchmarks.fakeGlue import FakeGlueBackend, fakeProfile
+from benchmarks.syntheticAccount import SyntheticAccount
+from lib import aws
+from lib.aws.runCache import RunCache
+
+now = datetime(2021, 6, 1, tzinfo=timezone.utc)
+
+
+class SyntheticAccountTestCase(TestCase):
+    def test_deterministic(self):
+        first = SyntheticAccount(numJobs=10, numRuns=500, seed=42, now=now)
+        second = SyntheticAccount(numJobs=10, numRuns=500, seed=42, now=now)
+
+        self.assertEqual(first.job(3), second.job(3))
+        self.assertEqual(first.jobRun(3, 7), second.jobRun(3, 7))
+        self.assertEqual(first.workflow(1, includeGraph=True),
+                         second.workflow(1, includeGraph=True))
+
+    def test_run_counts(self):
+        account = SyntheticAccount(numJobs=7, numRuns=1000, now=now)
+
+        self.assertEqual(1000, sum(account.jobRunCount(i) for i in range(7)))
+        runs = [account.jobRun(0, i) for i in range(account.jobRunCount(0))]
+        self.assertEqual(len(runs), len({run['Id'] for run in runs}))
+        self.assertTrue(all(run['StartedOn'] < now for run in runs))
+        # newest first
+        self.assertEqual(sorted(runs, key=lambda run: run['StartedOn'], reverse=True), runs)
+
+    def test_addJobRuns_keeps_older_runs(self):
+        account = SyntheticAccount(numJobs=2, numRuns=20, runningRatio=1.0, now=now)
+        newest = account.jobRun(0, 0)
+        self.assertEqual('RUNNING', newest['JobRunState'])
+
+        account.addJobRuns(0, 2)
+
+        self.assertEqual(newest['Id'], account.jobRun(0, 2)['Id'])
+        self.assertEqual(newest['StartedOn'], account.jobRun(0, 2)['StartedOn'])
+        self.assertNotEqual('RUNNING', account.jobRun(0, 2)['JobRunState'])
+
+
+class FakeGlueBackendTestCase(TestCase):
+    account: SyntheticAccount
+    cacheRoot: str
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.account = SyntheticAccount(
+            numJobs=30, numRuns=3000, numWorkflows=30, runsPerWorkflow=10, now=now)
+        self.profile = fakeProfile(label='fakeGlueTest')
+        self.cacheRoot = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        rmtree(self.cacheRoot)
+
+    def test_jobs_and_runs(self):
+        backend = FakeGlueBackend(self.account, pageSize=10)
+        with backend.installed(self.profile):
+            jobs = aws.getJobs(self.profile)
+            runs = aws.getJobRuns(self.profile, 'job_00000')
+
+        self.assertEqual(self.account.jobNames, [job.Name for job in jobs])
+        self.assertEqual(self.account.jobRunCount(0), len(runs))
+        self.assertEqual(3, backend.calls['GetJobs'])
+
+    def test_job_runs_pages(self):
+        backend = FakeGlueBackend(self.account)
+        with backend.installed(self.profile):
+            firstPage, nextToken = aws.getJobRunsPage(self.profile, 'job_00000', maxResults=20)
+            secondPage, _ = aws.getJobRunsPage(self.profile, 'job_00000', nextToken, maxResults=20)
+
+        self.assertEqual(20, len(firstPage))
+        self.assertIsNotNone(nextToken)
+        self.assertEqual(self.account.jobRun(0, 20)['Id'], secondPage[0].Id)
+
+    def test_workflows(self):
+        backend = FakeGlueBackend(self.account)
+        with backend.installed(self.profile):
+            workflows = aws.getWorkflowsList(self.profile)
+            graph = aws.getWorkflowGraph(self.profile, workflows[0])
+
+        self.assertEqual(self.account.workflowNames, [workflow.Name for workflow in workflows])
+        self.assertEqual(2, backend.calls['BatchGetWorkflows'])
+        self.assertEqual(3, len(graph.Nodes))
+
+    def test_throttling_is_retried(self):
+        backend = FakeGlueBackend(self.account, throttleRate=0.3, seed=1)
+        with backend.installed(self.profile):
+            runs = aws.getJobRuns(self.profile, 'job_00001')
+
+        self.assertGreater(backend.throttled, 0)
+        self.assertEqual(self.account.jobRunCount(1), len(runs))
+
+    def test_incremental_sync(self):
+        backend = FakeGlueBackend(self.account, pageSize=50)
+        cache = RunCache(self.cacheRoot, self.profile, 'jobRuns', aws.JobRun, 'Id')
+        with backend.installed(self.profile):
+            aws.syncJobRuns(self.profile, 'job_00000', cache)
+            backend.calls.clear()
+
+            self.account.addJobRuns(0, 3)
+            runs = aws.syncJobRuns(self.profile, 'job_00000', cache)
+
+        self.assertEqual(self.account.jobRunCount(0), len(runs))
+        self.assertEqual(1, backend.calls['GetJobRuns'])
+
+    def test_poll_job_runs(self):
+        account = SyntheticAccount(numJobs=30, numRuns=3000, runningRatio=0.0, now=now)
+        backend = FakeGlueBackend(account)
+        oldest = account.jobRun(0, account.jobRunCount(0) - 1)
+        account.addJobRuns(1, 2)
+        with backend.installed(self.profile):
+            runs = aws.pollJobRuns(self.profile, {'job_00000': [oldest['Id']]}, ['job_00001', 'job_00002'],
+                                   newestRuns=5)
+
+        # the active job's newest runs, its active run not among them, the probed jobs' newest run
+        self.assertEqual(3, backend.calls['GetJobRuns'])
+        self.assertEqual(1, backend.calls['GetJobRun'])
+        self.assertEqual(5 + 1 + 2, len(runs))
+        self.assertIn(oldest['Id'], {run.Id for run in runs})
+        self.assertEqual(account.jobRun(1, 0)['Id'], runs[-2].Id)
+
+    def test_sync_after_poll_downloads_all_new_runs(self):
+        account = SyntheticAccount(numJobs=2, numRuns=40, runningRatio=0.0, now=now)
+        backend = FakeGlueBackend(account)
+        cache = RunCache(self.cacheRoot, self.profile, 'jobRuns', aws.JobRun, 'Id')
+        with backend.installed(self.profile):
+            initialCount = len(aws.syncJobRuns(self.profile, 'job_00000', cache))
+
+            account.addJobRuns(0, 5)
+            aws.pollJobRuns(self.profile, {}, ['job_00000'])
+            runs = aws.syncJobRuns(self.profile, 'job_00000', cache)
+
+        # the probed newest run doesn't hide the ones between it and the cached ones
+        self.assertEqual(initialCount + 5, len(runs))
+        self.assertEqual([account.jobRun(0, i)['Id'] for i in range(initialCount + 5)], [run.Id for run in runs])
+
+    def test_poll_job_runs_skips_missing_runs_and_jobs(self):
+        account = SyntheticAccount(numJobs=30, numRuns=3000, runningRatio=0.0, now=now)
+        backend = FakeGlueBackend(account)
+        oldest = account.jobRun(0, account.jobRunCount(0) - 1)
+        purgedId = oldest['Id'][:-8] + 'ffffffff'
+        with backend.installed(self.profile):
+            runs = aws.pollJobRuns(self.profile, {'job_00000': [oldest['Id'], purgedId], 'deleted_job': ['jr_1']},
+                                   ['job_00001', 'deleted_probe'], newestRuns=5)
+
+        self.assertEqual(4, backend.calls['GetJobRuns'])
+        self.assertEqual(2, backend.calls['GetJobRun'])
+        self.assertEqual(5 + 1 + 1, len(runs))
+        self.assertIn(oldest['Id'], {run.Id for run in runs})
+        self.assertNotIn(purgedId, {run.Id for run in runs})
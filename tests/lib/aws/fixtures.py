@@ -0,0 +1,10 @@
+from datetime import datetime
+
+
+def makeRawRun(runId: str, state: str, startedOn: datetime) -> dict:
+    return {
+        'Id': runId, 'Attempt': 0, 'JobName': 'job', 'StartedOn': startedOn,
+        'JobRunState': state, 'AllocatedCapacity': 2, 'ExecutionTime': 60,
+        'Timeout': 2880, 'MaxCapacity': 2.0, 'LogGroupName': '/aws-glue/jobs',
+        'GlueVersion': '2.0', 'PredecessorRuns': [],
+    }
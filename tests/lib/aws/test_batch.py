@@ -0,0 +1,83 @@
+import threading
+import time
+from unittest import TestCase
+
+from botocore.stub import Stubber
+
+from lib import aws
+from lib.aws.common import getClient
+from lib.config import AWSProfile
+
+
+class TokenBucketTestCase(TestCase):
+    def test_acquire_within_capacity_does_not_wait(self):
+        bucket = aws.TokenBucket(rate=1, capacity=3)
+
+        self.assertEqual(0, sum(bucket.acquire() for _ in range(3)))
+
+    def test_acquire_over_capacity_waits(self):
+        bucket = aws.TokenBucket(rate=50, capacity=1)
+        bucket.acquire()
+
+        self.assertGreater(bucket.acquire(), 0)
+
+
+class BatchFetcherTestCase(TestCase):
+    def test_results_and_stats(self):
+        def fn(name: str) -> str:
+            if name == 'broken':
+                raise ValueError(name)
+
+            return name.upper()
+
+        batch = aws.BatchFetcher(fn, ['a', 'broken', 'b'], maxConcurrency=2)
+        results = {result.name: result for result in batch}
+
+        self.assertEqual('A', results['a'].value)
+        self.assertEqual('B', results['b'].value)
+        self.assertIsInstance(results['broken'].exception, ValueError)
+        self.assertEqual(2, batch.stats.completed)
+        self.assertEqual(1, batch.stats.failed)
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def fn(name: str) -> str:
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+            return name
+
+        names = [str(i) for i in range(20)]
+        results = [result.value for result in aws.BatchFetcher(fn, names, maxConcurrency=3)]
+
+        self.assertEqual(sorted(names), sorted(results))
+        self.assertLessEqual(peak[0], 3)
+
+    def test_throttled_calls_are_counted(self):
+        profile = AWSProfile(label='test', region='eu-west-1',
+                             accessKey='batchAccessKey', secretAccessKey='secret')
+        client = getClient('glue', profile)
+
+        def fn(name: str) -> dict:
+            return client.get_job(JobName=name)
+
+        batch = aws.BatchFetcher(fn, ['job'], clients=[client])
+        with Stubber(client) as stubber:
+            stubber.add_client_error('get_job', service_error_code='ThrottlingException',
+                                     expected_params={'JobName': 'job'})
+            results = list(batch)
+
+            stubber.assert_no_pending_responses()
+
+        self.assertEqual(1, len(results))
+        self.assertIsNotNone(results[0].exception)
+        self.assertEqual(1, batch.stats.apiCalls)
+        self.assertEqual(1, batch.stats.throttled)
+        self.assertEqual(1, batch.stats.failed)
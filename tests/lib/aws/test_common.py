@@ -0,0 +1,78 @@
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+from unittest import TestCase
+
+from lib.aws import common
+from lib.config import AWSProfile
+
+
+class ClientPoolTestCase(TestCase):
+    profile: AWSProfile
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.profile = AWSProfile(label='clientPool', region='eu-west-1',
+                                  accessKey='accessKey', secretAccessKey='secretAccessKey')
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        common.invalidateClients(self.profile.label)
+
+    def test_client_is_reused(self):
+        client = common.getClient('glue', self.profile)
+
+        self.assertIs(client, common.getClient('glue', self.profile))
+
+    def test_clients_by_service_and_region(self):
+        client = common.getClient('glue', self.profile)
+
+        self.assertIsNot(client, common.getClient('logs', self.profile))
+        otherRegion = common.getClient('glue', self.profile, region='us-east-1')
+        self.assertIsNot(client, otherRegion)
+        self.assertEqual('us-east-1', otherRegion.meta.region_name)
+
+    def test_credentials_change_creates_new_client(self):
+        client = common.getClient('glue', self.profile)
+        self.profile.secretAccessKey = 'anotherSecretAccessKey'
+
+        self.assertIsNot(client, common.getClient('glue', self.profile))
+
+    def test_invalidateClients(self):
+        client = common.getClient('glue', self.profile)
+        common.invalidateClients(self.profile.label)
+
+        self.assertIsNot(client, common.getClient('glue', self.profile))
+
+
+@dataclass
+class Nested:
+    value: int
+
+
+@dataclass
+class Parent:
+    name: str
+    nested: Optional[Nested] = field(default=None)
+    tags: dict = field(default_factory=lambda: {})
+
+    __post_init__ = common.dataclassPostInitializer([('nested', Nested)])
+
+
+SlottedParent = common.withSlots(Parent)
+
+
+class HydrationTestCase(TestCase):
+    def test_compileConstructor_ignores_unknown_keys(self):
+        constructor = common.compileConstructor(Parent)
+
+        self.assertIs(constructor, common.compileConstructor(Parent))
+        self.assertEqual(Parent(name='a', nested=Nested(value=1)),
+                         constructor({'name': 'a', 'nested': {'value': 1, 'unknown': 2}, 'unknown': 3}))
+
+    def test_withSlots(self):
+        parent = SlottedParent(name='a', nested={'value': 1})
+
+        self.assertFalse(hasattr(parent, '__dict__'))
+        self.assertEqual(Nested(value=1), parent.nested)
+        self.assertEqual({}, parent.tags)
+        self.assertEqual({'name': 'a', 'nested': {'value': 1}, 'tags': {}}, asdict(parent))
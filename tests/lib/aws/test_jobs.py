@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+from unittest import TestCase
+
+from botocore.stub import Stubber
+
+from lib import aws
+from lib.aws.common import getClient
+from lib.config import AWSProfile
+from tests.lib.aws.fixtures import makeRawRun
+
+
+class JobsTestCase(TestCase):
+    profile: AWSProfile
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.profile = AWSProfile(label='jobs', region='eu-west-1',
+                                  accessKey='accessKey', secretAccessKey='secretAccessKey')
+
+    def test_iterJobRuns_yields_pages(self):
+        startedOn = datetime(2021, 6, 1, 10, 0, tzinfo=timezone.utc)
+        client = getClient('glue', self.profile)
+
+        with Stubber(client) as stubber:
+            stubber.add_response('get_job_runs', {
+                'JobRuns': [makeRawRun('jr_2', 'RUNNING', startedOn)], 'NextToken': 'next',
+            }, {'JobName': 'job'})
+            stubber.add_response('get_job_runs', {
+                'JobRuns': [makeRawRun('jr_1', 'SUCCEEDED', startedOn)],
+            }, {'JobName': 'job', 'NextToken': 'next'})
+
+            pages = list(aws.iterJobRuns(self.profile, 'job'))
+
+        self.assertEqual([['jr_2'], ['jr_1']], [[run.Id for run in page] for page in pages])
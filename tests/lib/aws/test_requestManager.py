@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+from typing import List
+from unittest import TestCase
+
+from benchmarks.fakeGlue import FakeGlueBackend, fakeProfile
+from benchmarks.syntheticAccount import SyntheticAccount
+from lib import aws
+from lib.aws.common import QAWSPagedRunnable, QAWSRunnable
+
+
+class ThreadPool:
+    '''Collects the started runnables, to run them synchronously'''
+    started: List[QAWSRunnable]
+
+    def __init__(self) -> None:
+        self.started = []
+
+    def start(self, runnable: QAWSRunnable) -> None:
+        self.started.append(runnable)
+
+
+class RequestManagerTestCase(TestCase):
+    threadPool: ThreadPool
+    requests: aws.RequestManager
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.threadPool = ThreadPool()
+        self.requests = aws.RequestManager(self.threadPool)
+
+    def test_identical_requests_are_coalesced(self):
+        first = aws.getRunnable(lambda: 'first')
+        second = aws.getRunnable(lambda: 'second')
+
+        self.assertTrue(self.requests.submit('key', first))
+        self.assertFalse(self.requests.submit('key', second))
+        self.assertTrue(self.requests.submit('otherKey', second))
+        self.assertEqual([first, second], self.threadPool.started)
+
+    def test_finished_request_is_not_in_flight(self):
+        runnable = aws.getRunnable(lambda: 'result')
+        self.requests.submit('key', runnable)
+        self.assertTrue(self.requests.isInFlight('key'))
+
+        runnable.run()
+
+        self.assertFalse(self.requests.isInFlight('key'))
+
+    def test_new_generation_drops_results(self):
+        results = []
+        runnable = aws.getRunnable(lambda: 'result')
+        runnable.signals.success.connect(
+            self.requests.live(runnable, results.append))
+        self.requests.submit('key', runnable)
+
+        self.assertEqual(1, self.requests.newGeneration())
+        runnable.run()
+
+        self.assertEqual([], results)
+        self.assertFalse(self.requests.isInFlight('key'))
+
+    def test_live_slot_drops_queued_results(self):
+        results = []
+        runnable = aws.getRunnable(lambda: 'result')
+        slot = self.requests.live(runnable, results.append)
+
+        slot('before')
+        runnable.cancel()
+        slot('after')
+
+        self.assertEqual(['before'], results)
+
+    def test_paged_runnable_stops_between_pages(self):
+        requestedPages = []
+        pages = []
+
+        def iterPages():
+            for i in range(5):
+                requestedPages.append(i)
+                yield [i]
+
+        runnable: QAWSPagedRunnable = aws.getPagedRunnable(iterPages)
+        runnable.signals.page.connect(pages.append)
+        runnable.signals.page.connect(lambda page: page == [1] and runnable.cancel())
+        runnable.signals.success.connect(pages.append)
+        runnable.run()
+
+        self.assertEqual([[0], [1]], pages)
+        self.assertEqual([0, 1], requestedPages)
+
+
+class BatchCancellationTestCase(TestCase):
+    def test_cancelled_batch_stops_before_next_call(self):
+        account = SyntheticAccount(numJobs=4, numRuns=2000, now=datetime(2021, 6, 1, tzinfo=timezone.utc))
+        backend = FakeGlueBackend(account, latency=0.005, pageSize=10)
+        profile = fakeProfile(label='batchCancellation')
+
+        with backend.installed(profile):
+            batch = aws.getJobRunsBatch(
+                profile, account.jobNames, maxConcurrency=1, ratePerSecond=1000.0)
+            runnable = aws.getBatchRunnable(batch)
+            results = []
+            runnable.signals.success.connect(results.append)
+            runnable.signals.success.connect(lambda _: runnable.cancel())
+            runnable.signals.finished.connect(results.append)
+            runnable.run()
+
+        self.assertEqual(1, len(results))
+        self.assertEqual(account.jobRunCount(0), len(results[0]))
+        # only the runs of the first job (one call per page), plus the call aborted by the cancellation
+        self.assertLessEqual(sum(backend.calls.values()), len(results[0]) // 10 + 2)
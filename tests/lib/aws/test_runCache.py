@@ -0,0 +1,87 @@
+import tempfile
+from datetime import datetime, timedelta, timezone
+from shutil import rmtree
+from unittest import TestCase
+
+from botocore.stub import Stubber
+
+from lib import aws
+from lib.aws.common import getClient
+from lib.config import AWSProfile
+from tests.lib.aws.fixtures import makeRawRun
+
+
+class RunCacheTestCase(TestCase):
+    rootDir: str
+    profile: AWSProfile
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.rootDir = tempfile.mkdtemp()
+        self.profile = AWSProfile(label='test', region='eu-west-1',
+                                  accessKey='runCacheAccessKey', secretAccessKey='secret')
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        rmtree(self.rootDir)
+
+    def getCache(self) -> aws.RunCache:
+        return aws.RunCache(self.rootDir, self.profile, 'jobRuns', aws.JobRun, 'Id')
+
+    def test_merge_persists_runs(self):
+        startedOn = datetime(2021, 6, 1, 10, 0, tzinfo=timezone.utc)
+        run = aws.JobRun(**makeRawRun('jr_1', 'SUCCEEDED', startedOn))
+
+        self.getCache().merge('job', [run])
+        runs = self.getCache().runs('job')
+
+        self.assertEqual({'jr_1': run}, runs)
+        self.assertEqual(startedOn, runs['jr_1'].StartedOn)
+
+    def test_syncJobRuns_stops_at_known_final_run(self):
+        now = datetime(2021, 6, 1, 10, 0, tzinfo=timezone.utc)
+        cache = self.getCache()
+        cache.merge('job', [
+            aws.JobRun(**makeRawRun('jr_old_running', 'RUNNING', now - timedelta(hours=3))),
+            aws.JobRun(**makeRawRun('jr_known', 'SUCCEEDED', now - timedelta(hours=1))),
+        ])
+
+        client = getClient('glue', self.profile)
+        with Stubber(client) as stubber:
+            stubber.add_response('get_job_runs', {'JobRuns': [
+                makeRawRun('jr_new', 'RUNNING', now),
+                makeRawRun('jr_known', 'SUCCEEDED', now - timedelta(hours=1)),
+            ], 'NextToken': 'next'}, {'JobName': 'job'})
+            stubber.add_response('get_job_run', {
+                'JobRun': makeRawRun('jr_old_running', 'FAILED', now - timedelta(hours=3)),
+            }, {'JobName': 'job', 'RunId': 'jr_old_running'})
+
+            runs = aws.syncJobRuns(self.profile, 'job', cache)
+
+            stubber.assert_no_pending_responses()
+
+        self.assertEqual(['jr_new', 'jr_known', 'jr_old_running'], [run.Id for run in runs])
+        self.assertEqual('FAILED', self.getCache().runs('job')['jr_old_running'].JobRunState)
+
+    def test_syncJobRuns_drops_purged_active_run(self):
+        now = datetime(2021, 6, 1, 10, 0, tzinfo=timezone.utc)
+        cache = self.getCache()
+        cache.merge('job', [
+            aws.JobRun(**makeRawRun('jr_purged', 'RUNNING', now - timedelta(hours=3))),
+            aws.JobRun(**makeRawRun('jr_known', 'SUCCEEDED', now - timedelta(hours=1))),
+        ])
+
+        client = getClient('glue', self.profile)
+        with Stubber(client) as stubber:
+            stubber.add_response('get_job_runs', {'JobRuns': [
+                makeRawRun('jr_known', 'SUCCEEDED', now - timedelta(hours=1)),
+            ]}, {'JobName': 'job'})
+            stubber.add_client_error('get_job_run', service_error_code='EntityNotFoundException',
+                                     expected_params={'JobName': 'job', 'RunId': 'jr_purged'})
+
+            runs = aws.syncJobRuns(self.profile, 'job', cache)
+
+            stubber.assert_no_pending_responses()
+
+        self.assertEqual(['jr_known'], [run.Id for run in runs])
+        self.assertEqual(['jr_known'], list(self.getCache().runs('job')))
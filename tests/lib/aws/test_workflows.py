@@ -0,0 +1,140 @@
+import tempfile
+from datetime import datetime, timedelta, timezone
+from shutil import rmtree
+from unittest import TestCase
+
+from botocore.stub import Stubber
+
+from lib import aws
+from lib.aws.common import getClient
+from lib.aws.workflows import batchGetWorkflowsMaxNames
+from lib.config import AWSProfile
+
+createdOn = datetime(2021, 6, 1, tzinfo=timezone.utc)
+
+
+def makeRawWorkflowRun(runId: str, status: str, startedOn: datetime) -> dict:
+    return {
+        'Name': 'workflow', 'WorkflowRunId': runId, 'WorkflowRunProperties': {}, 'Status': status,
+        'StartedOn': startedOn, 'Statistics': {
+            'TotalActions': 2, 'TimeoutActions': 0, 'FailedActions': 0,
+            'StoppedActions': 0, 'SucceededActions': 1, 'RunningActions': 1,
+        },
+    }
+
+
+def makeRawWorkflow(name: str, lastModifiedOn: datetime = createdOn, **kwargs) -> dict:
+    return {'Name': name, 'CreatedOn': createdOn, 'LastModifiedOn': lastModifiedOn, 'MaxConcurrentRuns': 1, **kwargs}
+
+
+class WorkflowsTestCase(TestCase):
+    profile: AWSProfile
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.profile = AWSProfile(label='workflows', region='eu-west-1',
+                                  accessKey='accessKey', secretAccessKey='secretAccessKey')
+
+    def test_getWorkflowsList_pages_and_chunks(self):
+        names = [f'workflow_{i}' for i in range(batchGetWorkflowsMaxNames + 5)]
+        client = getClient('glue', self.profile)
+
+        with Stubber(client) as stubber:
+            stubber.add_response('list_workflows', {'Workflows': names[:25], 'NextToken': 'next'},
+                                 {'MaxResults': 25})
+            stubber.add_response('list_workflows', {'Workflows': names[25:]},
+                                 {'MaxResults': 25, 'NextToken': 'next'})
+            for chunk in (names[:batchGetWorkflowsMaxNames], names[batchGetWorkflowsMaxNames:]):
+                stubber.add_response('batch_get_workflows', {
+                    'Workflows': [makeRawWorkflow(name) for name in chunk],
+                }, {'Names': chunk, 'IncludeGraph': False})
+
+            names = aws.getWorkflowNames(self.profile)
+            workflows = aws.getWorkflows(self.profile, names, maxConcurrency=1)
+
+            stubber.assert_no_pending_responses()
+
+        self.assertEqual(names, [flow.Name for flow in workflows])
+
+    def test_getWorkflowGraph_is_cached_until_modified(self):
+        workflow = aws.Workflow(**makeRawWorkflow('graph'))
+        graph = {
+            'Nodes': [{'Type': 'JOB', 'Name': 'job', 'UniqueId': 'n1'},
+                      {'Type': 'TRIGGER', 'Name': 'trigger', 'UniqueId': 'n2'}],
+            'Edges': [{'SourceId': 'n2', 'DestinationId': 'n1'}],
+        }
+        client = getClient('glue', self.profile)
+
+        with Stubber(client) as stubber:
+            stubber.add_response('get_workflow', {'Workflow': makeRawWorkflow('graph', Graph=graph)},
+                                 {'Name': 'graph', 'IncludeGraph': True})
+
+            first = aws.getWorkflowGraph(self.profile, workflow)
+            second = aws.getWorkflowGraph(self.profile, workflow)
+
+            stubber.assert_no_pending_responses()
+
+        self.assertIs(first, second)
+        self.assertEqual(['n2'], first.predecessors('n1'))
+
+        workflow.LastModifiedOn = datetime(2021, 6, 2, tzinfo=timezone.utc)
+        with Stubber(client) as stubber:
+            stubber.add_response('get_workflow', {'Workflow': makeRawWorkflow('graph', Graph=graph)},
+                                 {'Name': 'graph', 'IncludeGraph': True})
+            aws.getWorkflowGraph(self.profile, workflow)
+
+            stubber.assert_no_pending_responses()
+
+    def test_syncWorkflowRuns_stops_at_known_final_run(self):
+        now = datetime(2021, 6, 1, 10, 0, tzinfo=timezone.utc)
+        rootDir = tempfile.mkdtemp()
+        self.addCleanup(rmtree, rootDir)
+        cache = aws.RunCache(rootDir, self.profile, 'workflowRuns', aws.WorkflowRun, 'WorkflowRunId')
+        cache.merge('workflow', [
+            aws.WorkflowRun(**makeRawWorkflowRun('wr_running', 'RUNNING', now - timedelta(days=1))),
+            aws.WorkflowRun(**makeRawWorkflowRun('wr_known', 'COMPLETED', now - timedelta(hours=12))),
+        ])
+        client = getClient('glue', self.profile)
+
+        with Stubber(client) as stubber:
+            stubber.add_response('get_workflow_runs', {'Runs': [
+                makeRawWorkflowRun('wr_new', 'RUNNING', now),
+                makeRawWorkflowRun('wr_known', 'COMPLETED', now - timedelta(hours=12)),
+            ], 'NextToken': 'next'}, {'Name': 'workflow', 'IncludeGraph': False})
+            stubber.add_response('get_workflow_run', {
+                'Run': makeRawWorkflowRun('wr_running', 'COMPLETED', now - timedelta(days=1)),
+            }, {'Name': 'workflow', 'RunId': 'wr_running', 'IncludeGraph': False})
+
+            runs = aws.syncWorkflowRuns(self.profile, 'workflow', cache)
+
+            stubber.assert_no_pending_responses()
+
+        self.assertEqual(['wr_new', 'wr_known', 'wr_running'], [run.WorkflowRunId for run in runs])
+        cached = cache.runs('workflow')
+        self.assertEqual('COMPLETED', cached['wr_running'].Status)
+        self.assertIsInstance(cached['wr_new'].Statistics, aws.WorkflowRunStatistics)
+
+    def test_syncWorkflowRuns_drops_purged_active_run(self):
+        now = datetime(2021, 6, 1, 10, 0, tzinfo=timezone.utc)
+        rootDir = tempfile.mkdtemp()
+        self.addCleanup(rmtree, rootDir)
+        cache = aws.RunCache(rootDir, self.profile, 'workflowRuns', aws.WorkflowRun, 'WorkflowRunId')
+        cache.merge('workflow', [
+            aws.WorkflowRun(**makeRawWorkflowRun('wr_purged', 'RUNNING', now - timedelta(days=1))),
+            aws.WorkflowRun(**makeRawWorkflowRun('wr_known', 'COMPLETED', now - timedelta(hours=12))),
+        ])
+        client = getClient('glue', self.profile)
+
+        with Stubber(client) as stubber:
+            stubber.add_response('get_workflow_runs', {'Runs': [
+                makeRawWorkflowRun('wr_known', 'COMPLETED', now - timedelta(hours=12)),
+            ]}, {'Name': 'workflow', 'IncludeGraph': False})
+            stubber.add_client_error('get_workflow_run', service_error_code='EntityNotFoundException',
+                                     expected_params={'Name': 'workflow', 'RunId': 'wr_purged', 'IncludeGraph': False})
+
+            runs = aws.syncWorkflowRuns(self.profile, 'workflow', cache)
+
+            stubber.assert_no_pending_responses()
+
+        self.assertEqual(['wr_known'], [run.WorkflowRunId for run in runs])
+        self.assertEqual(['wr_known'], list(cache.runs('workflow')))
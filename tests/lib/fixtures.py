@@ -0,0 +1,13 @@
+from datetime import datetime, timedelta
+
+from lib.aws.jobs import JobRun
+
+
+def makeRun(runId: str, jobName: str, startedOn: datetime, state: str = 'SUCCEEDED', **kwargs) -> JobRun:
+    completedOn = kwargs.pop('CompletedOn', startedOn + timedelta(minutes=10))
+
+    return JobRun(
+        Id=runId, Attempt=0, JobName=jobName, StartedOn=startedOn, JobRunState=state,
+        AllocatedCapacity=10, ExecutionTime=600, Timeout=2880, MaxCapacity=10.0,
+        LogGroupName='/aws-glue/jobs', GlueVersion='2.0', CompletedOn=completedOn, **kwargs,
+    )
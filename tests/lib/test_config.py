@@ -50,6 +50,14 @@ class ConfigManagerTestCase(TestCase):
 
         self.assertTrue(self.manager.settings.loadDataOnTabChange)
 
+    def test_load_with_dpuHourPrice(self):
+        self.assertEqual(0.44, self.manager.settings.dpuHourPrice)
+        self.manager.settings.dpuHourPrice = 0.29
+
+        self.saveAndReload()
+
+        self.assertEqual(0.29, self.manager.settings.dpuHourPrice)
+
     def test_load_with_default_profile(self):
         profile = '06e6ac4d-c144-4ba2-8bfa-f1a9c9f7ea0e'
 
@@ -0,0 +1,51 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+import numpy as np
+
+from lib.cost import CostRates, costReport, runBilledSeconds, runDPU
+from lib.jobRunStore import JobRunStore
+from tests.lib.fixtures import makeRun
+
+start = datetime(2021, 6, 1, tzinfo=timezone.utc)
+
+
+class CostTestCase(TestCase):
+    def test_run_dpu_and_billed_seconds(self):
+        store = JobRunStore()
+        store.append([
+            makeRun('workers', 'job', start, WorkerType='G.2X', NumberOfWorkers=5),
+            replace(makeRun('capacity', 'job', start), MaxCapacity=0.0625, ExecutionTime=30),
+            replace(makeRun('legacy', 'job', start), GlueVersion='1.0', ExecutionTime=30),
+            replace(makeRun('running', 'job', start, state='RUNNING', CompletedOn=None), ExecutionTime=0),
+        ])
+        rows = np.arange(4)
+
+        self.assertEqual([10.0, 0.0625, 10.0, 10.0], runDPU(store, rows).tolist())
+        now = (start + timedelta(minutes=2)).timestamp()
+        self.assertEqual([600, 60, 600, 120], runBilledSeconds(store, rows, now).tolist())
+
+    def test_report_by_job_day_and_worker_type(self):
+        store = JobRunStore()
+        store.append([
+            makeRun('a1', 'a', start + timedelta(hours=1)),
+            makeRun('a2', 'a', start + timedelta(days=2, hours=1), WorkerType='G.2X', NumberOfWorkers=10),
+            makeRun('b1', 'b', start + timedelta(days=1)),
+            makeRun('old', 'b', start - timedelta(days=1)),
+        ])
+        rates = CostRates(dpuHour=0.5, byWorkerType={'G.2X': 1.0})
+
+        report = costReport(store, start.timestamp(), (start + timedelta(days=3, hours=-1)).timestamp(), rates)
+
+        self.assertEqual(start.timestamp(), report.start)
+        self.assertEqual(['a', 'b'], report.jobNames)
+        # 10 DPU (20 with the G.2X workers) for 600 s
+        self.assertEqual([[10 / 6, 0, 20 / 6], [0, 10 / 6, 0]], report.dpuHours.tolist())
+        self.assertEqual([10 / 12 + 20 / 6, 10 / 12], report.jobSpend().tolist())
+        self.assertEqual([2, 1], report.runs.tolist())
+        self.assertEqual({'': 20 / 6, 'G.2X': 20 / 6}, report.dpuHoursByWorkerType)
+        self.assertEqual([0, 1], report.topJobs(5).tolist())
+        self.assertEqual([0], report.topJobs(1).tolist())
+        self.assertEqual([(20 / 6 - 10 / 12) / (10 / 12)], report.trends()[:1].tolist())
+        self.assertTrue(np.isnan(report.trends()[1]))
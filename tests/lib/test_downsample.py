@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+import numpy as np
+
+from lib.downsample import minMaxIndexes
+
+
+class DownsampleTestCase(TestCase):
+    def test_small_series_untouched(self):
+        self.assertEqual([0, 1, 2], minMaxIndexes(np.array([3.0, 1.0, 2.0]), 100).tolist())
+
+    def test_min_max_keeps_peaks(self):
+        values = np.sin(np.linspace(0, 20, 43_200))
+        values[12_345] = 10.0
+        values[30_000] = -10.0
+
+        indexes = minMaxIndexes(values, 1000)
+
+        self.assertLessEqual(len(indexes), 1000)
+        self.assertEqual(0, indexes[0])
+        self.assertEqual(len(values) - 1, indexes[-1])
+        self.assertTrue(np.all(np.diff(indexes) > 0))
+        self.assertIn(12_345, indexes)
+        self.assertIn(30_000, indexes)
+        self.assertEqual(values.max(), values[indexes].max())
+        self.assertEqual(values.min(), values[indexes].min())
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from lib.errorIndex import ErrorIndex
+
+
+class ErrorIndexTestCase(TestCase):
+    def test_search(self):
+        index = ErrorIndex()
+        index.set(0, 'An error occurred while calling o95.pyWriteDynamicFrame. Access Denied')
+        index.set(1, 'Command failed with exit code 1')
+        index.set(2, 'Command failed with exit code 1')
+        index.set(3, None)
+        index.set(4, 'Timeout: the job ran out of DPU')
+
+        self.assertEqual(4, len(index))
+        self.assertEqual(3, len(index.messages))
+        self.assertEqual([1, 2], index.search('EXIT code').tolist())
+        self.assertEqual([0], index.search('denied write').tolist())
+        self.assertEqual([4], index.search('dpu').tolist())
+        # terms shorter than a trigram
+        self.assertEqual([1, 2], index.search('1').tolist())
+        self.assertEqual([], index.search('exit 2').tolist())
+        self.assertEqual([], index.search(' ').tolist())
+
+    def test_reindex(self):
+        index = ErrorIndex()
+        index.set(0, 'Command failed with exit code 1')
+        index.set(0, 'Access Denied')
+        index.set(1, 'Access Denied')
+
+        self.assertEqual([], index.search('command').tolist())
+        self.assertEqual([0, 1], index.search('access').tolist())
+
+        index.set(1, '')
+
+        self.assertEqual([0], index.search('access').tolist())
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from lib.jobRunStore import JobRunStore
+from tests.lib.fixtures import makeRun
+
+start = datetime(2021, 6, 1, 10, 0, tzinfo=timezone.utc)
+
+
+class JobRunStoreTestCase(TestCase):
+    def test_append_and_materialize(self):
+        store = JobRunStore()
+        run = makeRun('jr_1', 'job', start, state='FAILED', ErrorMessage='Boom',
+                      WorkerType='G.1X', NumberOfWorkers=10)
+        store.append([run])
+
+        materialized = store.jobRuns('job')[0]
+
+        self.assertEqual(1, len(store))
+        self.assertEqual(run.StartedOn, materialized.StartedOn)
+        self.assertEqual(run.CompletedOn, materialized.CompletedOn)
+        for field in ('Id', 'JobName', 'JobRunState', 'ErrorMessage', 'WorkerType', 'NumberOfWorkers',
+                      'AllocatedCapacity', 'MaxCapacity', 'ExecutionTime', 'GlueVersion'):
+            self.assertEqual(getattr(run, field), getattr(materialized, field))
+
+    def test_append_updates_known_runs(self):
+        store = JobRunStore()
+        store.append([makeRun('jr_1', 'job', start, state='RUNNING', CompletedOn=None)])
+        store.append([makeRun('jr_1', 'job', start, state='SUCCEEDED')])
+
+        self.assertEqual(1, len(store))
+        self.assertEqual('SUCCEEDED', store.latestJobRun('job').JobRunState)
+        self.assertIsNotNone(store.latestJobRun('job').CompletedOn)
+
+    def test_jobRuns_newest_first(self):
+        store = JobRunStore()
+        store.append([makeRun(f'jr_{i}', 'job', start + timedelta(hours=i)) for i in (1, 3, 2)])
+        store.append([makeRun('other', 'otherJob', start)])
+
+        self.assertEqual(['jr_3', 'jr_2'], [run.Id for run in store.jobRuns('job', limit=2)])
+        self.assertEqual('jr_3', store.latestJobRun('job').Id)
+        self.assertIsNone(store.latestJobRun('unknown'))
+
+    def test_latest_run_tracked_across_batches(self):
+        store = JobRunStore()
+        store.append([makeRun(f'jr_{i}', 'job', start + timedelta(hours=i)) for i in range(50)])
+        store.append([makeRun('older', 'job', start - timedelta(hours=1))])
+        self.assertEqual('jr_49', store.latestJobRun('job').Id)
+
+        store.append([makeRun('newer', 'job', start + timedelta(days=7))])
+
+        self.assertEqual('newer', store.latestJobRun('job').Id)
+        self.assertEqual(['newer', 'jr_49', 'jr_48'], [run.Id for run in store.jobRuns('job', limit=3)])
+
+    def test_runsInRange(self):
+        store = JobRunStore()
+        store.append([
+            makeRun('before', 'job', start - timedelta(hours=2)),
+            makeRun('overlapping', 'job', start - timedelta(minutes=5)),
+            makeRun('running', 'job', start - timedelta(hours=5), state='RUNNING', CompletedOn=None),
+            makeRun('after', 'job', start + timedelta(hours=2)),
+        ])
+
+        ids = {run.Id for run in store.runsInRange(start, start + timedelta(hours=1))}
+
+        self.assertEqual({'overlapping', 'running'}, ids)
+
+    def test_grows_over_initial_capacity(self):
+        store = JobRunStore()
+        for batch in range(3):
+            store.append([makeRun(f'jr_{batch}_{i}', f'job_{i % 7}', start + timedelta(minutes=i))
+                          for i in range(1000)])
+
+        self.assertEqual(3000, len(store))
+        self.assertEqual(3000, len(store.column('startedOn')))
+        self.assertEqual('jr_2_999', store.ids[-1])
+
+    def test_recent_runs_and_state_counts(self):
+        store = JobRunStore(recentRuns=3)
+        store.append([makeRun(f'jr_{i}', 'job', start + timedelta(hours=i),
+                              state='FAILED' if i % 4 == 0 else 'SUCCEEDED')
+                      for i in (5, 1, 8, 3, 2)])
+        store.append([makeRun('older', 'job', start - timedelta(hours=1)),
+                      makeRun('newer', 'job', start + timedelta(days=1), state='RUNNING', CompletedOn=None)])
+
+        self.assertEqual(['newer', 'jr_8', 'jr_5'], [run.Id for run in store.recentJobRuns('job')])
+        self.assertEqual({'SUCCEEDED': 5, 'FAILED': 1, 'RUNNING': 1}, store.jobStateCounts('job'))
+
+        store.append([makeRun('newer', 'job', start + timedelta(days=1), state='FAILED')])
+
+        self.assertEqual('FAILED', store.recentJobRuns('job')[0].JobRunState)
+        self.assertEqual({'SUCCEEDED': 5, 'FAILED': 2}, store.jobStateCounts('job'))
+        self.assertEqual([], store.recentJobRuns('unknown'))
+        self.assertEqual({}, store.jobStateCounts('unknown'))
+
+    def test_error_search(self):
+        store = JobRunStore()
+        store.append([makeRun(f'jr_{i}', f'job_{i % 3}', start + timedelta(minutes=i), state='FAILED',
+                              ErrorMessage='Command failed with exit code 1' if i % 2 == 0 else 'Access Denied')
+                      for i in range(12)])
+        store.append([makeRun('jr_0', 'job_0', start, state='SUCCEEDED')])
+
+        rows = store.errorRows('exit code')
+
+        self.assertEqual(['jr_2', 'jr_4', 'jr_6', 'jr_8', 'jr_10'], [store.ids[row] for row in rows])
+        self.assertEqual({'job_0': 1, 'job_1': 2, 'job_2': 2}, store.countByJob(rows))
+
+    def test_activeJobRuns(self):
+        store = JobRunStore()
+        self.assertEqual({}, store.activeJobRuns())
+
+        store.append([makeRun('jr_1', 'job', start, state='RUNNING', CompletedOn=None),
+                      makeRun('jr_2', 'job', start, state='SUCCEEDED'),
+                      makeRun('jr_3', 'other', start, state='STARTING', CompletedOn=None),
+                      makeRun('jr_4', 'job', start, state='STOPPING', CompletedOn=None)])
+        store.append([makeRun('jr_3', 'other', start, state='FAILED')])
+
+        self.assertEqual({'job': ['jr_1', 'jr_4']}, store.activeJobRuns())
@@ -19,3 +19,20 @@ class ListUtilsTestCase(TestCase):
         myList = [1, 2, 3, 4]
         self.assertFalse(listUtils.popFlag(myList, 5, 6, 7))
         self.assertEqual(myList, [1, 2, 3, 4])
+
+    def test_contiguousRanges(self):
+        self.assertEqual([(0, 2), (5, 5), (7, 8)], list(listUtils.contiguousRanges([0, 1, 2, 5, 7, 8])))
+        self.assertEqual([], list(listUtils.contiguousRanges([])))
+
+    def test_diffSequences(self):
+        self.assertTrue(listUtils.diffSequences(['a', 'b'], ['a', 'b']).isEmpty())
+
+        diff = listUtils.diffSequences(['a', 'b', 'c', 'd', 'e'], ['a', 'x', 'y', 'd', 'z'])
+        self.assertEqual([(1, 2), (4, 4)], diff.removed)
+        self.assertFalse(diff.moved)
+        self.assertEqual([(1, 2), (4, 4)], diff.inserted)
+
+        diff = listUtils.diffSequences(['a', 'b', 'c'], ['c', 'a', 'd'])
+        self.assertEqual([(1, 1)], diff.removed)
+        self.assertTrue(diff.moved)
+        self.assertEqual([(2, 2)], diff.inserted)
@@ -0,0 +1,95 @@
+import threading
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+import tzlocal
+
+from lib.query import And, Comparison, FreeText, Not, Or, QueryError, QueryField, QuerySchema, filterRows, parseQuery
+
+now = datetime.now(tz=tzlocal.get_localzone())
+
+schema = QuerySchema([
+    QueryField('Name', 'text', lambda obj: obj.get('name'), freeText=True),
+    QueryField('Error message', 'text', lambda obj: obj.get('error'), freeText=True, aliases=('Error',)),
+    QueryField('Worker type', 'text', lambda obj: obj.get('workerType')),
+    QueryField('DPU', 'number', lambda obj: obj.get('dpu')),
+    QueryField('Duration', 'duration', lambda obj: obj.get('duration')),
+    QueryField('Started', 'date', lambda obj: obj.get('started')),
+])
+
+rows = [
+    {'name': 'ingest_orders', 'error': '', 'workerType': 'G.1X', 'dpu': 10.0, 'duration': 600,
+     'started': now - timedelta(hours=1)},
+    {'name': 'ingest_users', 'error': 'Command failed with exit code 1', 'workerType': 'G.2X', 'dpu': 40.0,
+     'duration': 7200, 'started': now - timedelta(days=3)},
+    {'name': 'export', 'error': None, 'workerType': 'Standard', 'dpu': None, 'duration': None, 'started': None},
+]
+
+
+def matching(query: str):
+    predicate = schema.compile(query)
+
+    return [row['name'] for row in rows if predicate(row)]
+
+
+class QueryTestCase(TestCase):
+    def test_parse(self):
+        self.assertIsNone(parseQuery(' ; '))
+        self.assertEqual(
+            And([Comparison('Error message', ':', 'exit code'),
+                 Or([FreeText('orders'), Not(Comparison('DPU', '>', '10'))])]),
+            parseQuery('Error message: exit code; orders OR NOT DPU > 10'))
+        self.assertEqual(Comparison('Duration', '<=', '01:30:00'), parseQuery('Duration<=01:30:00'))
+        self.assertEqual(Comparison('Name', '~', r'^ingest_(orders|users)$'),
+                         parseQuery(r'Name ~ "^ingest_(orders|users)$"'))
+
+    def test_text(self):
+        self.assertEqual(['ingest_orders', 'ingest_users'], matching('ingest'))
+        self.assertEqual(['ingest_users'], matching('Error: EXIT CODE'))
+        self.assertEqual(['export'], matching('worker type = standard'))
+        self.assertEqual(['ingest_orders', 'ingest_users'], matching('workerType != Standard'))
+        self.assertEqual(['ingest_orders', 'export'], matching(r'Name ~ "^(export|\w+_orders)$"'))
+
+    def test_numbers_and_durations(self):
+        self.assertEqual(['ingest_users'], matching('DPU > 10'))
+        self.assertEqual(['ingest_orders'], matching('DPU = 10'))
+        self.assertEqual(['ingest_users', 'export'], matching('DPU != 10'))
+        self.assertEqual(['ingest_users'], matching('Duration >= 1h'))
+        self.assertEqual(['ingest_orders'], matching('Duration < 00:30:00'))
+
+    def test_dates(self):
+        self.assertEqual(['ingest_orders'], matching('Started > 1d'))
+        self.assertEqual(['ingest_users'], matching('Started < 2d'))
+        self.assertEqual(['ingest_orders'], matching(f'Started = {now.strftime("%Y-%m-%d")} OR Started > 2h'))
+
+    def test_boolean_operators(self):
+        self.assertEqual(['ingest_orders', 'export'], matching('orders OR export'))
+        self.assertEqual(['export'], matching('NOT ingest'))
+        self.assertEqual(['ingest_users'], matching('ingest AND NOT (orders OR DPU < 5)'))
+        self.assertEqual([], matching('ingest; export'))
+
+    def test_errors(self):
+        for query in ('Unknown: x', 'DPU > many', 'Duration > 1x', 'Name ~ "("', 'DPU ~ 1',
+                      'Name >', '(ingest', 'ingest)', 'Name > a', 'Started > yesterday'):
+            with self.assertRaises(QueryError, msg=query):
+                schema.compile(query)
+
+    def test_compiled_once(self):
+        self.assertIs(schema.compile('ingest OR DPU > 1'), schema.compile('ingest OR DPU > 1'))
+
+
+class FilterRowsTestCase(TestCase):
+    def test_filter_and_sort(self):
+        values = [5, 3, 8, 1, 9, 2]
+
+        self.assertEqual([0, 2, 4], filterRows(values, lambda value: value > 4))
+        self.assertEqual([4, 2, 0], filterRows(values, lambda value: value > 4,
+                                               sortKey=lambda value: value, reverse=True))
+        # stable
+        self.assertEqual([1, 3, 5, 0, 2, 4], filterRows(values, lambda _: True, sortKey=lambda value: value > 4))
+
+    def test_cancelled(self):
+        cancelled = threading.Event()
+        cancelled.set()
+
+        self.assertIsNone(filterRows(list(range(10)), lambda _: True, cancelled=cancelled))
@@ -12,3 +12,14 @@ class TimeUtilTestCase(TestCase):
         self.assertEqual('01:01:11', timeUtils.fromTimeToString(0, 0, 3671))
         self.assertEqual('01:00:15', timeUtils.fromTimeToString(0, 60, 15))
         self.assertEqual('01:23:57', timeUtils.fromTimeToString(1, 23, 57))
+
+    def test_parseDuration(self):
+        self.assertEqual(3600, timeUtils.parseDuration('01:00:00'))
+        self.assertEqual(90, timeUtils.parseDuration('01:30'))
+        self.assertEqual(90, timeUtils.parseDuration('90'))
+        self.assertEqual(5400, timeUtils.parseDuration('1h30m'))
+        self.assertEqual(2 * 86400 + 15, timeUtils.parseDuration('2d15s'))
+
+        for invalid in ('', '1x', 'h', '1h30', '1:2:3:4'):
+            with self.assertRaises(ValueError):
+                timeUtils.parseDuration(invalid)
@@ -0,0 +1,97 @@
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+import numpy as np
+
+from lib.jobRunStore import JobRunStore
+from lib.usage import UsageRollups, bucketCount, usageSeries
+from tests.lib.fixtures import makeRun
+
+start = datetime(2021, 6, 1, 10, 0, tzinfo=timezone.utc)
+
+
+class UsageTestCase(TestCase):
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        fromTimestamp, toTimestamp, interval = 1000.0, 5000.0, 60.0
+        startedOn = rng.uniform(0, 6000, 500)
+        completedOn = startedOn + rng.uniform(0, 900, 500)
+        completedOn[::17] = np.nan
+        capacity = rng.integers(2, 100, 500).astype(np.float32)
+        now = 5500.0
+
+        usage = usageSeries(startedOn, completedOn, capacity, fromTimestamp, toTimestamp, interval, now=now)
+
+        ends = np.where(np.isnan(completedOn), now, completedOn)
+        self.assertEqual(bucketCount(fromTimestamp, toTimestamp, interval), len(usage))
+        for i, bucketStart in enumerate(usage.timestamps()):
+            active = (startedOn <= bucketStart + interval) & (ends >= bucketStart)
+            self.assertEqual(int(active.sum()), usage.runs[i])
+            self.assertAlmostEqual(float(capacity[active].sum()), usage.dpu[i], places=3)
+            seconds = np.clip(np.minimum(ends, bucketStart + interval) - np.maximum(startedOn, bucketStart), 0, None)
+            self.assertAlmostEqual(float((capacity * seconds).sum()), usage.dpuSeconds[i], places=1)
+
+
+class UsageRollupsTestCase(TestCase):
+    def test_store_usage(self):
+        store = JobRunStore()
+        rollups = UsageRollups()
+        rollups.update(store, store.append([
+            makeRun('before', 'job', start - timedelta(hours=2)),
+            makeRun('overlapping', 'job', start - timedelta(minutes=5)),
+            replace(makeRun('inside', 'other', start + timedelta(minutes=30)), AllocatedCapacity=5),
+        ]))
+
+        usage = rollups.series(store, start.timestamp(), (start + timedelta(minutes=59)).timestamp(), 60)
+
+        self.assertEqual(60.0, usage.interval)
+        self.assertEqual(start.timestamp(), usage.start)
+        self.assertEqual(60, len(usage))
+        # buckets include both their ends: the run started at 10:30 is in the minutes 29 to 40
+        self.assertEqual([1] * 6 + [0] * 23 + [1] * 12 + [0] * 19, usage.runs.tolist())
+        self.assertEqual(10.0, usage.dpu[0])
+        self.assertEqual(5.0, usage.dpu[30])
+        self.assertAlmostEqual((10 * 5 + 5 * 10) * 60, usage.dpuSeconds.sum())
+
+        # coarser rollups when the range doesn't fit
+        usage = rollups.series(store, start.timestamp(), (start + timedelta(minutes=59)).timestamp(), 10)
+        self.assertEqual(3600.0, usage.interval)
+        self.assertEqual([2], usage.runs.tolist())
+        self.assertAlmostEqual((10 * 5 + 5 * 10) * 60, usage.dpuSeconds[0])
+
+    def test_incremental_matches_sweep(self):
+        rng = np.random.default_rng(11)
+        now = datetime(2021, 7, 1, tzinfo=timezone.utc)
+        runs = []
+        for i in range(300):
+            startedOn = start + timedelta(seconds=float(rng.uniform(0, 20 * 24 * 3600)))
+            completedOn = startedOn + timedelta(seconds=float(rng.uniform(0, 3 * 3600)))
+            runs.append(replace(makeRun(f'jr_{i}', f'job_{i % 7}', startedOn, CompletedOn=completedOn),
+                                AllocatedCapacity=int(rng.integers(2, 50))))
+        # the first batches' runs are still running, then completed (or pruned, longer) by the later ones
+        running = [replace(run, JobRunState='RUNNING', CompletedOn=None) for run in runs[:50]]
+        longer = [replace(run, CompletedOn=run.CompletedOn + timedelta(hours=1)) for run in runs[50:80]]
+
+        store = JobRunStore()
+        rollups = UsageRollups()
+        for batch in (running, runs[50:200], runs[:50], longer, runs[200:]):
+            rollups.update(store, store.append(batch))
+
+        fromTimestamp = (start - timedelta(days=1)).timestamp()
+        for toTimestamp, maxBuckets in ((fromTimestamp + 3 * 3600, 1000), (fromTimestamp + 30 * 24 * 3600, 1000)):
+            usage = rollups.series(store, fromTimestamp, toTimestamp, maxBuckets, now=now.timestamp())
+            expected = usageSeries(
+                store.column('startedOn'), store.column('completedOn'), store.column('allocatedCapacity'),
+                usage.start, usage.start + (len(usage) - 1) * usage.interval, usage.interval, now=now.timestamp(),
+            )
+
+            self.assertEqual(expected.runs.tolist(), usage.runs.tolist())
+            np.testing.assert_allclose(expected.dpu, usage.dpu, atol=1e-6)
+            np.testing.assert_allclose(expected.dpuSeconds, usage.dpuSeconds, atol=1e-3)
+
+        # the active runs are added until now
+        rollups.update(store, store.append([replace(runs[0], JobRunState='RUNNING', CompletedOn=None)]))
+        usage = rollups.series(store, fromTimestamp, fromTimestamp + 30 * 24 * 3600, 100, now=now.timestamp())
+        self.assertEqual(86400.0, usage.interval)
+        self.assertEqual(1, usage.runs[-1])
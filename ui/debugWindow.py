@@ -1,28 +1,108 @@
+import collections
 import logging
+from logging.handlers import RotatingFileHandler
+from typing import Deque, Optional
 
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QDialog, QPlainTextEdit, QVBoxLayout
 
 
 class QTextEditLogger(logging.Handler):
-    def __init__(self, *args, **kwargs):
+    '''Logs to a read only text widget, from any thread.
+        Records are only queued when logged: the GUI thread formats and appends them
+        in batches of at most flushBatch records every flushInterval ms (see flushQueue), keeping the last maxLines lines.
+        If more than maxQueued records are logged between two flushes, the oldest ones are dropped.
+        The flushed records are also written to fileHandler, if any.
+    '''
+    maxLines: int
+    flushBatch: int
+    widget: QPlainTextEdit
+    fileHandler: Optional[logging.Handler]
+    # Approximate amount of records dropped since the last flush
+    dropped: int
+
+    _queue: Deque[logging.LogRecord]
+    _timer: QTimer
+
+    def __init__(
+        self, *args, maxLines: int = 10_000, maxQueued: int = 100_000,
+        flushInterval: int = 200, flushBatch: int = 1000,
+        fileHandler: Optional[logging.Handler] = None, **kwargs,
+    ):
         super().__init__(*args, **kwargs)
+        self.maxLines = maxLines
+        self.flushBatch = flushBatch
         self.widget = QPlainTextEdit()
         self.widget.setReadOnly(True)
+        self.widget.setMaximumBlockCount(maxLines)
+        self.fileHandler = fileHandler
+        self.dropped = 0
+
+        # deque's append and popleft are atomic: the GUI thread flushes without taking the handler's lock
+        self._queue = collections.deque(maxlen=maxQueued)
+        self._timer = QTimer()
+        self._timer.setInterval(flushInterval)
+        self._timer.timeout.connect(self.flushQueue)
+        self._timer.start()
 
     def emit(self, record):
-        msg = self.format(record)
-        self.widget.appendPlainText(msg)
+        # the arguments may change before the record is formatted
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+        except Exception:
+            self.handleError(record)
+
+            return
+
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(record)
+
+    def flushQueue(self):
+        '''Formats and appends the queued records (GUI thread only)'''
+        lines = []
+        while len(self._queue) > 0 and len(lines) < self.flushBatch:
+            record = self._queue.popleft()
+            lines.append(self.format(record))
+            if self.fileHandler is not None:
+                self.fileHandler.handle(record)
+
+        if len(lines) == 0:
+            return
+
+        if self.dropped > 0:
+            lines.insert(0, f'... {self.dropped} log records dropped ...')
+            self.dropped = 0
+        # the widget keeps only the last maxLines lines
+        self.widget.appendPlainText('\n'.join(lines[-self.maxLines:]))
+
+    def close(self):
+        # called at exit too, when the widget and the timer may be already gone:
+        # the records still queued are only written to the file
+        if self.fileHandler is not None:
+            while len(self._queue) > 0:
+                self.fileHandler.handle(self._queue.popleft())
+            self.fileHandler.close()
+        super().close()
 
 
 class QDebugWindow(QDialog, QPlainTextEdit):
-    def __init__(self, parent=None, loggingLevel: int = logging.DEBUG):
+    def __init__(self, parent=None, loggingLevel: int = logging.DEBUG, logFile: Optional[str] = None):
+        '''logFile: also write the log to this file, rotated every 5 MB (3 backups)'''
         super().__init__(parent)
 
         self.setWindowTitle('Debug log')
         self.setMinimumSize(800, 400)
-        logTextBox = QTextEditLogger(level=loggingLevel)
-        logTextBox.setFormatter(logging.Formatter(
-            '%(asctime)s - %(levelname)s - %(message)s'))
+        formatter = logging.Formatter(
+            '%(asctime)s - %(levelname)s - %(message)s')
+        fileHandler = None
+        if logFile is not None:
+            fileHandler = RotatingFileHandler(
+                logFile, maxBytes=5 * 1024 * 1024, backupCount=3, encoding='utf-8')
+            fileHandler.setFormatter(formatter)
+        logTextBox = QTextEditLogger(level=loggingLevel, fileHandler=fileHandler)
+        logTextBox.setFormatter(formatter)
         logging.getLogger().addHandler(logTextBox)
         # You can control the logging level
         logging.getLogger().setLevel(loggingLevel)
@@ -1,24 +1,150 @@
-from typing import List
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
 from ui.termDescription import QTermDescription
-from PyQt5.QtCore import QSize, Qt
-from PyQt5.QtGui import QStandardItemModel
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QSize, Qt, pyqtSignal
 from PyQt5.QtWidgets import QTableView, QVBoxLayout, QWidget
 
 from lib import aws, timeUtils
-from ui.tabs.common import QReadOnlyItem, decorateTable
+from lib.jobRunStore import JobRunStore
+from ui.tabs.common import decorateTable
+
+jobRunColumns = [
+    ('Id', 150), ('State', 120), ('Error', 220),
+    ('Glue v.', 50), ('Max Capacity', 105), ('Start time', 147), ('End time', 147), ('Duration', 70), ('Timeout', 70)
+]
+
+
+class QJobRunsTableModel(QAbstractTableModel):
+    '''Job runs table model, loading the runs a page at a time as the view scrolls down (see fetchMore).
+        The pages come from the job runs store when it has the job's runs (see setStoreRows),
+        otherwise they are downloaded: pageRequested is emitted with the next page's token (None for the first one)
+        and the page is delivered via appendPage.
+    '''
+    pageRequested = pyqtSignal(object)
+
+    pageSize = 100
+
+    runs: List[aws.JobRun]
+
+    _store: Optional[JobRunStore]
+    _storeRows: Optional[np.ndarray]
+    _nextToken: Optional[str]
+    _hasMore: bool
+    _pending: bool
+    _display: List[Tuple[str, ...]]
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.runs = []
+
+        self._store = None
+        self._storeRows = None
+        self._nextToken = None
+        self._hasMore = True
+        self._pending = False
+        self._display = []
+
+    def setStoreRows(self, store: JobRunStore, rows: np.ndarray) -> None:
+        '''Loads the pages from the given store rows (newest first) instead of downloading them'''
+        self._store = store
+        self._storeRows = rows
+        self._hasMore = len(rows) > len(self.runs)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.runs)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(jobRunColumns)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> Any:
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return jobRunColumns[section][0]
+
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+
+        # id and error have auto tooltips
+        if role == Qt.DisplayRole or (role == Qt.ToolTipRole and index.column() in (0, 2)):
+            return self._display[index.row()][index.column()]
+
+        return None
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and self._hasMore and not self._pending
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if not self.canFetchMore(parent):
+            return
+
+        if self._storeRows is None:
+            self._pending = True
+            self.pageRequested.emit(self._nextToken)
+
+            return
+
+        start = len(self.runs)
+        rows = self._storeRows[start:start + self.pageSize]
+        self._hasMore = start + len(rows) < len(self._storeRows)
+        self._insertRuns(self._store.runs(rows))
+
+    def appendPage(self, runs: List[aws.JobRun], nextToken: Optional[str]) -> None:
+        '''Delivers the downloaded page requested by pageRequested'''
+        self._pending = False
+        self._nextToken = nextToken
+        self._hasMore = nextToken is not None
+        self._insertRuns(runs)
+
+    def setPageError(self) -> None:
+        '''The requested page couldn't be downloaded: stops requesting pages'''
+        self._pending = False
+        self._hasMore = False
+
+    def _insertRuns(self, runs: List[aws.JobRun]) -> None:
+        if len(runs) == 0:
+            return
+
+        start = len(self.runs)
+        self.beginInsertRows(QModelIndex(), start, start + len(runs) - 1)
+        self.runs.extend(runs)
+        self._display.extend(_displayRun(run) for run in runs)
+        self.endInsertRows()
+
+
+def _displayRun(run: aws.JobRun) -> Tuple[str, ...]:
+    timeFormat = '%Y/%m/%d %H:%M:%S'
+
+    return (
+        run.Id,
+        run.JobRunState,
+        run.ErrorMessage,
+        run.GlueVersion,
+        str(run.MaxCapacity),
+        run.StartedOn.strftime(timeFormat) if run.StartedOn is not None else '',
+        run.CompletedOn.strftime(timeFormat) if run.CompletedOn is not None else '',
+        timeUtils.fromTimeToString(seconds=run.ExecutionTime),
+        timeUtils.fromTimeToString(minutes=run.Timeout),
+    )
 
 
 class QJobDetails(QWidget):
     job: aws.Job
-    jobRuns: List[aws.JobRun]
 
     runsTable: QTableView
+    runsModel: QJobRunsTableModel
 
-    def __init__(self, job: aws.Job, jobRuns: List[aws.JobRun], *args, **kwargs) -> None:
+    def __init__(self, job: aws.Job, jobRunStore: JobRunStore, *args, **kwargs) -> None:
+        '''The job's runs are read from the store if it has them, otherwise they're requested (see runsModel)'''
         super().__init__(*args, **kwargs)
 
         self.job = job
-        self.jobRuns = jobRuns
 
         self.setWindowTitle(f'"{job.Name}" job details')
         self.setWindowModality(Qt.WindowModality.WindowModal)
@@ -45,34 +171,11 @@ class QJobDetails(QWidget):
 
         self.setMinimumSize(QSize(1117, 800))
 
+        self.runsModel = QJobRunsTableModel()
+        if jobRunStore.latestJobRow(job.Name) is not None:
+            self.runsModel.setStoreRows(jobRunStore, jobRunStore.jobRows(job.Name))
+
         self.runsTable = QTableView()
-        decorateTable(self.runsTable, ('Id', 150), ('State', 120), ('Error', 220),
-                      ('Glue v.', 50), ('Max Capacity', 105), ('Start time', 147), ('End time', 147), ('Duration', 70), ('Timeout', 70))
+        decorateTable(self.runsTable, *jobRunColumns, model=self.runsModel)
 
         mainLayout.addWidget(self.runsTable)
-        self.populateJobRuns()
-
-    def populateJobRuns(self):
-        model: QStandardItemModel = self.runsTable.model()
-        model.removeRows(0, model.rowCount())
-
-        for row in range(len(self.jobRuns)):
-            run = self.jobRuns[row]
-
-            startTime = run.CompletedOn.strftime(
-                '%Y/%m/%d %H:%M:%S') if run.StartedOn is not None else ''
-            endTime = run.CompletedOn.strftime(
-                '%Y/%m/%d %H:%M:%S') if run.CompletedOn is not None else ''
-            duration = timeUtils.fromTimeToString(seconds=run.ExecutionTime)
-            timeout = timeUtils.fromTimeToString(minutes=run.Timeout)
-
-            model.setItem(row, 0, QReadOnlyItem(run.Id, withAutoTooltip=True))
-            model.setItem(row, 1, QReadOnlyItem(run.JobRunState))
-            model.setItem(row, 2, QReadOnlyItem(
-                run.ErrorMessage, withAutoTooltip=True))
-            model.setItem(row, 3, QReadOnlyItem(run.GlueVersion))
-            model.setItem(row, 4, QReadOnlyItem(str(run.MaxCapacity)))
-            model.setItem(row, 5, QReadOnlyItem(startTime))
-            model.setItem(row, 6, QReadOnlyItem(endTime))
-            model.setItem(row, 7, QReadOnlyItem(duration))
-            model.setItem(row, 8, QReadOnlyItem(timeout))
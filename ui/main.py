@@ -1,6 +1,6 @@
 import logging
 import traceback
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from PyQt5.QtCore import QSize, Qt, QThreadPool
 from PyQt5.QtWidgets import (QApplication, QComboBox, QHBoxLayout, QLabel,
@@ -17,7 +17,10 @@ from ui.tabs import JobsTab, WorkflowsTab
 class MainWindow(QMainWindow):
     config: ConfigManager
     threadPool: QThreadPool
+    requests: aws.RequestManager
     profile: Optional[AWSProfile] = None
+    jobRunsCache: Optional[aws.RunCache] = None
+    workflowRunsCache: Optional[aws.RunCache] = None
     _logger: logging.Logger
 
     profilePicklist: QComboBox
@@ -40,6 +43,7 @@ class MainWindow(QMainWindow):
         self._logger = logging.getLogger()
         self.config = configManager
         self.threadPool = threadPool
+        self.requests = aws.RequestManager(threadPool)
         self.apiStack = 0
 
         self.setWindowTitle('Glue Manager')
@@ -74,11 +78,20 @@ class MainWindow(QMainWindow):
         layout.addWidget(topRightWidget, alignment=Qt.AlignmentFlag.AlignRight)
 
         self.jobsTab = JobsTab()
+        self.jobsTab.setDPUHourPrice(self.config.settings.dpuHourPrice)
         self.jobsTab.refreshButton.clicked.connect(self.onJobsDataRequested)
+        self.jobsTab.signals.jobRunsPageRequested.connect(
+            self.onJobRunsPageRequested)
+        self.jobsTab.signals.liveJobRunsRequested.connect(
+            self.onLiveJobRunsRequested)
 
         self.workflowsTab = WorkflowsTab()
         self.workflowsTab.refreshButton.clicked.connect(
             self.onWorkflowsDataRequested)
+        self.workflowsTab.signals.graphRequested.connect(
+            self.onWorkflowGraphRequested)
+        self.workflowsTab.signals.runsRequested.connect(
+            self.onWorkflowRunsRequested)
 
         self.tabsView = QTabWidget()
         self.tabsView.addTab(self.jobsTab, 'Jobs')
@@ -107,6 +120,7 @@ class MainWindow(QMainWindow):
 
         def onClose(*args):
             self.config.save()
+            self.jobsTab.setDPUHourPrice(self.config.settings.dpuHourPrice)
             dialog.close()
         dialog.signals.profilesModified.connect(self.onProfilesChanged)
 
@@ -122,25 +136,45 @@ class MainWindow(QMainWindow):
         self.profile = next(
             (profile for profile in self.config.settings.profiles if profile.label == self.profilePicklist.currentText()), None)
 
+        # Drop whatever is still being downloaded for the previous profile
+        self.requests.newGeneration()
+        self.apiStack = 0
+        self.afterAWSCall()
+
         if self.profile is not None:
             self._logger.info(f'Profile selected: {self.profile.label}')
             self.config.settings.defaultProfile = self.profile.accessKey
+            self.jobRunsCache = aws.RunCache(
+                self.config.cacheRoot(), self.profile, 'jobRuns', aws.JobRun, 'Id')
+            self.workflowRunsCache = aws.RunCache(
+                self.config.cacheRoot(), self.profile, 'workflowRuns', aws.WorkflowRun, 'WorkflowRunId')
             self.onTabSelected(self.tabsView.currentIndex())
 
     def onJobsDataRequested(self, *_) -> None:
+        if self.requests.isInFlight('jobs'):
+            return
+
+        # A new jobs list supersedes the job runs still being downloaded
+        if self.requests.cancel('jobRuns'):
+            self.afterAWSCall()
+
         self.jobsTab.signals.jobsUpdated.emit([])
         self.jobsTab.signals.jobRunsUpdated.emit([])
 
         self.beforeAWSCall('Downloading jobs data...')
-        runnable = aws.getRunnable(aws.getJobs, self.profile)
+        runnable = aws.getPagedRunnable(aws.iterJobs, self.profile)
+        live = self.requests.live
 
-        runnable.signals.success.connect(self.onJobsDownloaded)
+        runnable.signals.page.connect(
+            live(runnable, self.jobsTab.signals.jobsAppended.emit))
+        runnable.signals.success.connect(
+            live(runnable, self.onJobsDownloaded))
         runnable.signals.success.connect(
-            lambda: self.afterAWSCall('Ready'))
+            live(runnable, lambda _: self.afterAWSCall('Ready')))
         runnable.signals.raised.connect(
-            lambda ex: self.onAWSException(ex, True))
+            live(runnable, lambda ex: self.onAWSException(ex, True)))
 
-        self.threadPool.start(runnable)
+        self.requests.submit('jobs', runnable)
 
     def onTabSelected(self, index) -> None:
         if self.profile is None or self.config.settings.loadDataOnTabChange == False:
@@ -164,42 +198,121 @@ class MainWindow(QMainWindow):
         names.sort()
         self._logger.info('\n'.join(names))
 
-        self.jobsTab.signals.jobsUpdated.emit(jobs)
+        self.beforeAWSCall('Downloading jobs run details...', max=len(jobs))
+        batch = aws.getJobRunsBatch(
+            self.profile, [job.Name for job in jobs], cache=self.jobRunsCache)
+        runnable = aws.getBatchRunnable(batch)
+        live = self.requests.live
 
-        self.beforeAWSCall('Downloading jobs run details...',
-                           max=len(jobs), stackCount=len(jobs))
-        for job in jobs:
-            runnable = aws.getRunnable(
-                aws.getJobRuns, profile=self.profile, jobName=job.Name)
-            runnable.signals.success.connect(self.onJobRunsDownloaded)
-            runnable.signals.raised.connect(
-                lambda ex: self.onAWSException(ex, True))
+        runnable.signals.success.connect(
+            live(runnable, self.onJobRunsDownloaded))
+        runnable.signals.raised.connect(
+            live(runnable, lambda ex: self.onAWSException(ex, False)))
+        runnable.signals.progress.connect(
+            live(runnable, self.onJobRunsBatchProgress))
+        runnable.signals.finished.connect(
+            live(runnable, lambda _: self.afterAWSCall('Ready')))
 
-            self.threadPool.start(runnable)
+        self.requests.submit('jobRuns', runnable)
 
     def onJobRunsDownloaded(self, jobRuns: List[aws.JobRun]):
-        self.afterAWSCall(incrementProgress=True)
         self.jobsTab.signals.jobRunsUpdated.emit(jobRuns)
 
+    def onJobRunsBatchProgress(self, stats: aws.BatchStats) -> None:
+        self.statusProgressBar.setValue(stats.completed + stats.failed)
+        if self.apiStack > 0:
+            self.statusBar().showMessage(
+                f'Downloading jobs run details... ({stats})')
+
+    def onJobRunsPageRequested(self, jobName: str, generation: int, nextToken: Optional[str]) -> None:
+        key = ('jobRunsPage', jobName, generation, nextToken)
+        runnable = aws.getRunnable(
+            aws.getJobRunsPage, self.profile, jobName, nextToken)
+        live = self.requests.live
+
+        runnable.signals.success.connect(live(
+            runnable, lambda page: self.jobsTab.signals.jobRunsPageDownloaded.emit(jobName, generation, *page)))
+        runnable.signals.raised.connect(live(
+            runnable, lambda ex: self.jobsTab.signals.jobRunsPageRaised.emit(jobName, generation, ex)))
+        runnable.signals.raised.connect(
+            live(runnable, lambda ex: self.onAWSException(ex, False)))
+
+        self.requests.submit(key, runnable)
+
+    def onLiveJobRunsRequested(self, activeRunIds: Dict[str, List[str]], probeJobNames: List[str]) -> None:
+        # polled in background (without disabling the tabs), skipping a poll if the previous one is still in flight
+        runnable = aws.getRunnable(
+            aws.pollJobRuns, self.profile, activeRunIds, probeJobNames)
+        live = self.requests.live
+
+        runnable.signals.success.connect(
+            live(runnable, self.jobsTab.signals.jobRunsUpdated.emit))
+        runnable.signals.raised.connect(
+            live(runnable, lambda ex: self.onAWSException(ex, False)))
+
+        self.requests.submit('liveJobRuns', runnable)
+
     def onWorkflowsDataRequested(self, *_) -> None:
+        if self.requests.isInFlight('workflows'):
+            return
+
         self.workflowsTab.signals.workflowsUpdated.emit([])
         self.workflowsTab.signals.workflowsRunsUpdated.emit([])
 
         self.beforeAWSCall('Downloading workflows data...')
         runnable = aws.getRunnable(aws.getWorkflowsList, self.profile)
+        live = self.requests.live
 
-        runnable.signals.success.connect(self.onWorkflowsListDownloaded)
         runnable.signals.success.connect(
-            lambda: self.afterAWSCall('Ready'))
+            live(runnable, self.onWorkflowsListDownloaded))
+        runnable.signals.success.connect(
+            live(runnable, lambda _: self.afterAWSCall('Ready')))
         runnable.signals.raised.connect(
-            lambda ex: self.onAWSException(ex, True))
+            live(runnable, lambda ex: self.onAWSException(ex, True)))
 
-        self.threadPool.start(runnable)
+        self.requests.submit('workflows', runnable)
 
     def onWorkflowsListDownloaded(self, workflows: List[str]) -> None:
         self.afterAWSCall(incrementProgress=True)
         self.workflowsTab.signals.workflowsUpdated.emit(workflows)
 
+    def onWorkflowGraphRequested(self, workflow: aws.Workflow) -> None:
+        # Results are routed by workflow name: if coalesced, the request in flight delivers the graph
+        key = ('workflowGraph', workflow.Name)
+        if self.requests.isInFlight(key):
+            return
+
+        runnable = aws.getRunnable(
+            aws.getWorkflowGraph, self.profile, workflow)
+        live = self.requests.live
+
+        runnable.signals.success.connect(live(
+            runnable, lambda graph: self.workflowsTab.signals.graphDownloaded.emit(workflow.Name, graph)))
+        runnable.signals.raised.connect(live(
+            runnable, lambda ex: self.workflowsTab.signals.graphRaised.emit(workflow.Name, ex)))
+        runnable.signals.raised.connect(
+            live(runnable, lambda ex: self.onAWSException(ex, False)))
+
+        self.requests.submit(key, runnable)
+
+    def onWorkflowRunsRequested(self, workflow: aws.Workflow) -> None:
+        key = ('workflowRuns', workflow.Name)
+        if self.requests.isInFlight(key):
+            return
+
+        runnable = aws.getRunnable(
+            aws.syncWorkflowRuns, self.profile, workflow.Name, self.workflowRunsCache)
+        live = self.requests.live
+
+        runnable.signals.success.connect(live(
+            runnable, lambda runs: self.workflowsTab.signals.runsDownloaded.emit(workflow.Name, runs)))
+        runnable.signals.raised.connect(live(
+            runnable, lambda ex: self.workflowsTab.signals.runsRaised.emit(workflow.Name, ex)))
+        runnable.signals.raised.connect(
+            live(runnable, lambda ex: self.onAWSException(ex, False)))
+
+        self.requests.submit(key, runnable)
+
     def onAWSException(self, exception: Exception, withAfterAWSCall: bool):
         self._logger.error(exception)
         traceback.print_tb(exception.__traceback__)
@@ -214,7 +327,6 @@ class MainWindow(QMainWindow):
         self.statusProgressBar.setValue(0)
         self.statusProgressBar.setVisible(True)
 
-        self.profilePicklist.setEnabled(False)
         self.jobsTab.signals.enable.emit(False)
         self.workflowsTab.signals.enable.emit(False)
 
@@ -231,7 +343,6 @@ class MainWindow(QMainWindow):
             self.statusProgressBar.setVisible(False)
             self.statusBar().showMessage(status)
 
-            self.profilePicklist.setEnabled(True)
             self.tabsView.setEnabled(True)
             self.jobsTab.signals.enable.emit(True)
             self.workflowsTab.signals.enable.emit(True)
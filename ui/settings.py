@@ -1,8 +1,10 @@
 import logging
 from ui.alertDialog import QAlertDialog
 from PyQt5.QtCore import QObject, pyqtSignal
+from lib import aws
 from lib.config import AWSProfile, ConfigManager
-from PyQt5.QtWidgets import QCheckBox, QComboBox, QDialog, QDialogButtonBox, QFormLayout, QGroupBox, QHBoxLayout, QLabel, QLineEdit, QPushButton, QVBoxLayout, QWidget
+from PyQt5.QtWidgets import (QCheckBox, QComboBox, QDialog, QDialogButtonBox, QDoubleSpinBox, QFormLayout,
+                             QGroupBox, QHBoxLayout, QLabel, QLineEdit, QPushButton, QVBoxLayout, QWidget)
 
 
 class SettingsSignals(QObject):
@@ -105,6 +107,19 @@ class QSettingsDialog(QDialog):
             self.onLoadDataOnTabChangeToggled)
         layout.addWidget(loadDataOnTabChangeCheckbox)
 
+        dpuHourPriceSpinBox = QDoubleSpinBox()
+        dpuHourPriceSpinBox.setDecimals(4)
+        dpuHourPriceSpinBox.setSingleStep(0.01)
+        dpuHourPriceSpinBox.setPrefix('$ ')
+        dpuHourPriceSpinBox.setValue(self.config.settings.dpuHourPrice)
+        dpuHourPriceSpinBox.valueChanged.connect(
+            self.onDPUHourPriceChanged)
+        priceLayout = QFormLayout()
+        priceLayout.addRow(QLabel('Price per DPU-hour (cost estimates):'), dpuHourPriceSpinBox)
+        priceWidget = QWidget()
+        priceWidget.setLayout(priceLayout)
+        layout.addWidget(priceWidget)
+
         buttonBox = QDialogButtonBox(QDialogButtonBox.Ok)
         buttonBox.accepted.connect(self.accepted)
         layout.addWidget(buttonBox)
@@ -155,6 +170,9 @@ class QSettingsDialog(QDialog):
         found = profile is not None
         if not found:
             profile = AWSProfile()
+        else:
+            # Credentials and / or region may have changed
+            aws.invalidateClients(profile.label)
 
         profile.label = dialog.label.text()
         profile.region = dialog.region.text()
@@ -186,6 +204,7 @@ class QSettingsDialog(QDialog):
         dialog.exec_()
 
     def onProfileDeleted(self, profile: AWSProfile) -> None:
+        aws.invalidateClients(profile.label)
         self.config.settings.profiles.pop(self.config.profiles.index(profile))
         self._logger.info(f'Deleted profile "{profile.label}"')
 
@@ -195,3 +214,6 @@ class QSettingsDialog(QDialog):
 
     def onLoadDataOnTabChangeToggled(self, checked: bool) -> None:
         self.config.settings.loadDataOnTabChange = checked
+
+    def onDPUHourPriceChanged(self, value: float) -> None:
+        self.config.settings.dpuHourPrice = value
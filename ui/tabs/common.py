@@ -1,16 +1,22 @@
-from typing import Callable, Tuple, Union
-from PyQt5.QtCore import QObject, pyqtSignal
+import threading
+from typing import Any, Callable, Hashable, List, Optional, Sequence, Tuple, Union
+from PyQt5.QtCore import QAbstractItemModel, QModelIndex, QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
 from PyQt5.QtGui import QIcon, QStandardItem, QStandardItemModel
-from PyQt5.QtWidgets import QTableView
+from PyQt5.QtWidgets import QLineEdit, QTableView
+
+from lib import aws, listUtils, timeUtils
+from lib.query import Predicate, filterRows
 
 
 class TabViewSignals(QObject):
     enable = pyqtSignal(bool)
 
 
-def decorateTable(table: QTableView, *columns: Tuple[str, int]) -> None:
-    model = QStandardItemModel()
-    model.setHorizontalHeaderLabels([column[0] for column in columns])
+def decorateTable(table: QTableView, *columns: Tuple[str, int], model: Optional[QAbstractItemModel] = None) -> None:
+    '''Sets the table's model (by default, a QStandardItemModel with the columns' headers) and columns' widths'''
+    if model is None:
+        model = QStandardItemModel()
+        model.setHorizontalHeaderLabels([column[0] for column in columns])
     table.setModel(model)
     table.verticalHeader().setVisible(False)
 
@@ -20,6 +26,145 @@ def decorateTable(table: QTableView, *columns: Tuple[str, int]) -> None:
             table.setToolTip(columns[i][2])
 
 
+filterPlaceholder = 'free text | field : value | field > value | field ~ regex | a OR NOT b | filter 1; filter 2; ...'
+
+
+def setFilterError(filterEdit: QLineEdit, error: Optional[str]) -> None:
+    '''Highlights the filter, showing the error as tooltip (None to reset)'''
+    filterEdit.setToolTip(error or '')
+    filterEdit.setStyleSheet('QLineEdit { color: red; }' if error is not None else '')
+
+
+def applyRows(model: QAbstractItemModel, rows: list, newRows: Sequence[Any], key: Callable[[Any], Hashable]) -> None:
+    '''Turns the model's rows (updated in place) into the new ones removing, moving and inserting
+        only the rows that changed (see listUtils.diffSequences), so that the views keep their selection
+        and scroll position. The rows are identified by key.
+    '''
+    newRows = list(newRows)
+    diff = listUtils.diffSequences([key(row) for row in rows], [key(row) for row in newRows])
+
+    for first, last in reversed(diff.removed):
+        model.beginRemoveRows(QModelIndex(), first, last)
+        del rows[first:last + 1]
+        model.endRemoveRows()
+
+    keptKeys = {key(row) for row in rows}
+    keptRows = [row for row in newRows if key(row) in keptKeys]
+    if diff.moved:
+        model.layoutAboutToBeChanged.emit()
+        keptPositions = {key(row): position for position, row in enumerate(keptRows)}
+        persistentIndexes = model.persistentIndexList()
+        model.changePersistentIndexList(persistentIndexes, [
+            model.index(keptPositions[key(rows[index.row()])], index.column())
+            for index in persistentIndexes
+        ])
+        rows[:] = keptRows
+        model.layoutChanged.emit()
+    else:
+        # same rows, possibly refreshed instances
+        rows[:] = keptRows
+
+    for first, last in diff.inserted:
+        model.beginInsertRows(QModelIndex(), first, last)
+        rows[first:first] = newRows[first:last + 1]
+        model.endInsertRows()
+
+
+def missingLast(value: Any) -> Tuple[bool, Any]:
+    '''Sort key putting the missing (None) values last'''
+    return value is None, value
+
+
+class QFilterRunnableSignals(QObject):
+    '''Filter signals
+        Attributes:
+          finished  when the evaluation completes (arg1: the generation, arg2: the rows' indexes)
+    '''
+
+    finished = pyqtSignal(int, list)
+
+
+class QFilterRunnable(QRunnable):
+    signals: QFilterRunnableSignals
+    generation: int
+    rows: Sequence[Any]
+    predicate: Predicate
+    sortKey: Optional[Callable[[Any], Any]]
+    reverse: bool
+    cancelled: threading.Event
+
+    def __init__(
+        self, generation: int, rows: Sequence[Any], predicate: Predicate,
+        sortKey: Optional[Callable[[Any], Any]], reverse: bool, cancelled: threading.Event,
+    ) -> None:
+        super().__init__()
+
+        self.signals = QFilterRunnableSignals()
+        self.generation = generation
+        self.rows = rows
+        self.predicate = predicate
+        self.sortKey = sortKey
+        self.reverse = reverse
+        self.cancelled = cancelled
+
+    @pyqtSlot()
+    def run(self) -> None:
+        indexes = filterRows(self.rows, self.predicate, self.sortKey, self.reverse, self.cancelled)
+        if indexes is not None:
+            self.signals.finished.emit(self.generation, indexes)
+
+
+class FilterWorker:
+    '''Filters and sorts snapshots of rows off the GUI thread.
+        Requesting a new evaluation cancels the running one: only the last one delivers its result,
+        onFinished(rows, indexes) being called on the GUI thread with the evaluated snapshot
+        and the indexes of its matching rows, in display order.
+    '''
+    onFinished: Callable[[Tuple[Any, ...], List[int]], None]
+    threadPool: QThreadPool
+    generation: int
+
+    _rows: Tuple[Any, ...]
+    _cancelled: Optional[threading.Event]
+
+    def __init__(self, onFinished: Callable[[Tuple[Any, ...], List[int]], None], threadPool: Optional[QThreadPool] = None) -> None:
+        self.onFinished = onFinished
+        self.threadPool = threadPool if threadPool is not None else QThreadPool.globalInstance()
+        self.generation = 0
+
+        self._rows = ()
+        self._cancelled = None
+
+    def isBusy(self) -> bool:
+        return self._cancelled is not None
+
+    def cancel(self) -> None:
+        if self._cancelled is not None:
+            self._cancelled.set()
+            self._cancelled = None
+
+    def evaluate(
+        self, rows: Sequence[Any], predicate: Predicate,
+        sortKey: Optional[Callable[[Any], Any]] = None, reverse: bool = False,
+    ) -> None:
+        self.cancel()
+        self.generation += 1
+        self._rows = tuple(rows)
+        self._cancelled = threading.Event()
+
+        runnable = QFilterRunnable(
+            self.generation, self._rows, predicate, sortKey, reverse, self._cancelled)
+        runnable.signals.finished.connect(self._onFinished)
+        self.threadPool.start(runnable)
+
+    def _onFinished(self, generation: int, indexes: List[int]) -> None:
+        if generation != self.generation:
+            return
+
+        self._cancelled = None
+        self.onFinished(self._rows, indexes)
+
+
 class QReadOnlyItem(QStandardItem):
     withAutoTooltip: bool
 
@@ -41,31 +186,22 @@ class QReadOnlyItem(QStandardItem):
             self.setToolTip(text)
 
 
-def searchInObjectField(obj: dict, key: str, value: str) -> bool:
-    if key not in obj.keys():
-        return False
-
-    attr = obj[key]
-    if not isinstance(attr, str) or value.lower() not in attr.lower():
-        return False
-
-    return True
-
-
-def searchInObjectFieldFactory(key: str, value: str) -> Callable[[dict], bool]:
-    return lambda obj: searchInObjectField(obj, key, value)
-
-
-def searchInObjectFields(obj: dict, value: str) -> bool:
-    keys = obj.keys()
+def formatWorkflowRunDuration(run: aws.WorkflowRun) -> str:
+    if run.CompletedOn is None:
+        return ''
 
-    for key in keys:
-        result = searchInObjectField(obj, key, value)
-        if result:
-            return True
+    return timeUtils.fromTimeToString(seconds=int((run.CompletedOn - run.StartedOn).total_seconds()))
 
-    return False
 
+def formatWorkflowRunStatistics(statistics: Optional[aws.WorkflowRunStatistics]) -> str:
+    if statistics is None:
+        return 'N/A'
 
-def searchInObjectFieldsFactory(value: str) -> Callable[[dict], bool]:
-    return lambda obj: searchInObjectFields(obj, value)
+    return 'Su: {succeded:02d} / Fa: {failed:02d} / Ti: {timeout:02d} / St: {stopped:02d} / Ru: {running:02d} / To: {total:02d}'.format(
+        succeded=statistics.SucceededActions,
+        failed=statistics.FailedActions,
+        timeout=statistics.TimeoutActions,
+        stopped=statistics.StoppedActions,
+        running=statistics.RunningActions,
+        total=statistics.TotalActions,
+    )
@@ -0,0 +1,209 @@
+import math
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import numpy as np
+from PyQt5.QtChart import QChart, QChartView, QDateTimeAxis, QLineSeries, QValueAxis
+from PyQt5.QtCore import QModelIndex, QPointF, Qt, pyqtSignal
+from PyQt5.QtGui import QPainter, QStandardItemModel
+from PyQt5.QtWidgets import (QAbstractItemView, QComboBox, QHBoxLayout, QLabel, QPushButton, QSpinBox,
+                             QTableView, QVBoxLayout, QWidget)
+
+from lib.cost import CostRates, CostReport, costReport
+from lib.jobRunStore import JobRunStore
+from ui.tabs.common import QReadOnlyItem, decorateTable
+
+# Cost periods: label, period
+costPeriods = [
+    ('last 7 days', timedelta(days=7)),
+    ('last 30 days', timedelta(days=30)),
+    ('last 90 days', timedelta(days=90)),
+    ('last year', timedelta(days=365)),
+]
+
+costColumns = [
+    ('#', 40), ('Job', 300), ('DPU-hours', 100), ('Est. spend', 100), ('Runs', 70), ('Share', 70), ('Trend', 80),
+]
+
+# Jobs charted when none is selected
+defaultTrendJobs = 5
+
+
+class QCostWindow(QWidget):
+    '''Ranks the jobs by the estimated spend of their runs (see lib.cost), charting the daily spend
+        of the selected ones (by default, the most expensive ones)
+    '''
+    jobRequested = pyqtSignal(str)
+
+    jobRunStore: JobRunStore
+    rates: CostRates
+    report: Optional[CostReport]
+    # Codes of the listed jobs, most expensive first
+    topJobs: np.ndarray
+
+    periodPicklist: QComboBox
+    topSpinBox: QSpinBox
+    refreshButton: QPushButton
+    summary: QLabel
+    table: QTableView
+    chartView: QChartView
+
+    def __init__(self, jobRunStore: JobRunStore, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.jobRunStore = jobRunStore
+        self.rates = CostRates()
+        self.report = None
+        self.topJobs = np.empty(0, dtype=np.int64)
+
+        self.setWindowTitle('Glue costs')
+        self.setMinimumSize(1000, 800)
+
+        self.periodPicklist = QComboBox()
+        for label, _ in costPeriods:
+            self.periodPicklist.addItem(label)
+        self.periodPicklist.setCurrentIndex(1)
+        self.periodPicklist.currentIndexChanged.connect(lambda *_: self.refresh())
+
+        self.topSpinBox = QSpinBox()
+        self.topSpinBox.setRange(1, 1000)
+        self.topSpinBox.setValue(20)
+        self.topSpinBox.setPrefix('Top ')
+        self.topSpinBox.valueChanged.connect(lambda *_: self.refresh())
+
+        self.refreshButton = QPushButton('Refresh')
+        self.refreshButton.clicked.connect(self.refresh)
+
+        controlsWidget = QWidget()
+        controlsLayout = QHBoxLayout()
+        controlsLayout.setContentsMargins(0, 0, 0, 0)
+        controlsLayout.addWidget(self.periodPicklist)
+        controlsLayout.addWidget(self.topSpinBox)
+        controlsLayout.addWidget(self.refreshButton)
+        controlsLayout.addStretch(1)
+        controlsWidget.setLayout(controlsLayout)
+
+        self.summary = QLabel()
+        self.summary.setWordWrap(True)
+
+        self.table = QTableView()
+        decorateTable(self.table, *costColumns)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.doubleClicked.connect(self.onTableDoubleClick)
+        self.table.selectionModel().selectionChanged.connect(lambda *_: self.renderTrend())
+
+        self.chartView = QChartView(QChart())
+        self.chartView.setRenderHint(QPainter.Antialiasing)
+
+        layout = QVBoxLayout()
+        layout.addWidget(controlsWidget)
+        layout.addWidget(self.summary)
+        layout.addWidget(self.table, stretch=1)
+        layout.addWidget(self.chartView, stretch=1)
+        self.setLayout(layout)
+
+    def setRates(self, rates: CostRates) -> None:
+        self.rates = rates
+        if self.isVisible():
+            self.refresh()
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        self.refresh()
+
+    def refresh(self) -> None:
+        _, period = costPeriods[self.periodPicklist.currentIndex()]
+        toTimestamp = datetime.now().timestamp()
+        fromTimestamp = toTimestamp - period.total_seconds()
+
+        reportStart = time.perf_counter()
+        self.report = report = costReport(self.jobRunStore, fromTimestamp, toTimestamp, self.rates)
+        self.topJobs = report.topJobs(self.topSpinBox.value())
+        jobDPUHours = report.jobDPUHours()
+        jobSpend = report.jobSpend()
+        trends = report.trends()
+        elapsed = (time.perf_counter() - reportStart) * 1000
+
+        totalSpend = float(jobSpend.sum())
+        workerTypes = ', '.join(
+            f'{workerType or "no workers"}: {dpuHours:,.1f} DPU-hours (${report.spendByWorkerType[workerType]:,.2f})'
+            for workerType, dpuHours in sorted(report.dpuHoursByWorkerType.items(), key=lambda item: -item[1]))
+        self.summary.setText(
+            f'{jobDPUHours.sum():,.1f} DPU-hours, ${totalSpend:,.2f} estimated at ${self.rates.dpuHour:g} per DPU-hour, '
+            f'{int(report.runs.sum()):,} runs of {int(np.count_nonzero(report.runs)):,} jobs ({elapsed:.0f} ms)\n'
+            f'{workerTypes}')
+
+        model: QStandardItemModel = self.table.model()
+        if model.rowCount() > 0:
+            model.removeRows(0, model.rowCount())
+        for tableRow, job in enumerate(self.topJobs.tolist()):
+            cells = [
+                str(tableRow + 1),
+                report.jobNames[job],
+                f'{jobDPUHours[job]:,.1f}',
+                f'${jobSpend[job]:,.2f}',
+                f'{int(report.runs[job]):,}',
+                f'{jobSpend[job] / totalSpend:.1%}' if totalSpend > 0 else '',
+                _formatTrend(float(trends[job])),
+            ]
+            for column, text in enumerate(cells):
+                item = QReadOnlyItem(text, column == 1)
+                if column != 1:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                model.setItem(tableRow, column, item)
+
+        self.renderTrend()
+
+    def selectedJobs(self) -> List[int]:
+        '''Codes of the selected jobs (by default, the most expensive ones)'''
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        if len(rows) == 0:
+            rows = list(range(min(defaultTrendJobs, len(self.topJobs))))
+
+        return [int(self.topJobs[row]) for row in rows]
+
+    def renderTrend(self) -> None:
+        '''Charts the daily spend of the selected jobs'''
+        chart = QChart()
+        chart.setTitle('Daily estimated spend')
+        chart.legend().setAlignment(Qt.AlignBottom)
+
+        report = self.report
+        if report is not None:
+            xValues = (report.days() * 1000).tolist()
+            xAxis = QDateTimeAxis()
+            xAxis.setFormat('MM-dd')
+            xAxis.setLabelsAngle(60)
+            yAxis = QValueAxis()
+            yAxis.setTitleText('USD')
+            yAxis.setLabelFormat('%.2f')
+            chart.addAxis(xAxis, Qt.AlignBottom)
+            chart.addAxis(yAxis, Qt.AlignLeft)
+
+            maxSpend = 0.0
+            for job in self.selectedJobs():
+                series = QLineSeries()
+                series.setName(report.jobNames[job])
+                series.append([QPointF(x, y) for x, y in zip(xValues, report.spend[job].tolist())])
+                chart.addSeries(series)
+                series.attachAxis(xAxis)
+                series.attachAxis(yAxis)
+                maxSpend = max(maxSpend, float(report.spend[job].max()))
+
+            yAxis.setRange(0, maxSpend if maxSpend > 0 else 1)
+
+        previous = self.chartView.chart()
+        self.chartView.setChart(chart)
+        previous.deleteLater()
+
+    def onTableDoubleClick(self, index: QModelIndex) -> None:
+        model: QStandardItemModel = self.table.model()
+        self.jobRequested.emit(model.item(index.row(), 1).text())
+
+
+def _formatTrend(trend: float) -> str:
+    if math.isnan(trend):
+        return 'new'
+
+    return f'{trend:+.0%}'
@@ -0,0 +1,103 @@
+import time
+from datetime import datetime
+
+import numpy as np
+import tzlocal
+from PyQt5.QtCore import QModelIndex, QTimer, pyqtSignal
+from PyQt5.QtGui import QStandardItemModel
+from PyQt5.QtWidgets import QLabel, QLineEdit, QTableView, QVBoxLayout, QWidget
+
+from lib.jobRunStore import JobRunStore
+from ui.tabs.common import QReadOnlyItem, decorateTable
+
+errorSearchColumns = [
+    ('Job', 300), ('Matching runs', 110), ('Last matching run', 146), ('Last error message', 400)
+]
+
+
+class QErrorSearchWindow(QWidget):
+    '''Searches the error messages of all the loaded job runs (see lib.errorIndex), grouping the matches by job'''
+    jobRequested = pyqtSignal(str)
+
+    jobRunStore: JobRunStore
+
+    searchTimer: QTimer
+    search: QLineEdit
+    summary: QLabel
+    table: QTableView
+
+    def __init__(self, jobRunStore: JobRunStore, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.jobRunStore = jobRunStore
+
+        self.setWindowTitle('Search job run errors')
+        self.setMinimumSize(1000, 600)
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.searchTimer = QTimer()
+        self.searchTimer.setInterval(300)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.timeout.connect(self.refresh)
+
+        self.search = QLineEdit()
+        self.search.setPlaceholderText('Words contained in the error message, e.g. exit code')
+        self.search.textChanged.connect(self.onSearchChanged)
+
+        self.summary = QLabel()
+
+        self.table = QTableView()
+        decorateTable(self.table, *errorSearchColumns)
+        self.table.doubleClicked.connect(self.onTableDoubleClick)
+
+        layout.addWidget(self.search)
+        layout.addWidget(self.summary)
+        layout.addWidget(self.table, stretch=1)
+
+    def onSearchChanged(self, _: str) -> None:
+        if self.searchTimer.isActive():
+            self.searchTimer.stop()
+
+        self.searchTimer.start()
+
+    def refresh(self) -> None:
+        model: QStandardItemModel = self.table.model()
+        if model.rowCount() > 0:
+            model.removeRows(0, model.rowCount())
+
+        text = self.search.text()
+        if text.strip() == '':
+            self.summary.setText('')
+
+            return
+
+        searchStart = time.perf_counter()
+        store = self.jobRunStore
+        startedOn = store.column('startedOn')
+        jobCodes = store.column('job')
+        rows = store.errorRows(text)
+        counts = store.countByJob(rows)
+        # latest matching run of each job: newest first, then the first row of each job
+        rows = rows[np.argsort(-startedOn[rows], kind='stable')]
+        _, firstRows = np.unique(jobCodes[rows], return_index=True)
+        latestRows = rows[np.sort(firstRows)]
+        elapsed = (time.perf_counter() - searchStart) * 1000
+
+        self.summary.setText(
+            f'{len(rows)} of {len(store.errorIndex)} runs with an error, {len(counts)} jobs ({elapsed:.0f} ms)')
+
+        timezone = tzlocal.get_localzone()
+        for tableRow, row in enumerate(latestRows):
+            jobName = store.jobNames.value(int(jobCodes[row]))
+            started = datetime.fromtimestamp(startedOn[row], tz=timezone)
+
+            model.setItem(tableRow, 0, QReadOnlyItem(jobName, True))
+            model.setItem(tableRow, 1, QReadOnlyItem(str(counts[jobName])))
+            model.setItem(tableRow, 2, QReadOnlyItem(started.strftime('%Y-%m-%d %H:%M:%S')))
+            model.setItem(tableRow, 3, QReadOnlyItem(store.errorMessages.get(int(row), ''), True))
+
+    def onTableDoubleClick(self, index: QModelIndex) -> None:
+        model: QStandardItemModel = self.table.model()
+        self.jobRequested.emit(model.item(index.row(), 0).text())
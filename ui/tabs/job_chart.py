@@ -1,53 +1,33 @@
 import copy
-from datetime import datetime, timedelta
+from datetime import datetime
 from functools import reduce
-from typing import Dict, Iterator, List, Tuple
+from typing import Callable, List, Optional, Tuple
 
-import tzlocal
+import numpy as np
 from PyQt5.QtChart import (QChart, QChartView, QDateTimeAxis, QLineSeries,
                            QValueAxis)
-from PyQt5.QtCore import Qt, QPointF
-from PyQt5.QtGui import QPainter
-from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget
+from PyQt5.QtCore import QDateTime, QPointF, Qt, pyqtSignal
+from PyQt5.QtGui import QOpenGLContext, QPainter
+from PyQt5.QtWidgets import QCheckBox, QHBoxLayout, QLabel, QVBoxLayout, QWidget
 
-from lib import aws
+from lib.downsample import minMaxIndexes
+from lib.usage import UsageSeries
 
+# Series with more points than this are drawn without animations, with OpenGL if available
+largeSeriesPoints = 2000
 
-def splitJobRunsByInterval(
-    runs: List[aws.JobRun],
-    fromDatetime: datetime,
-    toDatetime: datetime,
-    interval: timedelta
-) -> Dict[datetime, List[aws.JobRun]]:
-    result: Dict[datetime, List[aws.JobRun]] = {}
+# Bucket sizes' labels (see lib.usage.rollupIntervals)
+_intervalLabels = {60.0: '1 minute', 3600.0: '1 hour', 86400.0: '1 day'}
 
-    for run in runs:
-        if run.CompletedOn is not None and run.CompletedOn < fromDatetime:
-            continue
+_openGLAvailable: Optional[bool] = None
 
-        for timestamp in QJobsChartWindow.timeIterator(fromDatetime, toDatetime, interval):
-            frameEnd = timestamp + interval
-            # Started ahead
-            if run.StartedOn > frameEnd:
-                continue
-            # Ended before
-            if run.CompletedOn is not None and run.CompletedOn < timestamp:
-                break
 
-            if timestamp not in result:
-                result[timestamp] = []
+def openGLAvailable() -> bool:
+    global _openGLAvailable
+    if _openGLAvailable is None:
+        _openGLAvailable = QOpenGLContext().create()
 
-            result[timestamp].append(run)
-
-    return result
-
-
-def runInRange(job: aws.JobRun, rangeStart: datetime, rangeEnd: datetime) -> bool:
-    start = job.StartedOn
-    end = job.CompletedOn if job.CompletedOn is not None else datetime.now(
-        tzlocal.get_localzone())
-
-    return (rangeStart <= start < rangeEnd) or (rangeStart <= end < rangeEnd)
+    return _openGLAvailable
 
 
 def getClosestPointsInChart(ls: List[QPointF], x: float, numPoints: int = 1) -> List[QPointF]:
@@ -76,34 +56,55 @@ def weightedPointsValues(points: List[QPointF], singlePoint: float):
     return reduce(lambda x, y: x + y, [value * weights[i] for i, value in enumerate(yValues)], 0) / totWeights
 
 
+# Usage of a time range (epoch seconds) in at most about maxBuckets buckets (see lib.usage.UsageRollups.series)
+UsageSource = Callable[[float, float, int], UsageSeries]
+
+
 class QJobsChartWindow(QWidget):
-    jobRuns: Dict[datetime, List[aws.JobRun]]
+    '''Glue usage chart. The series keep only the points visible at the chart's resolution
+        (see renderSeries): zooming in (rubber band, right click to zoom out) queries the usage source
+        again for the visible range, at the finest resolution fitting the chart's width.
+        In live mode (see updateSeries) the chart follows the current time, the source being kept up to date
+        by the owner (see liveToggled).
+    '''
+    liveToggled = pyqtSignal(bool)
+
+    usageSource: UsageSource
+    # Usage of the whole period, sizing the axes
+    usage: UsageSeries
+    # Usage matching the series' points one to one (None if downsampled)
+    rendered: Optional[UsageSeries]
     fromDatetime: datetime
     toDatetime: datetime
-    timeInterval: timedelta
+    # Live mode: the x axis end when following the current time (epoch seconds)
+    followedTimestamp: float
 
     coordsLabel: QLabel
+    # DPU-hours consumed in the visible range
+    totalLabel: QLabel
+    liveCheckbox: QCheckBox
+    chartView: QChartView
+    xAxis: QDateTimeAxis
 
     dpuSeries: QLineSeries
     numJobsSeries: QLineSeries
 
+    # Updating the x axis without rendering the series again (see updateSeries)
+    _updating: bool
+
     def __init__(
         self, fromDT: datetime, toDT: datetime,
-        jobRuns: List[aws.JobRun],
-        interval: timedelta = timedelta(minutes=15),
+        usageSource: UsageSource,
         *args, **kwargs,
     ) -> None:
         super().__init__(*args, **kwargs)
 
         self.fromDatetime = fromDT
         self.toDatetime = toDT
-        self.timeInterval = interval
-
-        filteredJobRuns = [run for run in jobRuns if run.StartedOn >=
-                           fromDT and (run.CompletedOn is None or run.CompletedOn <= toDT)]
-
-        self.jobRuns = splitJobRunsByInterval(
-            filteredJobRuns, self.fromDatetime, self.toDatetime, self.timeInterval)
+        self.usageSource = usageSource
+        self.rendered = None
+        self.followedTimestamp = toDT.timestamp()
+        self._updating = False
 
         self.setWindowTitle('Job runs recap ({fromDT} / {toDT})'.format(
             fromDT=self.fromDatetime.strftime('%Y-%m-%d %H:%M:%S'),
@@ -111,10 +112,11 @@ class QJobsChartWindow(QWidget):
         ))
 
         self.setMinimumSize(1120, 630)
+        self.usage = usage = usageSource(fromDT.timestamp(), toDT.timestamp(), 2 * self.minimumWidth())
 
         chart = QChart()
         chart.setTitle('DPU usage')
-        chart.setAnimationOptions(QChart.SeriesAnimations)
+        chart.setAnimationOptions(QChart.SeriesAnimations if len(usage) <= largeSeriesPoints else QChart.NoAnimation)
         chart.setAcceptHoverEvents(True)
 
         self.dpuSeries, self.numJobsSeries = self.getSeries()
@@ -127,10 +129,10 @@ class QJobsChartWindow(QWidget):
         chart.addSeries(self.dpuSeries)
         chart.addSeries(self.numJobsSeries)
 
-        xAxis = QDateTimeAxis()
+        self.xAxis = xAxis = QDateTimeAxis()
         xAxis.setTickCount(18)
         xAxis.setLabelsAngle(60)
-        xAxis.setFormat('hh:mm')
+        xAxis.setFormat('hh:mm' if (toDT - fromDT).days < 1 else 'MM-dd hh:mm')
         xAxis.setTitleText('Time')
 
         yDPUAxis = QValueAxis()
@@ -140,15 +142,12 @@ class QJobsChartWindow(QWidget):
         yNumJobsAxis.setTitleText("Num jobs")
 
         # We probably need two separated charts
-        if len(self.jobRuns.items()) > 0:
+        if len(self.usage) > 0 and self.usage.runs.max() > 0:
             # Upper part of the chart
-            yDPUAxis.setMin(reduce(lambda x, point: max(
-                x, point.y()), self.dpuSeries.pointsVector(), 0) * (-1))
-            yDPUAxis.setMax(reduce(lambda x, point: max(
-                x, point.y()), self.dpuSeries.pointsVector(), 0))
+            yDPUAxis.setMin(float(self.usage.dpu.max()) * (-1))
+            yDPUAxis.setMax(float(self.usage.dpu.max()))
             # Lower part of the chart
-            yNumJobsAxis.setMax(reduce(lambda x, point: max(
-                x, point.y()), self.numJobsSeries.pointsVector(), 0) * 2)
+            yNumJobsAxis.setMax(int(self.usage.runs.max()) * 2)
 
         chart.addAxis(xAxis, Qt.AlignBottom)
         chart.addAxis(yDPUAxis, Qt.AlignLeft)
@@ -160,29 +159,42 @@ class QJobsChartWindow(QWidget):
         self.numJobsSeries.attachAxis(xAxis)
         self.numJobsSeries.attachAxis(yNumJobsAxis)
 
+        xAxis.setRange(QDateTime.fromMSecsSinceEpoch(int(fromDT.timestamp() * 1000)),
+                       QDateTime.fromMSecsSinceEpoch(int(toDT.timestamp() * 1000)))
+        xAxis.rangeChanged.connect(lambda *_: self.renderSeries())
+
         chart.legend().setVisible(True)
         chart.legend().setAlignment(Qt.AlignBottom)
 
-        dpuChartView = QChartView(chart)
+        self.chartView = dpuChartView = QChartView(chart)
         dpuChartView.setRenderHint(QPainter.Antialiasing)
+        dpuChartView.setRubberBand(QChartView.HorizontalRubberBand)
 
         self.coordsLabel = QLabel()
+        self.totalLabel = QLabel()
+        self.liveCheckbox = QCheckBox('Live')
+        self.liveCheckbox.setToolTip('Follow the current time, polling the running jobs')
+        self.liveCheckbox.stateChanged.connect(lambda state: self.liveToggled.emit(state == Qt.Checked))
+
+        bottomWidget = QWidget()
+        bottomLayout = QHBoxLayout()
+        bottomLayout.setContentsMargins(0, 0, 0, 0)
+        bottomLayout.addWidget(self.totalLabel, stretch=1)
+        bottomLayout.addWidget(self.liveCheckbox)
+        bottomWidget.setLayout(bottomLayout)
 
         layout = QVBoxLayout()
         layout.addWidget(dpuChartView)
         layout.addWidget(self.coordsLabel)
+        layout.addWidget(bottomWidget)
 
         self.setLayout(layout)
 
-    @staticmethod
-    def timeIterator(fromDatetime: datetime, toDatetime: datetime, timeInterval: timedelta) -> Iterator[datetime]:
-        timestamp = fromDatetime
-        yield timestamp
+        self.renderSeries()
 
-        timestamp += timeInterval
-        while(timestamp <= toDatetime):
-            yield timestamp
-            timestamp += timeInterval
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        self.renderSeries()
 
     def getSeries(self) -> Tuple[QLineSeries, QLineSeries]:
         self.dpuSeries = QLineSeries()
@@ -191,20 +203,82 @@ class QJobsChartWindow(QWidget):
         self.numJobsSeries = QLineSeries()
         self.numJobsSeries.setName('N. jobs')
 
-        for timestamp in self.timeIterator(self.fromDatetime, self.toDatetime, self.timeInterval):
-            jobRuns = self.jobRuns[timestamp] if timestamp in self.jobRuns else [
-            ]
-
-            dpu = reduce(lambda acc, run: acc +
-                         run.AllocatedCapacity, jobRuns, 0)
-            epochMs = int(timestamp.timestamp()*1000)
-            self.dpuSeries.append(epochMs, dpu)
-            self.numJobsSeries.append(epochMs, len(jobRuns))
+        if len(self.usage) > largeSeriesPoints and openGLAvailable():
+            self.dpuSeries.setUseOpenGL(True)
+            self.numJobsSeries.setUseOpenGL(True)
 
         return self.dpuSeries, self.numJobsSeries
 
+    def renderSeries(self) -> None:
+        '''Replaces the series' points with the visible range's usage,
+            downsampled to a minimum and a maximum per pixel if still too detailed
+        '''
+        if self._updating:
+            return
+
+        fromTimestamp = self.xAxis.min().toMSecsSinceEpoch() / 1000
+        toTimestamp = self.xAxis.max().toMSecsSinceEpoch() / 1000
+        maxPoints = 2 * max(self.chartView.width(), 1)
+        usage = self.usageSource(fromTimestamp, toTimestamp, maxPoints)
+        xValues = usage.timestamps() * 1000
+        self.rendered = usage if len(usage) <= maxPoints else None
+        self._setTotal(usage, fromTimestamp, toTimestamp)
+
+        for series, yValues in ((self.dpuSeries, usage.dpu), (self.numJobsSeries, usage.runs)):
+            indexes = minMaxIndexes(yValues, maxPoints)
+            series.replace([QPointF(x, y) for x, y in zip(xValues[indexes].tolist(), yValues[indexes].tolist())])
+
+    def updateSeries(self) -> None:
+        '''Live mode: moves the x axis end to the current time (unless zoomed in on the past)
+            and replaces only the series' trailing points which changed (e.g. the runs still active),
+            the whole series being rendered again only if the buckets changed (see renderSeries)
+        '''
+        fromTimestamp = self.xAxis.min().toMSecsSinceEpoch() / 1000
+        toTimestamp = self.xAxis.max().toMSecsSinceEpoch() / 1000
+        if toTimestamp >= self.followedTimestamp - 1:
+            toTimestamp = self.followedTimestamp = datetime.now().timestamp()
+        maxPoints = 2 * max(self.chartView.width(), 1)
+        usage = self.usageSource(fromTimestamp, toTimestamp, maxPoints)
+        rendered = self.rendered
+
+        if rendered is None or len(usage) > maxPoints or len(usage) < len(rendered) \
+                or usage.start != rendered.start or usage.interval != rendered.interval:
+            self._setXAxisEnd(toTimestamp)
+            self.renderSeries()
+
+            return
+
+        # first bucket which changed (or the first new one)
+        count = len(rendered)
+        changed = np.flatnonzero((usage.dpu[:count] != rendered.dpu) | (usage.runs[:count] != rendered.runs))
+        first = int(changed[0]) if len(changed) > 0 else count
+        xValues = usage.timestamps()[first:] * 1000
+
+        for series, yValues in ((self.dpuSeries, usage.dpu), (self.numJobsSeries, usage.runs)):
+            series.removePoints(first, series.count() - first)
+            series.append([QPointF(x, y) for x, y in zip(xValues.tolist(), yValues[first:].tolist())])
+
+        self.rendered = usage
+        self._setXAxisEnd(toTimestamp)
+        self._setTotal(usage, fromTimestamp, toTimestamp)
+
+    def _setXAxisEnd(self, timestamp: float) -> None:
+        self._updating = True
+        try:
+            self.xAxis.setMax(QDateTime.fromMSecsSinceEpoch(int(timestamp * 1000)))
+        finally:
+            self._updating = False
+
+    def _setTotal(self, usage: UsageSeries, fromTimestamp: float, toTimestamp: float) -> None:
+        self.totalLabel.setText('{dpuHours:.1f} DPU-hours from {fromDT} to {toDT} ({interval} buckets)'.format(
+            dpuHours=usage.dpuSeconds.sum() / 3600,
+            fromDT=datetime.fromtimestamp(fromTimestamp).strftime('%Y-%m-%d %H:%M'),
+            toDT=datetime.fromtimestamp(toTimestamp).strftime('%Y-%m-%d %H:%M'),
+            interval=_intervalLabels.get(usage.interval, f'{usage.interval:.0f} s'),
+        ))
+
     def singleValueDatetimeChartLabel(self, label: str, point: QPointF) -> None:
-        time = datetime.fromtimestamp(point.x()/1000).strftime("%H:%M")
+        time = datetime.fromtimestamp(point.x()/1000).strftime("%Y-%m-%d %H:%M")
         self.coordsLabel.setText(
             'Time ({time}), {label}: {value:.2f}'.format(
                 time=time,
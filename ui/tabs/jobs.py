@@ -1,19 +1,23 @@
-import itertools
 from datetime import datetime, timedelta
-from functools import reduce
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
-from PyQt5.QtCore import QModelIndex, QObject, QSize, QTimer, pyqtSignal
-from PyQt5.QtGui import QStandardItemModel
-from PyQt5.QtWidgets import (QCheckBox, QHBoxLayout, QLineEdit, QPushButton,
+from PyQt5.QtCore import QModelIndex, QObject, QSize, Qt, QTimer, pyqtSignal
+from PyQt5.QtWidgets import (QCheckBox, QComboBox, QHBoxLayout, QLineEdit, QPushButton,
                              QTableView, QTextEdit, QVBoxLayout, QWidget)
 import tzlocal
 
-from lib import aws, timeUtils
+from lib import aws
+from lib.cost import CostRates
+from lib.jobRunStore import JobRunStore
+from lib.query import QueryError, QueryField, QuerySchema
+from lib.usage import UsageRollups
 from ui.icon import QSVGIcon
 from ui.jobDetails import QJobDetails
-from ui.tabs.common import QReadOnlyItem, TabViewSignals, decorateTable, searchInObjectFieldFactory, searchInObjectFieldsFactory
+from ui.tabs.common import FilterWorker, TabViewSignals, decorateTable, filterPlaceholder, setFilterError
+from ui.tabs.costs import QCostWindow
+from ui.tabs.errorSearch import QErrorSearchWindow
 from ui.tabs.job_chart import QJobsChartWindow
+from ui.tabs.jobsModel import JobSummary, QJobsTableModel
 
 jobColumns = [
     ('', 10), ('Name', 330),
@@ -22,46 +26,62 @@ jobColumns = [
 ]
 
 
-def jobFilterFactory(text: str, onlyRunJobs: bool) -> Callable[[aws.Job, Optional[aws.JobRun]], bool]:
-    filters = text.split(';')
+# Usage chart periods: label, period (the resolution depends on the zoom, see lib.usage.UsageRollups)
+usagePeriods = [
+    ('last 24 hours', timedelta(days=1)),
+    ('last 7 days', timedelta(days=7)),
+    ('last 30 days', timedelta(days=30)),
+    ('last 90 days', timedelta(days=90)),
+    ('last year', timedelta(days=365)),
+]
 
-    filtersList = []
+# Live usage chart: polling interval (ms) and amount of jobs without active runs probed at each poll
+livePollInterval = 30_000
+liveProbedJobs = 10
+
+# Filterable fields of the (job, last job run) rows
+jobQuerySchema = QuerySchema([
+    QueryField('Name', 'text', lambda row: row[0].Name, freeText=True),
+    QueryField('Result', 'text', lambda row: row[1].JobRunState if row[1] is not None else None,
+               freeText=True, aliases=('State',)),
+    QueryField('Error message', 'text', lambda row: row[1].ErrorMessage if row[1] is not None else None,
+               freeText=True, aliases=('Error',)),
+    QueryField('Last execution', 'date', lambda row: row[1].StartedOn if row[1] is not None else None,
+               aliases=('Started',)),
+    QueryField('Duration', 'duration', lambda row: row[1].ExecutionTime if row[1] is not None else None),
+    QueryField('Worker type', 'text', lambda row: row[0].WorkerType),
+    QueryField('Glue version', 'number',
+               lambda row: float(row[0].GlueVersion) if row[0].GlueVersion else None),
+    QueryField('DPU', 'number',
+               lambda row: row[0].MaxCapacity if row[0].MaxCapacity is not None else row[0].AllocatedCapacity),
+    QueryField('Workers', 'number', lambda row: row[0].NumberOfWorkers),
+])
 
-    for filterStr in filters:
-        if filterStr == '':
-            continue
 
-        key = None
-        value = None
-        try:
-            filterStr.index(':')
-            keyValue = filterStr.split(':')
-            key = keyValue[0].strip()
-            value = keyValue[1].strip()
-
-            filtersList.append(searchInObjectFieldFactory(key, value))
-        except ValueError:
-            value = filterStr.strip()
-            filtersList.append(searchInObjectFieldsFactory(value))
+def jobFilterFactory(text: str, onlyRunJobs: bool) -> Callable[[aws.Job, Optional[aws.JobRun]], bool]:
+    '''Compiles the filter query (see lib.query), raises QueryError'''
+    predicate = jobQuerySchema.compile(text)
 
     def jobFilter(job: aws.Job, lastJobRun: Optional[aws.JobRun]) -> bool:
         if onlyRunJobs and lastJobRun is None:
             return False
 
-        obj = {
-            'Name': job.Name,
-            'Result': lastJobRun.JobRunState if lastJobRun is not None else None,
-            'Error message': lastJobRun.ErrorMessage if lastJobRun is not None else None,
-        }
-
-        return reduce(lambda x, y: x and y(obj), filtersList, True)
+        return predicate((job, lastJobRun))
 
     return jobFilter
 
 
 class JobsSignals(TabViewSignals):
     jobsUpdated = pyqtSignal(list)
+    jobsAppended = pyqtSignal(list)
     jobRunsUpdated = pyqtSignal(list)
+    # Job details: pages of runs not yet downloaded (job name, dialog generation, next token),
+    # the replies to a dialog replaced since then being dropped
+    jobRunsPageRequested = pyqtSignal(str, int, object)
+    jobRunsPageDownloaded = pyqtSignal(str, int, list, object)
+    jobRunsPageRaised = pyqtSignal(str, int, Exception)
+    # Live usage chart: active run ids by job, jobs to probe (see lib.aws.pollJobRuns)
+    liveJobRunsRequested = pyqtSignal(dict, list)
 
 
 class JobsTab(QWidget):
@@ -71,19 +91,37 @@ class JobsTab(QWidget):
     filterText: str
     filter: QTextEdit
     table: QTableView
+    tableModel: QJobsTableModel
+    filterWorker: FilterWorker
     refreshButton: QPushButton
-    last24HoursUsageButton: QPushButton
+    usageButton: QPushButton
+    usagePeriodPicklist: QComboBox
+    errorSearchButton: QPushButton
+    costButton: QPushButton
     failedOnlyCheckbox: QCheckBox
 
     jobs: List[aws.Job]
-    jobRuns: Dict[str, List[aws.JobRun]]
-    jobDialogs: Dict[str, QJobDetails]
+    jobsByName: Dict[str, aws.Job]
+    jobRunStore: JobRunStore
+    usageRollups: UsageRollups
+    # Latest run of each job, kept up to date as runs are appended
+    lastJobRuns: Dict[str, aws.JobRun]
+    # Opened dialogs by job name, along with the generation they've been opened in
+    jobDialogs: Dict[str, Tuple[int, QJobDetails]]
+    jobDialogsGeneration: int
+    # Jobs whose runs have been appended since the last table update
+    updatedJobNames: Set[str]
 
     jobRunDetailsTimer: QTimer
+    liveTimer: QTimer
+    # Rotates the probed jobs among the ones without active runs
+    liveProbeOffset: int
 
     statusIcons: Dict[str, QSVGIcon]
 
-    usageWindow: QJobsChartWindow
+    usageWindow: Optional[QJobsChartWindow]
+    errorSearchWindow: QErrorSearchWindow
+    costWindow: QCostWindow
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -91,11 +129,25 @@ class JobsTab(QWidget):
         self.signals = JobsSignals()
 
         self.signals.jobsUpdated.connect(self.updateJobs)
+        self.signals.jobsAppended.connect(self.appendJobs)
         self.signals.jobRunsUpdated.connect(self.appendJobRuns)
+        self.signals.jobRunsPageDownloaded.connect(self.onJobRunsPageDownloaded)
+        self.signals.jobRunsPageRaised.connect(self.onJobRunsPageRaised)
 
         self.jobs = []
-        self.jobRuns = {}
+        self.jobsByName = {}
+        self.jobRunStore = JobRunStore()
+        self.usageRollups = UsageRollups()
+        self.lastJobRuns = {}
+        self.usageWindow = None
+
+        self.liveTimer = QTimer()
+        self.liveTimer.setInterval(livePollInterval)
+        self.liveTimer.timeout.connect(self.pollLiveJobRuns)
+        self.liveProbeOffset = 0
         self.jobDialogs = {}
+        self.jobDialogsGeneration = 0
+        self.updatedJobNames = set()
 
         self.statusIcons = {
             'sunny': QSVGIcon('sun.svg'),
@@ -122,8 +174,7 @@ class JobsTab(QWidget):
         self.filterTimer.timeout.connect(self._refreshTable)
         self.filterText = ''
         self.filter = QLineEdit()
-        self.filter.setPlaceholderText(
-            'free text | field : value | filter 1; filter 2; ...')
+        self.filter.setPlaceholderText(filterPlaceholder)
         self.filter.textChanged.connect(self.onFilterChanged)
 
         self.refreshButton = QPushButton()
@@ -136,28 +187,58 @@ class JobsTab(QWidget):
         filterWidget.setLayout(filterLayout)
 
         self.table = QTableView()
-        decorateTable(self.table, *jobColumns)
+        self.filterWorker = FilterWorker(self.onFilterEvaluated)
+        self.tableModel = QJobsTableModel(jobColumns, self.statusIcons)
+        self.tableModel.sortRequested.connect(self._refreshTable)
+        decorateTable(self.table, *jobColumns, model=self.tableModel)
+        # Unsorted (i.e. in the API order) until a header is clicked
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
 
         self.table.doubleClicked.connect(self.onTableDoubleClick)
 
-        self.last24HoursUsageButton = QPushButton(
-            'Show Glue usage (last 24 hours)')
+        self.usageButton = QPushButton('Show Glue usage')
+        self.usagePeriodPicklist = QComboBox()
+        for label, _ in usagePeriods:
+            self.usagePeriodPicklist.addItem(label)
 
         def showUsage():
+            _, period = usagePeriods[self.usagePeriodPicklist.currentIndex()]
             toDT = datetime.now(tz=tzlocal.get_localzone())
-            fromDT = toDT - timedelta(days=1)
+            fromDT = toDT - period
+            self.liveTimer.stop()
             self.usageWindow = QJobsChartWindow(
                 fromDT=fromDT,
                 toDT=toDT,
-                jobRuns=list(itertools.chain(*list(self.jobRuns.values()))),
-                interval=timedelta(minutes=1)
+                usageSource=lambda fromTimestamp, toTimestamp, maxBuckets: self.usageRollups.series(
+                    self.jobRunStore, fromTimestamp, toTimestamp, maxBuckets),
             )
+            self.usageWindow.liveToggled.connect(self.setLiveUsage)
             self.usageWindow.show()
 
-        self.last24HoursUsageButton.pressed.connect(showUsage)
+        self.usageButton.pressed.connect(showUsage)
+
+        self.errorSearchButton = QPushButton('Search job run errors')
+        self.errorSearchWindow = QErrorSearchWindow(self.jobRunStore)
+        self.errorSearchWindow.jobRequested.connect(self.onJobRequested)
+        self.errorSearchButton.pressed.connect(self.errorSearchWindow.show)
+
+        self.costButton = QPushButton('Show Glue costs')
+        self.costWindow = QCostWindow(self.jobRunStore)
+        self.costWindow.jobRequested.connect(self.onJobRequested)
+        self.costButton.pressed.connect(self.costWindow.show)
+
+        buttonsWidget = QWidget()
+        buttonsLayout = QHBoxLayout()
+        buttonsLayout.setContentsMargins(0, 0, 0, 0)
+        buttonsLayout.addWidget(self.usageButton, stretch=1)
+        buttonsLayout.addWidget(self.usagePeriodPicklist)
+        buttonsLayout.addWidget(self.errorSearchButton)
+        buttonsLayout.addWidget(self.costButton)
+        buttonsWidget.setLayout(buttonsLayout)
 
         layout.addWidget(filterWidget)
-        layout.addWidget(self.last24HoursUsageButton)
+        layout.addWidget(buttonsWidget)
         layout.addWidget(self.table, stretch=1)
 
         self.setLayout(layout)
@@ -167,129 +248,175 @@ class JobsTab(QWidget):
     def setEnableStatus(self, status: bool):
         self.filter.setEnabled(status)
         self.refreshButton.setEnabled(status)
-        self.last24HoursUsageButton.setEnabled(status)
+        self.usageButton.setEnabled(status)
+        self.usagePeriodPicklist.setEnabled(status)
+        self.errorSearchButton.setEnabled(status)
+        self.costButton.setEnabled(status)
 
     def updateJobs(self, jobs: List[aws.Job]):
         # Reset the opened dialogs
         self.jobDialogs = {}
 
-        self.jobs = jobs
+        self.jobs = list(jobs)
+        self.jobsByName = {job.Name: job for job in self.jobs}
         if len(jobs) == 0:
-            self.jobRuns = {}
+            self.jobRunStore.clear()
+            self.usageRollups.clear()
+            self.lastJobRuns = {}
+            self.updatedJobNames = set()
+            self.tableModel.clearSummaries()
 
         self._refreshTable()
 
+    def appendJobs(self, jobs: List[aws.Job]):
+        '''Adds a page of jobs, inserting only the new rows (unless sorted or already filtering)'''
+        self.jobs.extend(jobs)
+        self.jobsByName.update((job.Name, job) for job in jobs)
+
+        if self.tableModel.sortColumn >= 0 or self.filterWorker.isBusy():
+            self._refreshTable()
+
+            return
+
+        jobFilter = self.getJobFilter()
+        self.tableModel.appendJobs(
+            [job for job in jobs if jobFilter(job, self.getLastJobRun(job.Name))])
+
     def appendJobRuns(self, jobRuns: List[aws.JobRun]):
         if self.jobRunDetailsTimer.isActive():
             self.jobRunDetailsTimer.stop()
 
-        for run in jobRuns:
-            if run.JobName not in self.jobRuns:
-                self.jobRuns[run.JobName] = []
-            if next((jr for jr in self.jobRuns[run.JobName] if jr.Id == run.Id), None) is None:
-                self.jobRuns[run.JobName].append(run)
+        self.usageRollups.update(self.jobRunStore, self.jobRunStore.append(jobRuns))
+        jobNames = {run.JobName for run in jobRuns}
+        for jobName in jobNames:
+            self.lastJobRuns[jobName] = self.jobRunStore.latestJobRun(jobName)
+        self.updatedJobNames.update(jobNames)
+        if self.liveTimer.isActive() and self.usageWindow is not None:
+            self.usageWindow.updateSeries()
 
         self.jobRunDetailsTimer.start()
 
+    def setLiveUsage(self, live: bool) -> None:
+        if not live:
+            self.liveTimer.stop()
+
+            return
+
+        self.liveTimer.start()
+        self.pollLiveJobRuns()
+
+    def pollLiveJobRuns(self) -> None:
+        '''Requests the runs of the jobs having active runs, probing a few other jobs in turn for new runs'''
+        if self.usageWindow is None or not self.usageWindow.isVisible():
+            self.liveTimer.stop()
+
+            return
+
+        activeRunIds = self.jobRunStore.activeJobRuns()
+        idleJobNames = [job.Name for job in self.jobs if job.Name not in activeRunIds]
+        probeJobNames = []
+        if len(idleJobNames) > 0:
+            start = self.liveProbeOffset % len(idleJobNames)
+            probeJobNames = (idleJobNames[start:] + idleJobNames[:start])[:liveProbedJobs]
+            self.liveProbeOffset = start + len(probeJobNames)
+
+        self.signals.liveJobRunsRequested.emit(activeRunIds, probeJobNames)
+        # the chart follows the current time even if nothing changed
+        self.usageWindow.updateSeries()
+
     def onTableDoubleClick(self, index: QModelIndex):
-        model: QStandardItemModel = self.table.model()
-        jobNameItem: QReadOnlyItem = model.item(index.row(), 1)
-        jobName = jobNameItem.text()
+        self.openJobDetails(self.tableModel.jobAt(index.row()))
+
+    def setDPUHourPrice(self, price: float) -> None:
+        self.costWindow.setRates(CostRates(dpuHour=price))
 
-        job = next(job for job in self.jobs if job.Name == jobName)
-        jobRuns = self.jobRuns[jobName] if jobName in self.jobRuns else []
+    def onJobRequested(self, jobName: str) -> None:
+        if jobName in self.jobsByName:
+            self.openJobDetails(self.jobsByName[jobName])
+
+    def openJobDetails(self, job: aws.Job) -> None:
+        jobName = job.Name
 
         if jobName in self.jobDialogs:
             del(self.jobDialogs[jobName])
 
-        detailsWindow = QJobDetails(job, jobRuns)
+        self.jobDialogsGeneration += 1
+        generation = self.jobDialogsGeneration
+        detailsWindow = QJobDetails(job, self.jobRunStore)
+        detailsWindow.runsModel.pageRequested.connect(
+            lambda nextToken: self.signals.jobRunsPageRequested.emit(jobName, generation, nextToken))
         detailsWindow.show()
-        self.jobDialogs[jobName] = detailsWindow
+        self.jobDialogs[jobName] = (generation, detailsWindow)
+
+    def getJobDialog(self, jobName: str, generation: int) -> Optional[QJobDetails]:
+        '''The job's dialog if it's still the one opened in the given generation'''
+        if jobName not in self.jobDialogs:
+            return None
+        dialogGeneration, dialog = self.jobDialogs[jobName]
 
-    def getFilteredJobs(self) -> List[aws.Job]:
+        return dialog if dialogGeneration == generation else None
+
+    def onJobRunsPageDownloaded(
+        self, jobName: str, generation: int, jobRuns: List[aws.JobRun], nextToken: Optional[str],
+    ) -> None:
+        dialog = self.getJobDialog(jobName, generation)
+        if dialog is not None:
+            dialog.runsModel.appendPage(jobRuns, nextToken)
+
+    def onJobRunsPageRaised(self, jobName: str, generation: int, exception: Exception) -> None:
+        dialog = self.getJobDialog(jobName, generation)
+        if dialog is not None:
+            dialog.runsModel.setPageError()
+
+    def getJobFilter(self) -> Callable[[aws.Job, Optional[aws.JobRun]], bool]:
         rawFilters = self.filterText
         onlyRunJobs = False
         if self.failedOnlyCheckbox.isChecked():
             rawFilters += '; Result:FAILED'
             onlyRunJobs = True
-        jobFilter = jobFilterFactory(rawFilters, onlyRunJobs)
-        return [job for job in self.jobs if jobFilter(job, next(
-            (runs[0] for name, runs in self.jobRuns.items() if name == job.Name and len(runs) > 0), None))]
 
-    def onJobRunsAppended(self):
-        jobs = self.getFilteredJobs()
-        model: QStandardItemModel = self.table.model()
-        shownJobs = [item.text() for item in (model.item(i, 1)
-                                              for i in range(model.rowCount()))]
-        allFound = reduce(
-            lambda prev, job: prev and job.Name in shownJobs, jobs, True)
-        if not allFound:
-            self._refreshTable()
-        else:
-            self.populateJobRunDetails()
+        try:
+            jobFilter = jobFilterFactory(rawFilters, onlyRunJobs)
+        except QueryError as ex:
+            setFilterError(self.filter, str(ex))
 
-    def populateJobRunDetails(self):
-        model = self.table.model()
-        for jobName, jobRuns in self.jobRuns.items():
-            row = next((i for i in range(model.rowCount())
-                        if model.item(i, 1).text() == jobName), None)
-            # The job has been filtered out
-            if row is None:
-                continue
-
-            jobRuns.sort(key=lambda run: run.StartedOn, reverse=True)
-            jobRuns = jobRuns[0:5]
-
-            totalRuns = len(jobRuns)
-            succeededRuns = len(
-                [run for run in jobRuns if run.JobRunState == 'SUCCEEDED'])
-            failedRuns = totalRuns - succeededRuns
-
-            if totalRuns == 0:
-                continue
-
-            icon = self.statusIcons['sunny']
-            if failedRuns == 1:
-                icon = self.statusIcons['cloudy']
-            elif failedRuns == 2:
-                icon = self.statusIcons['rainy']
-            elif failedRuns >= 3:
-                icon = self.statusIcons['thunders']
-
-            model.setItem(row, 0, QReadOnlyItem(icon, False, ''))
-
-            lastExecDate = jobRuns[0].StartedOn
-            lastDuration = jobRuns[0].ExecutionTime
-
-            model.setItem(row, 2, QReadOnlyItem(
-                lastExecDate.strftime('%Y-%m-%d %H:%M:%S')))
-            model.setItem(row, 3, QReadOnlyItem(
-                timeUtils.fromTimeToString(seconds=lastDuration)))
-            model.setItem(row, 4, QReadOnlyItem(jobRuns[0].JobRunState))
-
-            errorItem = QReadOnlyItem(
-                jobRuns[0].ErrorMessage, withAutoTooltip=True)
-            errorItem.setToolTip(jobRuns[0].ErrorMessage)
-            model.setItem(row, 5, errorItem)
+            return lambda *_: False
 
-    def _refreshTable(self) -> None:
-        jobs = self.getFilteredJobs()
+        setFilterError(self.filter, None)
 
-        tableModel: QStandardItemModel = self.table.model()
+        return jobFilter
 
-        # Clean up the table
-        if tableModel.rowCount() > 0:
-            tableModel.removeRows(0, tableModel.rowCount())
+    def getLastJobRun(self, jobName: str) -> Optional[aws.JobRun]:
+        return self.lastJobRuns.get(jobName)
+
+    def onJobRunsAppended(self):
+        self.populateJobRunDetails()
+        # The new runs may change which jobs pass the filter, or their order
+        self._refreshTable()
 
-        # Fill the job names
-        for row in range(len(jobs)):
-            job = jobs[row]
+    def populateJobRunDetails(self):
+        '''Updates the summaries of the jobs whose runs have been appended'''
+        summaries = {jobName: JobSummary.fromStore(self.jobRunStore, jobName)
+                     for jobName in self.updatedJobNames if jobName in self.jobsByName}
+        self.updatedJobNames = set()
 
-            tableModel.setItem(row, 1, QReadOnlyItem(
-                text=job.Name, withAutoTooltip=True))
+        self.tableModel.updateSummaries(summaries)
 
-        # Fill the job run defails
-        self.populateJobRunDetails()
+    def _refreshTable(self) -> None:
+        '''Filters and sorts the jobs in background, see onFilterEvaluated'''
+        jobFilter = self.getJobFilter()
+        summaries = self.tableModel.summaries
+        rows = [(job, self.getLastJobRun(job.Name), summaries.get(job.Name)) for job in self.jobs]
+
+        self.filterWorker.evaluate(
+            rows,
+            lambda row: jobFilter(row[0], row[1]),
+            sortKey=self.tableModel.sortKey(self.tableModel.sortColumn),
+            reverse=self.tableModel.sortOrder == Qt.DescendingOrder,
+        )
+
+    def onFilterEvaluated(self, rows: Tuple[Tuple[aws.Job, Optional[aws.JobRun], Optional[JobSummary]], ...], indexes: List[int]) -> None:
+        self.tableModel.applyJobs([rows[index][0] for index in indexes])
 
     def onFilterChanged(self, text: str) -> None:
         if self.filterTimer.isActive():
@@ -0,0 +1,223 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from PyQt5.QtGui import QIcon
+
+from lib import aws, listUtils, timeUtils
+from lib.jobRunStore import JobRunStore
+from ui.tabs.common import applyRows, missingLast
+
+
+@dataclass
+class JobSummary:
+    '''What the jobs table shows about the job's runs'''
+    lastRun: Optional[aws.JobRun] = field(default=None)
+    # Amount of the last runs taken into account for the status icon, not succeeded among them
+    recentRuns: int = field(default=0)
+    recentNotSucceeded: int = field(default=0)
+    # Amount of all the known runs by state
+    stateCounts: Dict[str, int] = field(default_factory=lambda: {})
+
+    @staticmethod
+    def fromRuns(jobRuns: List[aws.JobRun], stateCounts: Optional[Dict[str, int]] = None) -> 'JobSummary':
+        '''jobRuns: the job's last runs, newest first'''
+        return JobSummary(
+            lastRun=jobRuns[0] if len(jobRuns) > 0 else None,
+            recentRuns=len(jobRuns),
+            recentNotSucceeded=len(
+                [run for run in jobRuns if run.JobRunState != 'SUCCEEDED']),
+            stateCounts=stateCounts if stateCounts is not None else {},
+        )
+
+    @staticmethod
+    def fromStore(store: JobRunStore, jobName: str) -> 'JobSummary':
+        '''From the recent runs and the state counts maintained by the store (no sorting involved)'''
+        return JobSummary.fromRuns(store.recentJobRuns(jobName), store.jobStateCounts(jobName))
+
+    @property
+    def statusTooltip(self) -> str:
+        if self.recentRuns == 0:
+            return ''
+
+        counts = ', '.join(f'{state}: {count}' for state, count in sorted(self.stateCounts.items()))
+
+        return f'Not succeeded: {self.recentNotSucceeded} of the last {self.recentRuns} runs\n{counts}'
+
+    @property
+    def statusIcon(self) -> Optional[str]:
+        if self.recentRuns == 0:
+            return None
+        if self.recentNotSucceeded == 0:
+            return 'sunny'
+        if self.recentNotSucceeded == 1:
+            return 'cloudy'
+        if self.recentNotSucceeded == 2:
+            return 'rainy'
+
+        return 'thunders'
+
+
+class QJobsTableModel(QAbstractTableModel):
+    '''Jobs table model backed by the (filtered) jobs list and their summaries.
+        Cells are rendered on demand: the formatted strings of a row are computed the first time
+        the row is shown and kept until its summary changes.
+        Sorting is delegated: sort only records the column and order and emits sortRequested.
+    '''
+    sortRequested = pyqtSignal()
+
+    columns: List[Tuple[str, int]]
+    sortColumn: int
+    sortOrder: Qt.SortOrder
+    statusIcons: Dict[str, QIcon]
+
+    jobs: List[aws.Job]
+    summaries: Dict[str, JobSummary]
+
+    _rows: Dict[str, int]
+    _display: Dict[str, Tuple[str, ...]]
+
+    def __init__(self, columns: List[Tuple[str, int]], statusIcons: Dict[str, QIcon], *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.columns = columns
+        self.statusIcons = statusIcons
+        self.sortColumn = -1
+        self.sortOrder = Qt.AscendingOrder
+
+        self.jobs = []
+        self.summaries = {}
+
+        self._rows = {}
+        self._display = {}
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.jobs)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> Any:
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.columns[section][0]
+
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def _displayRow(self, job: aws.Job) -> Tuple[str, ...]:
+        display = self._display.get(job.Name)
+        if display is not None:
+            return display
+
+        summary = self.summaries.get(job.Name)
+        lastRun = summary.lastRun if summary is not None else None
+        if lastRun is None:
+            display = ('', job.Name, '', '', '', '')
+        else:
+            display = (
+                '',
+                job.Name,
+                lastRun.StartedOn.strftime('%Y-%m-%d %H:%M:%S'),
+                timeUtils.fromTimeToString(seconds=lastRun.ExecutionTime),
+                lastRun.JobRunState,
+                lastRun.ErrorMessage,
+            )
+        self._display[job.Name] = display
+
+        return display
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+
+        job = self.jobs[index.row()]
+        column = index.column()
+
+        if role == Qt.DecorationRole and column == 0:
+            summary = self.summaries.get(job.Name)
+            icon = summary.statusIcon if summary is not None else None
+
+            return self.statusIcons[icon] if icon is not None else None
+        if role == Qt.ToolTipRole and column == 0:
+            summary = self.summaries.get(job.Name)
+
+            return summary.statusTooltip if summary is not None else None
+        # name and error message have auto tooltips
+        if role == Qt.DisplayRole or (role == Qt.ToolTipRole and column in (1, 5)):
+            return self._displayRow(job)[column]
+
+        return None
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:
+        self.sortColumn = column
+        self.sortOrder = order
+        self.sortRequested.emit()
+
+    def sortKey(self, column: int) -> Optional[Callable[[Tuple[aws.Job, Optional[aws.JobRun], Optional[JobSummary]]], Any]]:
+        '''The sort key of the column on the (job, last run, summary) rows, None if not sortable'''
+        return _sortKeys.get(column)
+
+    def jobAt(self, row: int) -> aws.Job:
+        return self.jobs[row]
+
+    def rowOf(self, jobName: str) -> Optional[int]:
+        return self._rows.get(jobName)
+
+    def setJobs(self, jobs: List[aws.Job]) -> None:
+        self.beginResetModel()
+        self.jobs = list(jobs)
+        self._rows = {job.Name: row for row, job in enumerate(self.jobs)}
+        self.endResetModel()
+
+    def applyJobs(self, jobs: List[aws.Job]) -> None:
+        '''Replaces the jobs removing, moving and inserting only the rows that changed,
+            so that the views keep their selection and scroll position
+        '''
+        applyRows(self, self.jobs, jobs, key=lambda job: job.Name)
+        self._rows = {job.Name: row for row, job in enumerate(self.jobs)}
+
+    def appendJobs(self, jobs: List[aws.Job]) -> None:
+        if len(jobs) == 0:
+            return
+
+        start = len(self.jobs)
+        self.beginInsertRows(QModelIndex(), start, start + len(jobs) - 1)
+        for row, job in enumerate(jobs, start):
+            self.jobs.append(job)
+            self._rows[job.Name] = row
+        self.endInsertRows()
+
+    def clearSummaries(self) -> None:
+        self.summaries = {}
+        self._display = {}
+        if len(self.jobs) > 0:
+            self.dataChanged.emit(self.index(0, 0), self.index(
+                len(self.jobs) - 1, len(self.columns) - 1))
+
+    def updateSummaries(self, summaries: Dict[str, JobSummary]) -> None:
+        '''Replaces the summaries of the given jobs, refreshing only the rows whose summary changed'''
+        changed = [jobName for jobName, summary in summaries.items() if self.summaries.get(jobName) != summary]
+        for jobName in changed:
+            self.summaries[jobName] = summaries[jobName]
+            self._display.pop(jobName, None)
+
+        rows = sorted(row for row in (self.rowOf(jobName) for jobName in changed) if row is not None)
+        for first, last in listUtils.contiguousRanges(rows):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.columns) - 1))
+
+
+def _lastRunKey(getter: Callable[[aws.JobRun], Any]) -> Callable[[tuple], Tuple[bool, Any]]:
+    return lambda row: missingLast(getter(row[1]) if row[1] is not None else None)
+
+
+# Sort keys by column
+_sortKeys: Dict[int, Callable[[tuple], Any]] = {
+    0: lambda row: missingLast(row[2].recentNotSucceeded if row[2] is not None else None),
+    1: lambda row: row[0].Name.lower(),
+    2: _lastRunKey(lambda run: run.StartedOn),
+    3: _lastRunKey(lambda run: run.ExecutionTime),
+    4: _lastRunKey(lambda run: run.JobRunState),
+    5: _lastRunKey(lambda run: run.ErrorMessage or None),
+}
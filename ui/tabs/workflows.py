@@ -1,57 +1,62 @@
-from functools import reduce
 from lib import aws
-import math
 from logging import Logger, getLogger
-from typing import Callable, Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 
-from PyQt5.QtCore import QSize, QTimer, pyqtSignal
-from PyQt5.QtGui import QStandardItemModel
+from PyQt5.QtCore import QModelIndex, QSize, Qt, QTimer, pyqtSignal
 from PyQt5.QtWidgets import (QCheckBox, QHBoxLayout, QLineEdit, QPushButton, QTableView,
                              QVBoxLayout, QWidget)
 
 from lib.aws.workflows import Workflow
+from lib.query import QueryError, QueryField, QuerySchema
 from ui.icon import QSVGIcon
-from ui.tabs.common import QReadOnlyItem, TabViewSignals, decorateTable, searchInObjectFieldFactory, searchInObjectFieldsFactory
+from ui.workflowDetails import QWorkflowDetails
+from ui.tabs.common import FilterWorker, TabViewSignals, decorateTable, filterPlaceholder, setFilterError
+from ui.tabs.workflowsModel import QWorkflowsTableModel
 
 
 class WorkflowsTabSignals(TabViewSignals):
     workflowsUpdated = pyqtSignal(list)
     workflowsRunsUpdated = pyqtSignal(list)
+    # Workflow details
+    graphRequested = pyqtSignal(object)
+    graphDownloaded = pyqtSignal(str, object)
+    graphRaised = pyqtSignal(str, Exception)
+    runsRequested = pyqtSignal(object)
+    runsDownloaded = pyqtSignal(str, list)
+    runsRaised = pyqtSignal(str, Exception)
 
 
-def workflowFilterFactory(text: str) -> Callable[[aws.Workflow], bool]:
-    filters = list(map(lambda x: x.strip(), text.split(';')))
+workflowColumns = [
+    ('', 10), ('Name', 220),
+    ('Last exec date', 140), ('Last exec duration', 120),
+    ('Last exec result', 140), ('Su / Fa / Ti / St / Ru / To', 280,
+                                '[Su]cceded / [Fa]iled / [Ti]meout / [St]opped / [Ru]nning / [To]tal')
+]
 
-    filtersList = []
 
-    for filterStr in filters:
-        if filterStr == '':
-            continue
+def _lastRunDuration(flow: aws.Workflow) -> Optional[float]:
+    lastRun = flow.LastRun
+    if lastRun is None or lastRun.CompletedOn is None:
+        return None
 
-        key = None
-        value = None
-        try:
-            filterStr.index(':')
-            keyValue = filterStr.split(':')
-            key = keyValue[0].strip()
-            value = keyValue[1].strip()
-
-            filtersList.append(searchInObjectFieldFactory(key, value))
-        except ValueError:
-            value = filterStr.strip()
-            filtersList.append(searchInObjectFieldsFactory(value))
-
-    def workflowFilter(flow: aws.Workflow) -> bool:
-        lastRun = flow.LastRun
-
-        obj = {
-            'Name': flow.Name,
-            'Last exec result': lastRun.Status if lastRun is not None else None,
-        }
+    return (lastRun.CompletedOn - lastRun.StartedOn).total_seconds()
 
-        return reduce(lambda x, y: x and y(obj), filtersList, True)
 
-    return workflowFilter
+workflowQuerySchema = QuerySchema([
+    QueryField('Name', 'text', lambda flow: flow.Name, freeText=True),
+    QueryField('Last exec result', 'text',
+               lambda flow: flow.LastRun.Status if flow.LastRun is not None else None,
+               freeText=True, aliases=('Result', 'Status')),
+    QueryField('Last exec date', 'date',
+               lambda flow: flow.LastRun.StartedOn if flow.LastRun is not None else None,
+               aliases=('Last execution', 'Started')),
+    QueryField('Last exec duration', 'duration', _lastRunDuration, aliases=('Duration',)),
+])
+
+
+def workflowFilterFactory(text: str) -> Callable[[aws.Workflow], bool]:
+    '''Compiles the filter query (see lib.query), raises QueryError'''
+    return workflowQuerySchema.compile(text)
 
 
 class WorkflowsTab(QWidget):
@@ -61,12 +66,16 @@ class WorkflowsTab(QWidget):
 
     # Class attributes
     workflows: List[Workflow]
+    workflowDialogs: Dict[str, QWorkflowDetails]
     statusIcons: Dict[str, QSVGIcon]
     filterText: str
     filterTimer: QTimer
+    filterWorker: FilterWorker
 
     # UI elements
     filter: QLineEdit
+    table: QTableView
+    tableModel: QWorkflowsTableModel
     failedIfNotAllExecuted: QCheckBox
     refreshButton: QPushButton
 
@@ -76,6 +85,7 @@ class WorkflowsTab(QWidget):
         self.signals = WorkflowsTabSignals()
         self.logger = getLogger()
         self.workflows = []
+        self.workflowDialogs = {}
         self.filterText = ''
         self.statusIcons = {
             'play': QSVGIcon('play.svg'),
@@ -94,13 +104,13 @@ class WorkflowsTab(QWidget):
         self.filterTimer.setInterval(500)
         self.filterTimer.setSingleShot(True)
         self.filterTimer.timeout.connect(self._refreshTable)
+        self.filterWorker = FilterWorker(self.onFilterEvaluated)
 
         self.failedIfNotAllExecuted = QCheckBox('Failed if not all executed')
-        self.failedIfNotAllExecuted.toggled.connect(self._refreshTable)
+        self.failedIfNotAllExecuted.toggled.connect(self.onFailedIfNotAllExecutedToggled)
 
         self.filter = QLineEdit()
-        self.filter.setPlaceholderText(
-            'free text | field : value | filter 1; filter 2; ...')
+        self.filter.setPlaceholderText(filterPlaceholder)
         self.filter.textChanged.connect(self.onFilterChanged)
 
         self.refreshButton = QPushButton()
@@ -113,12 +123,14 @@ class WorkflowsTab(QWidget):
         filterWidget.setLayout(filterLayout)
 
         self.table = QTableView()
-        decorateTable(
-            self.table, ('', 10), ('Name', 220),
-            ('Last exec date', 140), ('Last exec duration', 120),
-            ('Last exec result', 140), ('Su / Fa / Ti / St / Ru / To', 280,
-                                        '[Su]cceded / [Fa]iled / [Ti]meout / [St]opped / [Ru]nning / [To]tal')
-        )
+        self.tableModel = QWorkflowsTableModel(workflowColumns, self.statusIcons)
+        self.tableModel.sortRequested.connect(self._refreshTable)
+        decorateTable(self.table, *workflowColumns, model=self.tableModel)
+        # Unsorted (i.e. in the API order) until a header is clicked
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+
+        self.table.doubleClicked.connect(self.onTableDoubleClick)
 
         layout.addWidget(filterWidget)
         layout.addWidget(self.table, stretch=1)
@@ -128,6 +140,10 @@ class WorkflowsTab(QWidget):
         # events
         self.signals.enable.connect(self.setEnableState)
         self.signals.workflowsUpdated.connect(self.onWorkflowsListUpdate)
+        self.signals.graphDownloaded.connect(self.onGraphDownloaded)
+        self.signals.graphRaised.connect(self.onGraphRaised)
+        self.signals.runsDownloaded.connect(self.onRunsDownloaded)
+        self.signals.runsRaised.connect(self.onRunsRaised)
 
     def setEnableState(self, state: bool):
         self.logger.debug(
@@ -139,77 +155,67 @@ class WorkflowsTab(QWidget):
 
     def onWorkflowsListUpdate(self, workflows: List[Workflow]) -> None:
         self.workflows = workflows
+        self.tableModel.updateDisplays(workflows)
         self._refreshTable()
 
-    def getFilteredWorkflows(self):
+    def onFailedIfNotAllExecutedToggled(self, state: bool) -> None:
+        self.tableModel.setFailedIfNotAllExecuted(state)
+        # only the status icons sorting depends on it
+        if self.tableModel.sortColumn == 0:
+            self._refreshTable()
+
+    def onTableDoubleClick(self, index: QModelIndex) -> None:
+        workflow = self.tableModel.workflowAt(index.row())
+        workflowName = workflow.Name
+
+        detailsWindow = QWorkflowDetails(workflow)
+        detailsWindow.show()
+        self.workflowDialogs[workflowName] = detailsWindow
+
+        # The graph and the run history are downloaded only when the details are requested
+        self.signals.graphRequested.emit(workflow)
+        self.signals.runsRequested.emit(workflow)
+
+    def onGraphDownloaded(self, workflowName: str, graph: aws.WorkflowGraph) -> None:
+        if workflowName in self.workflowDialogs:
+            self.workflowDialogs[workflowName].setGraph(graph)
+
+    def onGraphRaised(self, workflowName: str, exception: Exception) -> None:
+        if workflowName in self.workflowDialogs:
+            self.workflowDialogs[workflowName].setGraphError(str(exception))
+
+    def onRunsDownloaded(self, workflowName: str, runs: List[aws.WorkflowRun]) -> None:
+        if workflowName in self.workflowDialogs:
+            self.workflowDialogs[workflowName].setRuns(runs)
+
+    def onRunsRaised(self, workflowName: str, exception: Exception) -> None:
+        if workflowName in self.workflowDialogs:
+            self.workflowDialogs[workflowName].setRunsError(str(exception))
+
+    def getWorkflowFilter(self) -> Callable[[aws.Workflow], bool]:
         rawFilters = self.filterText
-        workflowFilter = workflowFilterFactory(rawFilters)
+        try:
+            workflowFilter = workflowFilterFactory(rawFilters)
+        except QueryError as ex:
+            setFilterError(self.filter, str(ex))
 
-        return [flow for flow in self.workflows if workflowFilter(flow)]
+            return lambda *_: False
+
+        setFilterError(self.filter, None)
+
+        return workflowFilter
 
     def _refreshTable(self):
-        workflows = self.getFilteredWorkflows()
-        tableModel: QStandardItemModel = self.table.model()
-
-        # Clean up the table
-        if tableModel.rowCount() > 0:
-            tableModel.removeRows(0, tableModel.rowCount())
-
-        # Fill the data
-        statusIcon = {
-            'RUNNING': self.statusIcons['play'],
-            'COMPLETED': self.statusIcons['sunny'],
-            'STOPPING': self.statusIcons['pause'],
-            'STOPPED': self.statusIcons['stop'],
-            'ERROR': self.statusIcons['thunders'],
-        }
-        timeFormat = '%Y-%m-%d %H:%M:%S'
-        for row in range(0, len(workflows)):
-            flow = workflows[row]
-            tableModel.setItem(row, 1, QReadOnlyItem(flow.Name, True))
-
-            if flow.LastRun is not None:
-                icon = None
-                lastRun = flow.LastRun
-                startDate = lastRun.StartedOn.strftime(timeFormat)
-                execDuration = ''
-                if lastRun.CompletedOn is not None:
-                    execDuration = (lastRun.CompletedOn -
-                                    lastRun.StartedOn).total_seconds()
-                    hours = math.floor(execDuration / 60 / 60)
-                    minutes = math.floor(execDuration / 60) - (hours * 60)
-                    seconds = int(execDuration - hours *
-                                  60 * 60 - minutes * 60)
-                    execDuration = f'{hours:02d}:{minutes:02d}:{seconds:02d}'
-
-                icon = statusIcon[lastRun.Status]
-                executions = 'N/A'
-                if lastRun.Statistics is not None:
-                    executions = 'Su: {succeded:02d} / Fa: {failed:02d} / Ti: {timeout:02d} / St: {stopped:02d} / Ru: {running:02d} / To: {total:02d}'.format(
-                        succeded=lastRun.Statistics.SucceededActions,
-                        failed=lastRun.Statistics.FailedActions,
-                        timeout=lastRun.Statistics.TimeoutActions,
-                        stopped=lastRun.Statistics.StoppedActions,
-                        running=lastRun.Statistics.RunningActions,
-                        total=lastRun.Statistics.TotalActions,
-                    )
-                    if lastRun.CompletedOn is not None \
-                            and (
-                                lastRun.Statistics.FailedActions > 0
-                                or lastRun.Statistics.StoppedActions > 0
-                                or lastRun.Statistics.TimeoutActions > 0
-                                or (
-                                    self.failedIfNotAllExecuted.isChecked()
-                                    and lastRun.Statistics.SucceededActions < lastRun.Statistics.TotalActions
-                                )
-                            ):
-                        icon = statusIcon['ERROR']
-
-                tableModel.setItem(row, 0, QReadOnlyItem(icon, False, ''))
-                tableModel.setItem(row, 2, QReadOnlyItem(startDate))
-                tableModel.setItem(row, 3, QReadOnlyItem(execDuration))
-                tableModel.setItem(row, 4, QReadOnlyItem(lastRun.Status, True))
-                tableModel.setItem(row, 5, QReadOnlyItem(executions, True))
+        '''Filters the workflows in background, see onFilterEvaluated'''
+        self.filterWorker.evaluate(
+            self.workflows,
+            self.getWorkflowFilter(),
+            sortKey=self.tableModel.sortKey(self.tableModel.sortColumn),
+            reverse=self.tableModel.sortOrder == Qt.DescendingOrder,
+        )
+
+    def onFilterEvaluated(self, workflows: Tuple[Workflow, ...], indexes: List[int]) -> None:
+        self.tableModel.applyWorkflows([workflows[index] for index in indexes])
 
     def onFilterChanged(self, text: str) -> None:
         if self.filterTimer.isActive():
@@ -0,0 +1,190 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from PyQt5.QtGui import QIcon
+
+from lib import aws, listUtils
+from ui.tabs.common import applyRows, formatWorkflowRunDuration, formatWorkflowRunStatistics, missingLast
+
+# Status icon by last run status
+_statusIcons = {
+    'RUNNING': 'play',
+    'COMPLETED': 'sunny',
+    'STOPPING': 'pause',
+    'STOPPED': 'stop',
+    'ERROR': 'thunders',
+}
+
+
+@dataclass
+class WorkflowDisplay:
+    '''What the workflows table shows about the workflow, computed once per downloaded workflow'''
+    cells: Tuple[str, ...]
+    statusIcon: Optional[str] = field(default=None)
+    # The last run completed with failed, stopped or timed out actions
+    failed: bool = field(default=False)
+    # The last run completed without executing all the actions
+    notAllExecuted: bool = field(default=False)
+
+    @staticmethod
+    def fromWorkflow(flow: aws.Workflow) -> 'WorkflowDisplay':
+        lastRun = flow.LastRun
+        if lastRun is None:
+            return WorkflowDisplay(cells=('', flow.Name, '', '', '', ''))
+
+        statistics = lastRun.Statistics
+        completed = lastRun.CompletedOn is not None and statistics is not None
+
+        return WorkflowDisplay(
+            cells=(
+                '',
+                flow.Name,
+                lastRun.StartedOn.strftime('%Y-%m-%d %H:%M:%S'),
+                formatWorkflowRunDuration(lastRun),
+                lastRun.Status,
+                formatWorkflowRunStatistics(statistics),
+            ),
+            statusIcon=_statusIcons.get(lastRun.Status),
+            failed=completed and (
+                statistics.FailedActions > 0 or statistics.StoppedActions > 0 or statistics.TimeoutActions > 0),
+            notAllExecuted=completed and statistics.SucceededActions < statistics.TotalActions,
+        )
+
+    def icon(self, failedIfNotAllExecuted: bool) -> Optional[str]:
+        if self.failed or (failedIfNotAllExecuted and self.notAllExecuted):
+            return 'thunders'
+
+        return self.statusIcon
+
+
+class QWorkflowsTableModel(QAbstractTableModel):
+    '''Workflows table model backed by the (filtered) workflows list.
+        The display records are computed once per downloaded workflow (see updateDisplays) and reused
+        by any filter, sorting or "failed if not all executed" toggle.
+        Sorting is delegated: sort only records the column and order and emits sortRequested.
+    '''
+    sortRequested = pyqtSignal()
+
+    columns: List[Tuple[str, ...]]
+    sortColumn: int
+    sortOrder: Qt.SortOrder
+    statusIcons: Dict[str, QIcon]
+    failedIfNotAllExecuted: bool
+
+    workflows: List[aws.Workflow]
+    displays: Dict[str, WorkflowDisplay]
+
+    def __init__(self, columns: List[Tuple[str, ...]], statusIcons: Dict[str, QIcon], *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.columns = columns
+        self.statusIcons = statusIcons
+        self.sortColumn = -1
+        self.sortOrder = Qt.AscendingOrder
+        self.failedIfNotAllExecuted = False
+
+        self.workflows = []
+        self.displays = {}
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.workflows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole) -> Any:
+        if orientation != Qt.Horizontal:
+            return None
+        if role == Qt.DisplayRole:
+            return self.columns[section][0]
+        if role == Qt.ToolTipRole and len(self.columns[section]) == 3:
+            return self.columns[section][2]
+
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlags:
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+
+        display = self.displays[self.workflows[index.row()].Name]
+        column = index.column()
+
+        if role == Qt.DecorationRole and column == 0:
+            icon = display.icon(self.failedIfNotAllExecuted)
+
+            return self.statusIcons[icon] if icon is not None else None
+        # name, result and statistics have auto tooltips
+        if role == Qt.DisplayRole or (role == Qt.ToolTipRole and column in (1, 4, 5)):
+            return display.cells[column]
+
+        return None
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:
+        self.sortColumn = column
+        self.sortOrder = order
+        self.sortRequested.emit()
+
+    def sortKey(self, column: int) -> Optional[Callable[[aws.Workflow], Any]]:
+        '''The sort key of the column on the workflows, None if not sortable'''
+        if column == 0:
+            displays = dict(self.displays)
+            failedIfNotAllExecuted = self.failedIfNotAllExecuted
+
+            return lambda flow: missingLast(displays[flow.Name].icon(failedIfNotAllExecuted))
+
+        return _sortKeys.get(column)
+
+    def workflowAt(self, row: int) -> aws.Workflow:
+        return self.workflows[row]
+
+    def updateDisplays(self, workflows: List[aws.Workflow]) -> None:
+        '''Computes the display records of the downloaded workflows, refreshing the shown rows whose record changed'''
+        changed = set()
+        for flow in workflows:
+            display = WorkflowDisplay.fromWorkflow(flow)
+            if self.displays.get(flow.Name) != display:
+                self.displays[flow.Name] = display
+                changed.add(flow.Name)
+
+        rows = [row for row, flow in enumerate(self.workflows) if flow.Name in changed]
+        for first, last in listUtils.contiguousRanges(rows):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.columns) - 1))
+
+    def setFailedIfNotAllExecuted(self, state: bool) -> None:
+        self.failedIfNotAllExecuted = state
+        if len(self.workflows) > 0:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.workflows) - 1, 0), [Qt.DecorationRole])
+
+    def applyWorkflows(self, workflows: List[aws.Workflow]) -> None:
+        '''Replaces the shown workflows removing, moving and inserting only the rows that changed'''
+        applyRows(self, self.workflows, workflows, key=lambda flow: flow.Name)
+
+
+def _lastRunKey(getter: Callable[[aws.WorkflowRun], Any]) -> Callable[[aws.Workflow], Tuple[bool, Any]]:
+    return lambda flow: missingLast(getter(flow.LastRun) if flow.LastRun is not None else None)
+
+
+def _duration(run: aws.WorkflowRun) -> Optional[float]:
+    return (run.CompletedOn - run.StartedOn).total_seconds() if run.CompletedOn is not None else None
+
+
+def _successRatio(run: aws.WorkflowRun) -> Optional[float]:
+    statistics = run.Statistics
+    if statistics is None or statistics.TotalActions == 0:
+        return None
+
+    return statistics.SucceededActions / statistics.TotalActions
+
+
+# Sort keys by column (the status icon's one depends on the model's state, see sortKey)
+_sortKeys: Dict[int, Callable[[aws.Workflow], Any]] = {
+    1: lambda flow: flow.Name.lower(),
+    2: _lastRunKey(lambda run: run.StartedOn),
+    3: _lastRunKey(_duration),
+    4: _lastRunKey(lambda run: run.Status),
+    5: _lastRunKey(_successRatio),
+}
@@ -0,0 +1,109 @@
+from typing import List, Optional
+
+from PyQt5.QtCore import QSize
+from PyQt5.QtGui import QStandardItemModel
+from PyQt5.QtWidgets import QLabel, QTableView, QVBoxLayout, QWidget
+
+from lib import aws
+from ui.tabs.common import (QReadOnlyItem, decorateTable, formatWorkflowRunDuration,
+                            formatWorkflowRunStatistics)
+from ui.termDescription import QTermDescription
+
+
+class QWorkflowDetails(QWidget):
+    workflow: aws.Workflow
+    graph: Optional[aws.WorkflowGraph]
+    runs: List[aws.WorkflowRun]
+
+    graphStatus: QLabel
+    graphTable: QTableView
+    runsStatus: QLabel
+    runsTable: QTableView
+
+    def __init__(self, workflow: aws.Workflow, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.workflow = workflow
+        self.graph = None
+        self.runs = []
+
+        self.setWindowTitle(f'"{workflow.Name}" workflow details')
+
+        mainLayout = QVBoxLayout()
+        self.setLayout(mainLayout)
+
+        timeFormat = '%Y-%m-%d %H:%M:%S'
+        td = QTermDescription([
+            ('Name', workflow.Name),
+            ('Description', workflow.Description or ''),
+            ('Created on', workflow.CreatedOn.strftime(timeFormat)),
+            ('Last modified on', workflow.LastModifiedOn.strftime(
+                timeFormat) if workflow.LastModifiedOn is not None else ''),
+            ('Max concurrent runs', str(workflow.MaxConcurrentRuns)),
+        ])
+        mainLayout.addWidget(td)
+
+        self.setMinimumSize(QSize(1150, 800))
+
+        self.graphStatus = QLabel('Loading the workflow graph...')
+        mainLayout.addWidget(self.graphStatus)
+
+        self.graphTable = QTableView()
+        decorateTable(self.graphTable, ('Type', 100),
+                      ('Name', 320), ('Depends on', 440))
+        mainLayout.addWidget(self.graphTable, stretch=1)
+
+        self.runsStatus = QLabel('Loading the run history...')
+        mainLayout.addWidget(self.runsStatus)
+
+        self.runsTable = QTableView()
+        decorateTable(self.runsTable, ('Run Id', 150), ('Status', 100), ('Start time', 147),
+                      ('End time', 147), ('Duration', 70), ('Su / Fa / Ti / St / Ru / To', 280), ('Error', 220))
+        mainLayout.addWidget(self.runsTable, stretch=1)
+
+    def setGraph(self, graph: aws.WorkflowGraph) -> None:
+        self.graph = graph
+        self.graphStatus.setText(f'Graph: {len(graph.Nodes)} nodes')
+
+        model: QStandardItemModel = self.graphTable.model()
+        model.removeRows(0, model.rowCount())
+
+        names = graph.nodeNames()
+        for row, node in enumerate(graph.Nodes):
+            dependencies = ', '.join(
+                names.get(uniqueId, uniqueId) for uniqueId in graph.predecessors(node['UniqueId']))
+
+            model.setItem(row, 0, QReadOnlyItem(node.get('Type', '')))
+            model.setItem(row, 1, QReadOnlyItem(
+                node.get('Name', ''), withAutoTooltip=True))
+            model.setItem(row, 2, QReadOnlyItem(
+                dependencies, withAutoTooltip=True))
+
+    def setGraphError(self, message: str) -> None:
+        self.graphStatus.setText(f'Unable to load the workflow graph: {message}')
+
+    def setRuns(self, runs: List[aws.WorkflowRun]) -> None:
+        self.runs = runs
+        self.runsStatus.setText(f'Run history: {len(runs)} runs')
+
+        model: QStandardItemModel = self.runsTable.model()
+        model.removeRows(0, model.rowCount())
+
+        timeFormat = '%Y-%m-%d %H:%M:%S'
+        for row, run in enumerate(runs):
+            model.setItem(row, 0, QReadOnlyItem(
+                run.WorkflowRunId, withAutoTooltip=True))
+            model.setItem(row, 1, QReadOnlyItem(run.Status))
+            model.setItem(row, 2, QReadOnlyItem(
+                run.StartedOn.strftime(timeFormat)))
+            model.setItem(row, 3, QReadOnlyItem(run.CompletedOn.strftime(
+                timeFormat) if run.CompletedOn is not None else ''))
+            model.setItem(row, 4, QReadOnlyItem(
+                formatWorkflowRunDuration(run)))
+            model.setItem(row, 5, QReadOnlyItem(
+                formatWorkflowRunStatistics(run.Statistics), withAutoTooltip=True))
+            model.setItem(row, 6, QReadOnlyItem(
+                run.ErrorMessage or '', withAutoTooltip=True))
+
+    def setRunsError(self, message: str) -> None:
+        self.runsStatus.setText(f'Unable to load the run history: {message}')